@@ -0,0 +1,2 @@
+# Benchmarks for loading, showing, saving, backing up and restoring configs.
+# Run with: python -m benchmarks.run --help
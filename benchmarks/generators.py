@@ -0,0 +1,119 @@
+"""
+Deterministic generators for realistic but arbitrarily large New World config files.
+Scale 1 is roughly the size of a real install; the same (scale, seed) always gives the same bytes.
+"""
+import hashlib
+import random
+from pathlib import Path
+
+# Approximate size of a real install at scale 1
+REAL_ACTIONMAPS = 12
+REAL_ACTIONS_PER_MAP = 25
+REAL_SETTINGS = 300
+REAL_EXTRA_FILES = 20
+
+DEVICES = ("keyboard", "gamepad", "mouse")
+KEYBOARD_INPUTS = [chr(c) for c in range(ord("a"), ord("z") + 1)] + [
+    "space", "lshift", "lctrl", "tab", "escape", "enter", "f1", "f2", "f3", "f4", "1", "2", "3", "4", "5"]
+GAMEPAD_INPUTS = ["pad_a", "pad_b", "pad_x", "pad_y", "pad_l1", "pad_r1", "pad_l2", "pad_r2", "pad_start", "pad_select"]
+MOUSE_INPUTS = ["mouse1", "mouse2", "mouse3", "mwheel_up", "mwheel_down"]
+INPUTS = {"keyboard": KEYBOARD_INPUTS, "gamepad": GAMEPAD_INPUTS, "mouse": MOUSE_INPUTS}
+
+SETTING_TYPES = (
+    ("float", "{EA2C3E90-AFBE-44D4-A90D-FAAF79BAF8D5}"),
+    ("bool", "{A0CA880C-AFE4-43CB-926C-59AC48496112}"),
+    ("int", "{72B9409A-7D1A-4831-9CFE-FCB3FADD3426}"),
+    ("Color", "{7894072A-9050-4F0F-901B-34B1A0D29417}"),
+    ("AZStd::string", "{03AAAB3F-5C47-5A66-9EBC-D5FA4DB353C9}"),
+    ("Vector3", "{8379EB7D-01FA-4538-B64B-A6543B4BE73D}"),
+)
+
+
+def _setting_value(rng: random.Random, type_name: str) -> str:
+    if type_name == "float":
+        return f"{rng.random():.7f}"
+    if type_name == "bool":
+        return rng.choice(("true", "false"))
+    if type_name == "int":
+        return str(rng.randrange(0, 100))
+    if type_name == "Color":
+        return " ".join(f"{rng.random():.7f}" for _ in range(3)) + " 1.0000000"
+    if type_name == "AZStd::string":
+        return rng.choice(("en-us", "de-de", "fr-fr", "default", "high", "low"))
+    return " ".join(f"{rng.uniform(-10, 10):.7f}" for _ in range(3))
+
+
+def generate_rebindings(scale: float = 1, seed: int = 0) -> bytes:
+    """A rebindings_b*.xml with about scale times the actionmaps of a real file."""
+    rng = random.Random(f"rebindings-{scale}-{seed}")
+    actionmap_count = max(1, round(REAL_ACTIONMAPS * scale))
+    lines = ['<?xml version="1.0" encoding="utf-8"?>', '<ActionMaps version="1">']
+    for m in range(actionmap_count):
+        lines.append(f'  <actionmap name="actionmap_{m}">')
+        for a in range(REAL_ACTIONS_PER_MAP):
+            action_name = f"action_{m}_{a}"
+            devices = [device for device in DEVICES if rng.random() < 0.6]
+            if not devices:
+                lines.append(f'    <action name="{action_name}"/>')
+                continue
+            lines.append(f'    <action name="{action_name}">')
+            for device in devices:
+                default_input = rng.choice(INPUTS[device])
+                current_input = default_input if rng.random() < 0.8 else rng.choice(INPUTS[device])
+                lines.append(f'      <rebind device="{device}" input="{current_input}" defaultInput="{default_input}"/>')
+            lines.append('    </action>')
+        lines.append('  </actionmap>')
+    lines.append('</ActionMaps>')
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def generate_user_settings(scale: float = 1, seed: int = 0) -> bytes:
+    """A usersettings.javsave with about scale times the settings of a real file, including nested classes."""
+    rng = random.Random(f"usersettings-{scale}-{seed}")
+    setting_count = max(1, round(REAL_SETTINGS * scale))
+    lines = ['<ObjectStream version="3">',
+             '\t<Class name="UserSettings" type="{A3E4A7C0-9C4B-4C5A-8B0A-6F2E1B7D9C11}">']
+    index = 0
+    while index < setting_count:
+        if rng.random() < 0.05: # A field-less group, shown transparently in the tree
+            lines.append('\t\t<Class name="AZStd::vector" type="{A60E3E61-1FF6-4982-B6B8-9E4350C4C679}">')
+            for _ in range(min(5, setting_count - index)):
+                lines.append(f'\t\t\t<Class name="int" field="m_groupValue{index}" value="{rng.randrange(10)}" '
+                             f'type="{SETTING_TYPES[2][1]}"/>')
+                index += 1
+            lines.append('\t\t</Class>')
+            continue
+        type_name, type_id = rng.choice(SETTING_TYPES)
+        field_name = f"m_{'reticle' if type_name == 'Color' and rng.random() < 0.1 else 'setting'}{type_name.split(':')[-1]}{index}"
+        value = _setting_value(rng, type_name)
+        if type_name == "Vector3":
+            lines.append(f'\t\t<Class name="{type_name}" field="{field_name}" value="{value}" type="{type_id}">')
+            lines.append(f'\t\t\t<Class name="float" field="m_x{index}" value="{rng.random():.7f}" type="{SETTING_TYPES[0][1]}"/>')
+            lines.append('\t\t</Class>')
+        else:
+            lines.append(f'\t\t<Class name="{type_name}" field="{field_name}" value="{value}" type="{type_id}"/>')
+        index += 1
+    lines.append('\t</Class>')
+    lines.append('</ObjectStream>')
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def generate_config_folder(dest: str | Path, scale: float = 1, seed: int = 0) -> Path:
+    """
+    Writes a complete "AGS/New World"-like folder to dest: a hashed rebindings file, the
+    generic rebindings.xml, savedata/usersettings.javsave and scale times the extra files
+    (logs, caches) of a real install. Returns dest.
+    """
+    dest = Path(dest)
+    rng = random.Random(f"folder-{scale}-{seed}")
+    (dest / "savedata").mkdir(parents=True, exist_ok=True)
+    rebindings = generate_rebindings(scale, seed)
+    name_hash = hashlib.sha256(rebindings).hexdigest()[:8]
+    (dest / f"rebindings_b{name_hash}.xml").write_bytes(rebindings)
+    (dest / "rebindings.xml").write_bytes(generate_rebindings(1, seed))
+    (dest / "savedata" / "usersettings.javsave").write_bytes(generate_user_settings(scale, seed))
+    for i in range(max(1, round(REAL_EXTRA_FILES * scale))):
+        subdir = dest / ("logs" if i % 3 == 0 else "cache") / f"{i % 10}"
+        subdir.mkdir(parents=True, exist_ok=True)
+        (subdir / f"file_{i}.dat").write_bytes(rng.randbytes(rng.randrange(512, 16384)))
+    return dest
@@ -0,0 +1,481 @@
+"""
+Benchmark runner. Each (case, scale) runs in a fresh child process so peak RSS is per case,
+and GUI cases use the offscreen Qt platform. Results are written as JSON and can be compared
+with an earlier run:
+
+    python -m benchmarks.run --scales 1 10 100 --output before.json
+    python -m benchmarks.run --scales 1 10 100 --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from .generators import generate_config_folder, generate_rebindings
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_REPEAT = 5
+CHILD_TIMEOUT_SECONDS = 1800
+SAVE_EDITS = 10 # Values changed before each save
+SEARCH_KEYSTROKES = ("m", "m_", "m_r", "m_re") # Typed one after the other; the matches narrow from almost every row to a few
+REBINDINGS_VARIANTS = 4 # Hashed rebindings files in the folder for the *_variants cases
+PRESET_ENTRIES = 1000 # Settings in the preset of the apply_preset cases
+DOCUMENT_STATE_KEYS = {"rebindings": "rebindings", "user_settings": "usersettings"} # Document kind -> state key prefix
+
+
+@dataclass
+class Case:
+    setup: Callable[[Path, float], dict] # (work dir, scale) -> state
+    run: Callable[[dict], None] # Timed
+    prepare: Callable[[dict], None] | None = None # Runs untimed before every run
+    uses_qt: bool = False
+    metrics: Callable[[dict], dict] | None = None # Extra result fields, read from the state after the runs
+
+
+# --- Case implementations ----------------------------------------------------------------
+# Imports of the application happen inside the cases so the parent process stays light.
+
+def _config_folder(workdir: Path, scale: float) -> Path:
+    return generate_config_folder(workdir / "AGS" / "New World", scale)
+
+
+def _setup_parser(workdir: Path, scale: float) -> dict:
+    from newworld_config_manager.config_parser import ConfigParser
+    config_dir = _config_folder(workdir, scale)
+    parser = ConfigParser(config_dir)
+    return {"config_dir": config_dir, "parser": parser,
+            "rebindings_path": parser._find_latest_rebindings_file(),
+            "usersettings_path": str(config_dir / "savedata" / "usersettings.javsave")}
+
+
+def _load_cold(path_key: str):
+    def run(state):
+        from newworld_config_manager.config_parser import ConfigParser
+        ConfigParser(state["config_dir"]).load_xml_config(state[path_key]) # New parser: empty parse cache
+    return run
+
+
+def _load_cached(path_key: str):
+    def run(state):
+        state["parser"].load_xml_config(state[path_key])
+    return run
+
+
+def _setup_variants(workdir: Path, scale: float) -> dict:
+    state = _setup_parser(workdir, scale)
+    for seed in range(1, REBINDINGS_VARIANTS): # Older variants with different bindings
+        path = state["config_dir"] / f"rebindings_b{seed:08x}.xml"
+        path.write_bytes(generate_rebindings(scale, seed))
+        os.utime(path, ns=(0, seed))
+    return state
+
+
+def _load_variants(state):
+    from newworld_config_manager.config_parser import ConfigParser
+    variants = ConfigParser(state["config_dir"]).load_rebindings_variants() # New parser: empty parse cache
+    if len(variants) != REBINDINGS_VARIANTS:
+        raise RuntimeError(f"loaded {len(variants)} rebindings files")
+    variants.differences()
+
+
+def _setup_window(workdir: Path, scale: float) -> dict:
+    os.environ["NEW_WORLD_CONFIG_DIR"] = str(workdir / "AGS" / "New World")
+    os.environ["XDG_CACHE_HOME"] = str(workdir / "cache") # Keep the discovery cache out of the user's home
+    state = _setup_parser(workdir, scale)
+    from PyQt6.QtWidgets import QApplication
+    from newworld_config_manager.main_window import MainWindow
+    state["app"] = QApplication.instance() or QApplication([])
+    state["window"] = MainWindow()
+    state["rebindings_root"] = state["parser"].load_xml_config(state["rebindings_path"])
+    state["usersettings_root"] = state["parser"].load_xml_config(state["usersettings_path"])
+    return state
+
+
+def _populate(kind: str, fetch_all: bool = False):
+    def run(state):
+        window = state["window"]
+        document = window._open_document(kind, state[f"{DOCUMENT_STATE_KEYS[kind]}_path"],
+                                         state[f"{DOCUMENT_STATE_KEYS[kind]}_root"], None)
+        if fetch_all:
+            document.model.fetch_all()
+        state["app"].processEvents()
+    return run
+
+
+def _setup_both_documents(workdir: Path, scale: float) -> dict:
+    state = _setup_window(workdir, scale)
+    for kind in ("rebindings", "user_settings"):
+        _populate(kind)(state)
+    return state
+
+
+def _switch_documents(state):
+    window = state["window"]
+    for kind in ("rebindings", "user_settings"): # Both tabs are already populated: no parsing, no disk I/O
+        window.document_tabs.setCurrentWidget(window.documents[kind])
+        state["app"].processEvents()
+
+
+def _setup_search(workdir: Path, scale: float) -> dict:
+    from newworld_config_manager.search_index import SearchIndex
+    state = _setup_window(workdir, scale)
+    root = state["usersettings_root"]
+    state["document"] = state["window"]._open_document("user_settings", state["usersettings_path"], root,
+                                                       SearchIndex.for_user_settings(root))
+    state["window"].show()
+    state["app"].processEvents()
+    return state
+
+
+def _clear_search(state):
+    state["document"].apply_search("")
+    state["app"].processEvents()
+
+
+def _search_narrowing(state):
+    for text in SEARCH_KEYSTROKES:
+        state["document"].apply_search(text)
+        state["app"].processEvents() # Lays out and paints the filtered tree, as after a keystroke
+
+
+def _setup_model(workdir: Path, scale: float) -> dict:
+    state = _setup_parser(workdir, scale)
+    state["rebindings_root"] = state["parser"].load_xml_config(state["rebindings_path"])
+    state["usersettings_root"] = state["parser"].load_xml_config(state["usersettings_path"])
+    return state
+
+
+def _row_memory(kind: str):
+    """
+    Builds every row of a fresh model (no view) and records the Python memory they hold, measured
+    with tracemalloc, so the timings of these cases include tracing overhead. For rebindings this
+    includes the conflict index.
+    """
+    def run(state):
+        import gc
+        import tracemalloc
+        from newworld_config_manager.ui.config_tree_model import ConfigTreeModel
+        state.pop("model", None) # Free the previous run's rows before measuring
+        gc.collect()
+        tracemalloc.start()
+        try:
+            model = ConfigTreeModel()
+            if kind == "rebindings":
+                model.set_rebindings(state["rebindings_root"])
+            else:
+                model.set_user_settings(state["usersettings_root"])
+            model.fetch_all()
+            gc.collect()
+            state["row_bytes"] = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        state["model"] = model
+    return run
+
+
+def _row_memory_metrics(state) -> dict:
+    rows = state["model"].row_count_built
+    return {"model_rows_built": rows, "row_bytes": state["row_bytes"],
+            "bytes_per_row": round(state["row_bytes"] / max(rows, 1), 1)}
+
+
+def _setup_save(workdir: Path, scale: float) -> dict:
+    state = _setup_parser(workdir, scale)
+    root = state["parser"].load_xml_config(state["usersettings_path"])
+    settings = [element for element in root.iter("Class") if "field" in element.attrib]
+    step = max(1, len(settings) // SAVE_EDITS)
+    state.update(root=root, edited=settings[::step][:SAVE_EDITS], round=0)
+    return state
+
+
+def _edit_for_save(state):
+    state["round"] += 1
+    for element in state["edited"]:
+        element.set("value", f"{state['round']}.5")
+
+
+def _save(minimal: bool):
+    def run(state):
+        changed = {(element, "value") for element in state["edited"]} if minimal else None
+        if not state["parser"].save_xml_config(state["usersettings_path"], state["root"], changed):
+            raise RuntimeError("save failed")
+    return run
+
+
+def _store_dir(state) -> Path:
+    return state["parser"].get_backup_store().root
+
+
+def _clear_store(state):
+    shutil.rmtree(_store_dir(state), ignore_errors=True)
+
+
+def _setup_backed_up(workdir: Path, scale: float) -> dict:
+    state = _setup_parser(workdir, scale)
+    if not state["parser"].backup_config_folder():
+        raise RuntimeError("initial backup failed")
+    state["round"] = 0
+    return state
+
+
+def _touch_files(state):
+    """Changes a few files and adds one, like a game session would."""
+    state["round"] += 1
+    config_dir = state["config_dir"]
+    for path in sorted(config_dir.rglob("*.dat"))[:3]:
+        path.write_bytes(path.read_bytes()[::-1])
+    (config_dir / "logs" / f"session_{state['round']}.log").write_text("log line\n" * 100)
+
+
+def _backup(state):
+    if not state["parser"].backup_config_folder():
+        raise RuntimeError("backup failed")
+
+
+def _backup_archive(state):
+    if not state["parser"].backup_config_folder(archive=True):
+        raise RuntimeError("archive backup failed")
+
+
+def _restore(state):
+    snapshot_id = state["parser"].list_backups()[-1] # The initial snapshot
+    if state["parser"].restore_backup(snapshot_id=snapshot_id) is None:
+        raise RuntimeError("restore failed")
+
+
+def _edit_live_settings(state):
+    """Changes SAVE_EDITS values spread over the live usersettings.javsave, differently every round."""
+    state["round"] += 1
+    path = Path(state["usersettings_path"])
+    lines = path.read_text(encoding="utf-8").split("\n")
+    value_lines = [index for index, line in enumerate(lines) if 'field="' in line and 'value="' in line]
+    for index in value_lines[::max(1, len(value_lines) // SAVE_EDITS)][:SAVE_EDITS]:
+        head, _sep, rest = lines[index].partition('value="')
+        lines[index] = f'{head}value="{state["round"]}.25{rest[rest.index(chr(34)):]}'
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def _setup_diff(workdir: Path, scale: float) -> dict:
+    state = _setup_backed_up(workdir, scale)
+    _edit_live_settings(state)
+    return state
+
+
+def _diff(state):
+    if not any(file_diff.changes for file_diff in state["parser"].diff_with("latest")):
+        raise RuntimeError("diff found no changes")
+
+
+def _setup_external_change(workdir: Path, scale: float) -> dict:
+    state = _setup_parser(workdir, scale)
+    state.update(root=state["parser"].load_xml_config(state["usersettings_path"]), round=0)
+    return state
+
+
+def _merge_external_change(state):
+    """What the window does when the game rewrote an open file: check, re-parse, merge into the open tree."""
+    from newworld_config_manager.external_changes import merge_external_changes
+    parser, path = state["parser"], state["usersettings_path"]
+    if not parser.file_changed_on_disk(path):
+        raise RuntimeError("change on disk not noticed")
+    changes = merge_external_changes(state["root"], parser.reload_changed_file(path), {})
+    if changes.structural or not changes.applied:
+        raise RuntimeError("no values merged")
+    parser.adopt_reloaded(path, state["root"])
+
+
+def _setup_preset(workdir: Path, scale: float) -> dict:
+    from newworld_config_manager.journal import EditJournal
+    from newworld_config_manager.presets import index_settings
+    state = _setup_parser(workdir, scale)
+    root = state["parser"].load_xml_config(state["usersettings_path"])
+    fields = [name for name, elements in index_settings(root).items() if elements[0].get("name") == "float"]
+    state.update(root=root, fields=fields[:PRESET_ENTRIES], index=index_settings(root), journal=EditJournal(), round=0)
+    return state
+
+
+def _next_preset(state):
+    from newworld_config_manager.presets import Preset
+    state["round"] += 1
+    state["preset"] = Preset(settings={name: state["round"] + 0.5 for name in state["fields"]})
+
+
+def _apply_preset(reuse_index: bool):
+    def run(state):
+        from newworld_config_manager.presets import apply_settings
+        changes, _missing = apply_settings(state["root"], state["preset"].settings, state["index"] if reuse_index else None)
+        if len(changes) < len(state["fields"]):
+            raise RuntimeError(f"only {len(changes)} settings changed")
+        state["journal"].record_batch(changes) # One undo step, like the window
+    return run
+
+
+CASES: dict[str, Case] = {
+    "load_rebindings": Case(_setup_parser, _load_cold("rebindings_path")),
+    "load_rebindings_cached": Case(_setup_parser, _load_cached("rebindings_path")),
+    "load_user_settings": Case(_setup_parser, _load_cold("usersettings_path")),
+    "load_user_settings_cached": Case(_setup_parser, _load_cached("usersettings_path")),
+    "load_rebindings_variants": Case(_setup_variants, _load_variants),
+    "populate_rebindings": Case(_setup_window, _populate("rebindings"), uses_qt=True),
+    "populate_user_settings": Case(_setup_window, _populate("user_settings"), uses_qt=True),
+    "populate_user_settings_all_rows": Case(_setup_window, _populate("user_settings", fetch_all=True), uses_qt=True),
+    "search_narrowing": Case(_setup_search, _search_narrowing, prepare=_clear_search, uses_qt=True),
+    "switch_documents": Case(_setup_both_documents, _switch_documents, uses_qt=True),
+    # Scale 333 is about 100k settings
+    "row_memory_user_settings": Case(_setup_model, _row_memory("user_settings"), metrics=_row_memory_metrics),
+    "row_memory_rebindings": Case(_setup_model, _row_memory("rebindings"), metrics=_row_memory_metrics),
+    "save_minimal": Case(_setup_save, _save(minimal=True), prepare=_edit_for_save),
+    "save_full": Case(_setup_save, _save(minimal=False), prepare=_edit_for_save),
+    "backup_first": Case(_setup_parser, _backup, prepare=_clear_store),
+    "backup_incremental": Case(_setup_backed_up, _backup, prepare=_touch_files),
+    "backup_archive": Case(_setup_backed_up, _backup_archive, prepare=_touch_files),
+    "restore": Case(_setup_backed_up, _restore, prepare=_touch_files),
+    "diff_backup": Case(_setup_diff, _diff, prepare=_edit_live_settings), # Live file re-parsed every run
+    "diff_backup_cached": Case(_setup_diff, _diff), # Both sides cached: only the differences are walked
+    "apply_preset": Case(_setup_preset, _apply_preset(reuse_index=True), prepare=_next_preset),
+    "apply_preset_unindexed": Case(_setup_preset, _apply_preset(reuse_index=False), prepare=_next_preset),
+    "merge_external_change": Case(_setup_external_change, _merge_external_change, prepare=_edit_live_settings),
+}
+
+
+# --- Child process -----------------------------------------------------------------------
+
+def _peak_rss_kb() -> int | None:
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak # macOS reports bytes, Linux kilobytes
+
+
+def _qt_counts(state) -> dict:
+    from PyQt6.QtCore import QObject
+    from PyQt6.QtWidgets import QApplication
+    window = state["window"]
+    return {"qt_widgets": len(QApplication.allWidgets()),
+            "qt_objects": len(window.findChildren(QObject)),
+            "model_rows_built": sum(document.model.row_count_built for document in window.documents.values())}
+
+
+def run_case(name: str, scale: float, repeat: int) -> dict:
+    case = CASES[name]
+    if case.uses_qt:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    workdir = Path(tempfile.mkdtemp(prefix="nwcm-bench-"))
+    try:
+        state = case.setup(workdir, scale)
+        input_bytes = sum(path.stat().st_size for path in (workdir / "AGS").rglob("*") if path.is_file())
+        timings = []
+        for _ in range(repeat):
+            if case.prepare is not None:
+                case.prepare(state)
+            started = time.perf_counter()
+            case.run(state)
+            timings.append(time.perf_counter() - started)
+        result = {
+            "case": name,
+            "scale": scale,
+            "repeat": repeat,
+            "wall_seconds": {"min": min(timings), "median": statistics.median(timings), "runs": timings},
+            "peak_rss_kb": _peak_rss_kb(),
+            "input_bytes": input_bytes,
+        }
+        if case.uses_qt:
+            result.update(_qt_counts(state))
+        if case.metrics is not None:
+            result.update(case.metrics(state))
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# --- Parent process ----------------------------------------------------------------------
+
+def _run_in_child(name: str, scale: float, repeat: int) -> dict:
+    command = [sys.executable, "-m", "benchmarks.run", "--child", name, str(scale), "--repeat", str(repeat)]
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, timeout=CHILD_TIMEOUT_SECONDS)
+    if completed.returncode != 0 or not completed.stdout.strip():
+        return {"case": name, "scale": scale, "error": completed.stderr.strip().splitlines()[-1:] or ["no output"]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _format_row(result: dict, baseline: dict | None) -> str:
+    if "error" in result:
+        return f"{result['case']:<34}{result['scale']:>7g}  ERROR {result['error']}"
+    median_ms = result["wall_seconds"]["median"] * 1000
+    row = f"{result['case']:<34}{result['scale']:>7g}{median_ms:>12.2f} ms{(result['peak_rss_kb'] or 0) / 1024:>10.1f} MB"
+    if "qt_objects" in result:
+        row += f"{result['qt_objects']:>8} qobj"
+    if "bytes_per_row" in result:
+        row += f"{result['bytes_per_row']:>8.0f} B/row"
+    if baseline is not None and "wall_seconds" in baseline:
+        ratio = result["wall_seconds"]["median"] / max(baseline["wall_seconds"]["median"], 1e-9)
+        row += f"   x{ratio:.2f} vs baseline"
+    return row
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=float, nargs="+", default=list(DEFAULT_SCALES),
+                        help="sizes relative to a real install (default: 1 10 100)")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES), help="cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per case")
+    parser.add_argument("--output", help="write the JSON results here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="print timings relative to an earlier run")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "SCALE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_case(args.child[0], float(args.child[1]), args.repeat)))
+        return 0
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {(r["case"], r["scale"]): r for r in json.load(f)["results"]}
+
+    results = []
+    for scale in args.scales:
+        for name in args.cases:
+            result = _run_in_child(name, scale, args.repeat)
+            results.append(result)
+            print(_format_row(result, baseline.get((name, scale))), file=sys.stderr, flush=True)
+
+    report = {
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
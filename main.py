@@ -1,8 +1,16 @@
+import time
+STARTED_NS = time.perf_counter_ns() # Before any other import, for --profile-startup
+
+import logging
 import sys
 import os
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QIcon
-from newworld_config_manager.main_window import MainWindow
+from newworld_config_manager.instrumentation import configure_logging, span, tracer
+
+log = logging.getLogger("newworld_config_manager.main")
+
+PROFILE_STARTUP_FLAG = "--profile-startup"
+RESCAN_FLAG = "--rescan" # Search for the config folder again instead of using the cached result
+STARTUP_SPAN_PREFIX = "startup: "
 
 def resource_path(relative_path: str) -> str:
     """
@@ -23,31 +31,84 @@ def load_stylesheet(path: str) -> str:
         with open(path, "r", encoding="utf-8") as f:
             return f.read()
     except FileNotFoundError:
-        print(f"Warning: Stylesheet not found at '{path}'. Using default styles.")
+        log.warning(f"Stylesheet not found at '{path}'. Using default styles.")
         return ""
     except Exception as e:
-        print(f"Error loading stylesheet from '{path}': {e}")
+        log.error(f"Error loading stylesheet from '{path}': {e}")
         return ""
 
-def run_app():
+def report_startup_profile(window):
+    """Prints the startup phases once the window was painted and the config folder search finished."""
+    from PyQt6.QtCore import QEvent, QObject
+
+    first_paint_ns = []
+
+    def print_report():
+        print("Startup profile (ms; 'at' is the time since main.py started):")
+        rows = [(record.name[len(STARTUP_SPAN_PREFIX):], record.duration_ns, record.start_ns + record.duration_ns)
+                for record in tracer.spans() if record.name.startswith(STARTUP_SPAN_PREFIX)]
+        rows.append(("first paint", None, first_paint_ns[0]))
+        rows += [(f"{record.name} (worker thread)", record.duration_ns, record.start_ns + record.duration_ns)
+                 for record in tracer.spans() if record.name == "discovery"]
+        for name, duration_ns, end_ns in sorted(rows, key=lambda row: row[2]):
+            duration = f"{duration_ns / 1e6:9.1f}" if duration_ns is not None else " " * 9
+            print(f"  {name:<40}{duration}   at {(end_ns - STARTED_NS) / 1e6:8.1f}")
+        print("Run 'python -X importtime main.py' for the import time of every module.")
+
+    def on_busy_changed(busy: bool):
+        if not busy and first_paint_ns:
+            window.job_runner.busy_changed.disconnect(on_busy_changed)
+            print_report()
+
+    class FirstPaintFilter(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint and not first_paint_ns:
+                first_paint_ns.append(time.perf_counter_ns())
+                window.removeEventFilter(self)
+                on_busy_changed(window.job_runner.is_busy)
+            return False
+
+    window.job_runner.busy_changed.connect(on_busy_changed)
+    window.installEventFilter(FirstPaintFilter(window)) # Owned by the window
+
+def run_app(profile_startup: bool = False, rescan: bool = False):
     """Initializes and runs the PyQt6 application."""
-    app = QApplication(sys.argv)
-    
-    # Load the stylesheet from an external file for better maintainability.
-    # Use the resource_path helper to find it correctly.
-    stylesheet = load_stylesheet(resource_path('assets/stylesheet.qss'))
-    if stylesheet:
-        app.setStyleSheet(stylesheet)
+    # Qt and the main window are imported here rather than at the top, so that they are timed
+    with span(STARTUP_SPAN_PREFIX + "import PyQt6"):
+        from PyQt6.QtWidgets import QApplication
+    with span(STARTUP_SPAN_PREFIX + "import main window"):
+        from newworld_config_manager.main_window import MainWindow
+
+    with span(STARTUP_SPAN_PREFIX + "create QApplication"):
+        app = QApplication(sys.argv)
+
+    with span(STARTUP_SPAN_PREFIX + "apply stylesheet"):
+        # Use the resource_path helper to find it correctly.
+        stylesheet = load_stylesheet(resource_path('assets/stylesheet.qss'))
+        if stylesheet:
+            app.setStyleSheet(stylesheet)
 
-    window = MainWindow()
+    with span(STARTUP_SPAN_PREFIX + "create main window"):
+        window = MainWindow(rescan_config_dir=rescan)
 
-    # Set the icon for the application window itself (taskbar, title bar)
-    # Use the resource_path helper to find the icon correctly.
-    window.setWindowIcon(QIcon(resource_path('assets/icon.ico')))
+    with span(STARTUP_SPAN_PREFIX + "load icon"):
+        # Set the icon for the application window itself (taskbar, title bar)
+        from PyQt6.QtGui import QIcon
+        window.setWindowIcon(QIcon(resource_path('assets/icon.ico')))
 
-    window.show()
+    if profile_startup:
+        report_startup_profile(window)
+    with span(STARTUP_SPAN_PREFIX + "show window"):
+        window.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    print("Starting NeWWorld-Config-Manager...")
-    run_app()
\ No newline at end of file
+    configure_logging()
+    log.info("Starting NeWWorld-Config-Manager...")
+    profile_startup = PROFILE_STARTUP_FLAG in sys.argv
+    if profile_startup:
+        sys.argv.remove(PROFILE_STARTUP_FLAG) # Not a Qt argument
+    rescan = RESCAN_FLAG in sys.argv
+    if rescan:
+        sys.argv.remove(RESCAN_FLAG)
+    run_app(profile_startup, rescan)
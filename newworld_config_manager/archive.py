@@ -0,0 +1,221 @@
+"""
+Compressed single-file backup archives.
+
+An archive is a plain tar file. Its first member is manifest.json, followed by one member per
+backed-up file, each compressed on its own (files/<path>.gz, or .zst when the optional
+zstandard package is installed). Because every file is compressed separately, the files are
+compressed in parallel, and because the manifest records where each member's data starts,
+a single file can be read back with one seek, without decompressing anything else.
+Standard tools can still list and extract the archive.
+
+Manifest "files" entries are [size, mtime_ns, sha256, data_offset, compressed_size], with
+data_offset relative to the first byte after the manifest member.
+"""
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .backup_store import iter_files
+from .progress import Progress, report
+
+try:
+    import zstandard
+except ImportError: # Optional; archives are gzip-compressed without it
+    zstandard = None
+
+ARCHIVE_SUFFIX = ".nwbackup.tar"
+ARCHIVE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DATA_PREFIX = "files/"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+TAR_ENCODING = "utf-8"
+TAR_ERRORS = "surrogateescape"
+
+
+def _gzip_compress(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data) # Compressors are not thread-safe
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+# codec name -> (member suffix, compress, decompress); zlib and zstd release the GIL while working
+CODECS = {"gzip": (".gz", _gzip_compress, gzip.decompress)}
+if zstandard is not None:
+    CODECS["zstd"] = (".zst", _zstd_compress, _zstd_decompress)
+DEFAULT_CODEC = "zstd" if zstandard is not None else "gzip"
+
+
+class ArchiveError(Exception):
+    """The archive is damaged, of an unknown version, or needs a codec that is not installed."""
+
+
+def _padded(size: int) -> int:
+    return -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+
+
+def _compress_file(path: Path, compress) -> tuple[str, bytes]:
+    data = path.read_bytes()
+    return hashlib.sha256(data).hexdigest(), compress(data)
+
+
+def write_archive(archive_path: str | Path, source_dir: str | Path, label: str | None = None,
+                  codec: str | None = None, max_workers: int | None = None,
+                  progress: Progress | None = None) -> dict:
+    """
+    Writes every file below source_dir to a new archive at archive_path and returns its manifest.
+    Files are compressed on a thread pool into a temporary spool file; the manifest, which needs
+    the compressed sizes, is then written first and the spooled data copied after it.
+    The archive appears atomically; if cancelled through progress, nothing is left behind.
+    """
+    codec = codec or DEFAULT_CODEC
+    if codec not in CODECS:
+        raise ArchiveError(f"Compression '{codec}' is not available")
+    suffix, compress, _decompress = CODECS[codec]
+    source_dir = Path(source_dir)
+    archive_path = Path(archive_path)
+    source_files = sorted(iter_files(source_dir))
+
+    members = [] # (rel_path, stat, sha256, offset in spool, compressed size)
+    with tempfile.TemporaryFile() as spool:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_compress_file, (source_dir / rel_path for rel_path, _st in source_files),
+                                   [compress] * len(source_files))
+            try:
+                for index, ((rel_path, st), (digest, compressed)) in enumerate(zip(source_files, results)):
+                    report(progress, index, len(source_files), rel_path)
+                    members.append((rel_path, st, digest, spool.tell(), len(compressed)))
+                    spool.write(compressed)
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+
+        # Lay out the data members to know where each one's data will start
+        infos = []
+        files = {}
+        position = 0
+        for rel_path, st, digest, _spool_offset, compressed_size in members:
+            info = tarfile.TarInfo(DATA_PREFIX + rel_path + suffix)
+            info.size = compressed_size
+            info.mtime = st.st_mtime_ns // 1_000_000_000
+            info.mode = 0o644
+            header_size = len(info.tobuf(tarfile.PAX_FORMAT, TAR_ENCODING, TAR_ERRORS))
+            files[rel_path] = [st.st_size, st.st_mtime_ns, digest, position + header_size, compressed_size]
+            infos.append((info, position))
+            position += header_size + _padded(compressed_size)
+
+        manifest = {
+            "version": ARCHIVE_VERSION,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "source": str(source_dir),
+            "label": label,
+            "codec": codec,
+            "files": files,
+        }
+        manifest_data = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        report(progress, len(source_files), len(source_files), "Writing archive")
+
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = archive_path.with_name(archive_path.name + ".tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                with tarfile.open(fileobj=f, mode="w", format=tarfile.PAX_FORMAT,
+                                  encoding=TAR_ENCODING, errors=TAR_ERRORS) as tar:
+                    manifest_info = tarfile.TarInfo(MANIFEST_NAME)
+                    manifest_info.size = len(manifest_data)
+                    manifest_info.mtime = int(datetime.datetime.now().timestamp())
+                    manifest_info.mode = 0o644
+                    tar.addfile(manifest_info, io.BytesIO(manifest_data))
+                    data_start = f.tell()
+                    for (info, position), (_rel_path, _st, _digest, spool_offset, _size) in zip(infos, members):
+                        if f.tell() != data_start + position:
+                            raise ArchiveError("Archive layout does not match the manifest")
+                        spool.seek(spool_offset)
+                        tar.addfile(info, spool)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, archive_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+    return manifest
+
+
+class SnapshotArchive:
+    """
+    Read access to an archive written by write_archive(). Opening it reads only the manifest;
+    read() and extract() seek straight to one file's data.
+    """
+
+    def __init__(self, archive_path: str | Path):
+        self.path = Path(archive_path)
+        self._file = open(self.path, "rb")
+        try:
+            with tarfile.open(fileobj=self._file, mode="r:", encoding=TAR_ENCODING, errors=TAR_ERRORS) as tar:
+                first = tar.firstmember # The only member tarfile reads on open
+                if first is None or first.name != MANIFEST_NAME:
+                    raise ArchiveError(f"{self.path.name} does not start with a manifest")
+                self._file.seek(first.offset_data)
+                self.manifest = json.loads(self._file.read(first.size))
+                self._data_start = first.offset_data + _padded(first.size)
+        except (tarfile.TarError, ValueError) as e:
+            self._file.close()
+            raise ArchiveError(f"{self.path.name} is not a valid backup archive: {e}") from e
+        except BaseException:
+            self._file.close()
+            raise
+        if self.manifest.get("version") != ARCHIVE_VERSION:
+            self._file.close()
+            raise ArchiveError(f"{self.path.name} has unsupported archive version {self.manifest.get('version')}")
+        codec = self.manifest.get("codec")
+        if codec not in CODECS:
+            self._file.close()
+            raise ArchiveError(f"{self.path.name} needs '{codec}' decompression, which is not installed")
+        self._decompress = CODECS[codec][2]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def files(self) -> dict[str, list]:
+        """Relative path -> [size, mtime_ns, sha256, data_offset, compressed_size]."""
+        return self.manifest["files"]
+
+    def read(self, rel_path: str) -> bytes:
+        """The content of one file, checked against its hash. Raises KeyError for unknown paths."""
+        size, _mtime_ns, digest, offset, compressed_size = self.files[rel_path]
+        self._file.seek(self._data_start + offset)
+        try:
+            data = self._decompress(self._file.read(compressed_size))
+        except Exception as e: # zlib.error, EOFError, zstandard.ZstdError, ...
+            raise ArchiveError(f"{rel_path} is damaged in {self.path.name}: {e}") from e
+        if len(data) != size or hashlib.sha256(data).hexdigest() != digest:
+            raise ArchiveError(f"{rel_path} is damaged in {self.path.name}")
+        return data
+
+    def extract(self, rel_path: str, target: str | Path) -> None:
+        """Writes one file to target, restoring its modification time."""
+        mtime_ns = self.files[rel_path][1]
+        data = self.read(rel_path)
+        with open(target, "wb") as f:
+            f.write(data)
+        os.utime(target, ns=(mtime_ns, mtime_ns))
@@ -0,0 +1,339 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .progress import Progress, report
+
+if TYPE_CHECKING:
+    from .catalog import BackupCatalog, CatalogEntry, FileList, RetentionPolicy
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MANIFEST_VERSION = 1
+SNAPSHOT_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+log = logging.getLogger(__name__)
+
+
+def hash_file(path: Path) -> str:
+    """Returns the hex SHA-256 digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_files(root: Path):
+    """
+    Yields (relative_posix_path, os.stat_result) for every regular file below root.
+    Uses os.scandir so the stat information comes from the directory listing where possible.
+    Symlinks are skipped.
+    """
+    stack = [(Path(root), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = f"{prefix}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((Path(entry.path), rel_path + "/"))
+                elif entry.is_file(follow_symlinks=False):
+                    yield rel_path, entry.stat(follow_symlinks=False)
+
+
+def _manifest_file_list(manifest: dict) -> "FileList":
+    """Relative path -> (size, sha256) from a snapshot or archive manifest."""
+    return {rel_path: (entry[0], entry[2]) for rel_path, entry in manifest["files"].items()}
+
+
+def _snapshot_sort_key(snapshot_id: str) -> tuple[str, int]:
+    """Orders ids like 20240101_120000 and 20240101_120000_2 chronologically."""
+    parts = snapshot_id.split("_")
+    counter = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 1
+    return "_".join(parts[:2]), counter
+
+
+class BackupStore:
+    """
+    Deduplicating backup store for a config folder.
+
+    Every unique file content is stored once under objects/<2 hex chars>/<sha256>,
+    and every snapshot is a small JSON manifest under snapshots/<snapshot_id>.json
+    mapping relative file paths to [size, mtime_ns, sha256].
+    Files whose size and mtime match the previous snapshot are not re-hashed, so
+    backing up an unchanged folder only costs a stat pass and a new manifest.
+
+    Self-contained compressed archives (see archive.py) are kept under archives/<snapshot_id>.nwbackup.tar
+    and share the snapshot id namespace.
+
+    catalog.sqlite3 indexes all of them (see catalog.py) and is kept up to date by the methods here.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.snapshots_dir = self.root / "snapshots"
+        self.archives_dir = self.root / "archives"
+        self._catalog = None
+
+    @property
+    def catalog(self) -> "BackupCatalog":
+        if self._catalog is None:
+            from .catalog import CATALOG_NAME, BackupCatalog
+            self._catalog = BackupCatalog(self.root / CATALOG_NAME)
+        return self._catalog
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def manifest_path(self, snapshot_id: str) -> Path:
+        return self.snapshots_dir / f"{snapshot_id}.json"
+
+    def archive_path(self, snapshot_id: str) -> Path:
+        from .archive import ARCHIVE_SUFFIX
+        return self.archives_dir / f"{snapshot_id}{ARCHIVE_SUFFIX}"
+
+    def list_snapshots(self) -> list[str]:
+        """Returns all snapshot ids, oldest first."""
+        if not self.snapshots_dir.is_dir():
+            return []
+        return sorted((p.stem for p in self.snapshots_dir.glob("*.json")), key=_snapshot_sort_key)
+
+    def list_archives(self) -> list[str]:
+        """Returns the snapshot ids of all archives, oldest first."""
+        from .archive import ARCHIVE_SUFFIX
+        if not self.archives_dir.is_dir():
+            return []
+        return sorted((p.name[:-len(ARCHIVE_SUFFIX)] for p in self.archives_dir.glob(f"*{ARCHIVE_SUFFIX}")),
+                      key=_snapshot_sort_key)
+
+    def list_backups(self) -> list[str]:
+        """Returns the ids of all snapshots and archives, oldest first."""
+        return sorted(self.list_snapshots() + self.list_archives(), key=_snapshot_sort_key)
+
+    def load_manifest(self, snapshot_id: str) -> dict:
+        with open(self.manifest_path(snapshot_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def latest_manifest(self) -> dict | None:
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            return None
+        try:
+            return self.load_manifest(snapshots[-1])
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not read latest backup manifest: {e}")
+            return None
+
+    def _new_snapshot_id(self) -> str:
+        snapshot_id = datetime.datetime.now().strftime(SNAPSHOT_TIMESTAMP_FORMAT)
+        candidate, counter = snapshot_id, 1
+        while self.manifest_path(candidate).exists() or self.archive_path(candidate).exists():
+            counter += 1
+            candidate = f"{snapshot_id}_{counter}"
+        return candidate
+
+    def _store_object(self, source_file: Path, digest: str) -> bool:
+        """
+        Copies a file into the object store unless an object with that digest already exists.
+        Returns whether it was copied.
+        """
+        target = self.object_path(digest)
+        if target.is_file():
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_target = target.with_name(f"{digest}.tmp")
+        shutil.copyfile(source_file, temp_target)
+        os.replace(temp_target, target)
+        return True
+
+    def create_snapshot(self, source_dir: Path, label: str | None = None,
+                        progress: Progress | None = None) -> str:
+        """
+        Records a snapshot of source_dir and returns its snapshot id.
+        Only files with new content are copied into the object store.
+        If cancelled through progress, no manifest is written.
+        """
+        source_dir = Path(source_dir)
+        previous = self.latest_manifest()
+        previous_files = previous.get("files", {}) if previous else {}
+
+        source_files = list(iter_files(source_dir))
+        files = {}
+        stored_bytes = 0
+        for index, (rel_path, st) in enumerate(source_files):
+            report(progress, index, len(source_files), rel_path)
+            known = previous_files.get(rel_path)
+            if (known and known[0] == st.st_size and known[1] == st.st_mtime_ns
+                    and self.object_path(known[2]).is_file()):
+                digest = known[2]
+            else:
+                file_path = source_dir / rel_path
+                digest = hash_file(file_path)
+                if self._store_object(file_path, digest):
+                    stored_bytes += st.st_size
+            files[rel_path] = [st.st_size, st.st_mtime_ns, digest]
+
+        report(progress, len(source_files), len(source_files), "Writing manifest")
+        snapshot_id = self._new_snapshot_id()
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "id": snapshot_id,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "source": str(source_dir),
+            "label": label,
+            "files": files,
+        }
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.manifest_path(snapshot_id)
+        temp_manifest_path = manifest_path.with_suffix(".json.tmp")
+        with open(temp_manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(temp_manifest_path, manifest_path)
+        self._record_in_catalog(snapshot_id, manifest, manifest_path, stored_bytes)
+        return snapshot_id
+
+    def create_archive(self, source_dir: Path, label: str | None = None,
+                       progress: Progress | None = None) -> str:
+        """
+        Writes a compressed, self-contained archive of source_dir and returns its snapshot id.
+        Unlike snapshots, archives do not share content, but they are several times smaller
+        and can be copied elsewhere on their own.
+        """
+        from .archive import write_archive
+        snapshot_id = self._new_snapshot_id()
+        archive_path = self.archive_path(snapshot_id)
+        manifest = write_archive(archive_path, source_dir, label=label, progress=progress)
+        self._record_in_catalog(snapshot_id, manifest, archive_path, archive_path.stat().st_size)
+        return snapshot_id
+
+    def _record_in_catalog(self, snapshot_id: str, manifest: dict, location: Path, stored_bytes: int) -> None:
+        """Adds a backup that was just created to the catalog. The backup itself does not depend on it."""
+        from .catalog import KIND_ARCHIVE, KIND_SNAPSHOT, new_entry
+        kind = KIND_ARCHIVE if location.parent == self.archives_dir else KIND_SNAPSHOT
+        files = _manifest_file_list(manifest)
+        try:
+            self.catalog.update(added=[(new_entry(snapshot_id, kind, manifest["created"], manifest.get("label"),
+                                                  files, stored_bytes, location), files)])
+        except sqlite3.Error as e:
+            log.warning(f"Could not add backup {snapshot_id} to the catalog: {e}")
+
+    def _describe(self, backup_id: str, kind: str, location: Path) -> tuple["CatalogEntry", "FileList"]:
+        """Reads a backup from disk into a catalog entry and its file list. Legacy folders are hashed."""
+        from .catalog import KIND_ARCHIVE, KIND_SNAPSHOT, legacy_created, new_entry
+        if kind == KIND_SNAPSHOT:
+            with open(location, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            stored_bytes = None # Shared objects cannot be attributed to one snapshot afterwards
+        elif kind == KIND_ARCHIVE:
+            from .archive import SnapshotArchive
+            with SnapshotArchive(location) as archive:
+                manifest = archive.manifest
+            stored_bytes = location.stat().st_size
+        else:
+            files = {rel_path: (st.st_size, hash_file(location / rel_path)) for rel_path, st in iter_files(location)}
+            total = sum(size for size, _digest in files.values())
+            return new_entry(backup_id, kind, legacy_created(location), None, files, total, location), files
+        files = _manifest_file_list(manifest)
+        return new_entry(backup_id, kind, manifest["created"], manifest.get("label"), files,
+                         stored_bytes, location), files
+
+    def sync_catalog(self, legacy_folders: list[Path] = (), progress: Progress | None = None) -> list["CatalogEntry"]:
+        """
+        Brings the catalog in line with the backups on disk and returns its entries, newest first.
+        Only backups that are new or changed since the last sync are read, so a sync without
+        changes costs a directory listing and one query. legacy_folders are full-copy backup
+        folders (see catalog.legacy_backup_folders()) to include.
+        """
+        from .catalog import KIND_ARCHIVE, KIND_FOLDER, KIND_SNAPSHOT
+        on_disk = {snapshot_id: (KIND_SNAPSHOT, self.manifest_path(snapshot_id)) for snapshot_id in self.list_snapshots()}
+        on_disk.update((snapshot_id, (KIND_ARCHIVE, self.archive_path(snapshot_id))) for snapshot_id in self.list_archives())
+        on_disk.update((folder.name, (KIND_FOLDER, Path(folder))) for folder in legacy_folders)
+
+        known = self.catalog.locations()
+        removed = [backup_id for backup_id in known if backup_id not in on_disk]
+        pending = []
+        for backup_id, (kind, location) in on_disk.items():
+            try:
+                mtime_ns = location.stat().st_mtime_ns
+            except OSError:
+                continue
+            if known.get(backup_id) != (str(location), mtime_ns):
+                pending.append((backup_id, kind, location))
+
+        added = []
+        for index, (backup_id, kind, location) in enumerate(pending):
+            report(progress, index, len(pending), f"Indexing backup {backup_id}")
+            try:
+                added.append(self._describe(backup_id, kind, location))
+            except Exception as e: # Unreadable or damaged backups are left out of the catalog
+                log.warning(f"Could not index backup {backup_id}: {e}")
+                if backup_id in known:
+                    removed.append(backup_id)
+        if added or removed:
+            self.catalog.update(added=added, removed=removed)
+            log.info(f"Backup catalog: {len(added)} backup(s) indexed, {len(removed)} removed")
+        return self.catalog.entries()
+
+    def delete_backup(self, backup_id: str, collect_garbage: bool = True) -> None:
+        """
+        Deletes a snapshot or archive and removes it from the catalog. The objects only the
+        snapshot used are deleted too, unless collect_garbage is False.
+        """
+        manifest_path = self.manifest_path(backup_id)
+        if manifest_path.is_file():
+            manifest_path.unlink()
+            if collect_garbage:
+                self.collect_garbage()
+        else:
+            self.archive_path(backup_id).unlink()
+        self.catalog.update(removed=[backup_id])
+
+    def collect_garbage(self) -> int:
+        """Deletes the objects no snapshot manifest refers to and returns how many bytes that freed."""
+        referenced = set()
+        for snapshot_id in self.list_snapshots():
+            try:
+                manifest = self.load_manifest(snapshot_id)
+            except (OSError, ValueError) as e:
+                log.warning(f"Not collecting garbage, backup manifest {snapshot_id} is unreadable: {e}")
+                return 0
+            referenced.update(digest for _size, _mtime_ns, digest in manifest["files"].values())
+        if not self.objects_dir.is_dir():
+            return 0
+        freed = 0
+        for rel_path, st in list(iter_files(self.objects_dir)):
+            if rel_path.rpartition("/")[2] not in referenced:
+                (self.objects_dir / rel_path).unlink()
+                freed += st.st_size
+        return freed
+
+    def prune(self, policy: "RetentionPolicy", dry_run: bool = False) -> list["CatalogEntry"]:
+        """
+        Deletes the snapshots and archives the retention policy does not keep, and returns them.
+        The decision is made from the catalog, which is synced first.
+        """
+        doomed = policy.backups_to_prune(self.sync_catalog())
+        if dry_run or not doomed:
+            return doomed
+        for entry in doomed:
+            self.delete_backup(entry.id, collect_garbage=False)
+        freed = self.collect_garbage()
+        log.info(f"Pruned {len(doomed)} backup(s), {freed} unreferenced byte(s) freed")
+        return doomed
+
+    def checkout(self, snapshot_id: str, dest_dir: Path) -> None:
+        """Writes the files of a snapshot into dest_dir, restoring their modification times."""
+        dest_dir = Path(dest_dir)
+        manifest = self.load_manifest(snapshot_id)
+        for rel_path, (size, mtime_ns, digest) in manifest["files"].items():
+            target = dest_dir / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(self.object_path(digest), target)
+            os.utime(target, ns=(mtime_ns, mtime_ns))
@@ -0,0 +1,245 @@
+"""
+SQLite catalog of the backups of one config folder, and the retention policy used to prune them.
+
+The catalog lets the backup browser list hundreds of backups without reading their manifests,
+archives or folders. It holds one row per backup (time, label, size, file count, content hash and
+what changed since the previous backup) plus the backed-up file list, and is updated by
+BackupStore whenever it creates or deletes a backup. BackupStore.sync_catalog() reconciles it
+with what is actually on disk, so it can be deleted at any time and is rebuilt on the next sync.
+"""
+import datetime
+import hashlib
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple
+
+CATALOG_NAME = "catalog.sqlite3"
+CATALOG_VERSION = 1
+
+KIND_SNAPSHOT = "snapshot" # Deduplicated snapshot in the backup store
+KIND_ARCHIVE = "archive" # Compressed archive in the backup store
+KIND_FOLDER = "folder" # Full copy made by older versions: <config folder>_backup_YYYYMMDD_HHMMSS
+MANAGED_KINDS = (KIND_SNAPSHOT, KIND_ARCHIVE) # Only these are pruned automatically
+LEGACY_FOLDER_MARKER = "_backup_"
+LEGACY_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+_SCHEMA = """
+DROP TABLE IF EXISTS files;
+DROP TABLE IF EXISTS backups;
+CREATE TABLE backups (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    created TEXT NOT NULL,
+    label TEXT,
+    file_count INTEGER NOT NULL,
+    total_bytes INTEGER NOT NULL,
+    stored_bytes INTEGER,
+    content_hash TEXT NOT NULL,
+    previous_id TEXT,
+    added INTEGER,
+    changed INTEGER,
+    removed INTEGER,
+    location TEXT NOT NULL,
+    location_mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX backups_created ON backups (created, id);
+CREATE TABLE files (
+    backup_id TEXT NOT NULL REFERENCES backups (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (backup_id, path)
+) WITHOUT ROWID;
+"""
+
+
+class CatalogEntry(NamedTuple):
+    id: str
+    kind: str
+    created: str # ISO timestamp, local time
+    label: str | None
+    file_count: int
+    total_bytes: int # Size of the backed-up files
+    stored_bytes: int | None # Disk space the backup added; None when unknown
+    content_hash: str # Equal for backups with identical content
+    previous_id: str | None # The backup the change counts below compare against
+    added: int | None # Files added, changed and removed since previous_id; None for the first backup
+    changed: int | None
+    removed: int | None
+    location: str # Manifest, archive file or backup folder
+    location_mtime_ns: int # Used to notice backups that were changed outside of the application
+
+    @property
+    def created_datetime(self) -> datetime.datetime:
+        return datetime.datetime.fromisoformat(self.created)
+
+    @property
+    def is_managed(self) -> bool:
+        return self.kind in MANAGED_KINDS
+
+
+# Relative path -> (size, sha256)
+FileList = dict[str, tuple[int, str]]
+
+
+def content_hash(files: FileList) -> str:
+    """Hash over the sorted (relative path, sha256) pairs of a backup."""
+    digest = hashlib.sha256()
+    for rel_path in sorted(files):
+        digest.update(f"{rel_path}\0{files[rel_path][1]}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def new_entry(backup_id: str, kind: str, created: str, label: str | None, files: FileList,
+              stored_bytes: int | None, location: Path) -> CatalogEntry:
+    """An entry for a backup; the change counts are filled in when it is added to the catalog."""
+    return CatalogEntry(backup_id, kind, created, label, len(files), sum(size for size, _digest in files.values()),
+                        stored_bytes, content_hash(files), None, None, None, None,
+                        str(location), location.stat().st_mtime_ns)
+
+
+class BackupCatalog:
+    """
+    The catalog database. Every method opens its own short-lived connection, so the catalog
+    can be used from the GUI thread and from background jobs alike.
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.execute("PRAGMA foreign_keys = ON")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+            connection.executescript(_SCHEMA) # Older or newer layouts are rebuilt by the next sync
+            connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            connection.commit()
+        return connection
+
+    def entries(self) -> list[CatalogEntry]:
+        """All catalogued backups, newest first."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT * FROM backups ORDER BY created DESC, id DESC").fetchall()
+        return [CatalogEntry(*row) for row in rows]
+
+    def entry(self, backup_id: str) -> CatalogEntry | None:
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT * FROM backups WHERE id = ?", (backup_id,)).fetchone()
+        return CatalogEntry(*row) if row else None
+
+    def files(self, backup_id: str) -> FileList:
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT path, size, digest FROM files WHERE backup_id = ?", (backup_id,))
+            return {path: (size, digest) for path, size, digest in rows}
+
+    def locations(self) -> dict[str, tuple[str, int]]:
+        """id -> (location, location_mtime_ns) of every catalogued backup."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT id, location, location_mtime_ns FROM backups").fetchall()
+        return {backup_id: (location, mtime_ns) for backup_id, location, mtime_ns in rows}
+
+    def update(self, added: list[tuple[CatalogEntry, FileList]] = (), removed: list[str] = ()) -> None:
+        """Adds or replaces entries with their file lists and removes others, in one transaction."""
+        with closing(self._connect()) as connection, connection:
+            # Entries counted against a replaced backup are recounted
+            connection.executemany("UPDATE backups SET previous_id = NULL WHERE previous_id = ?",
+                                   [(entry.id,) for entry, _files in added])
+            connection.executemany("DELETE FROM backups WHERE id = ?",
+                                   [(backup_id,) for backup_id in removed] + [(entry.id,) for entry, _files in added])
+            connection.executemany(f"INSERT INTO backups VALUES ({', '.join('?' * len(CatalogEntry._fields))})",
+                                   [entry for entry, _files in added])
+            connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?)",
+                                   [(entry.id, path, size, digest)
+                                    for entry, files in added for path, (size, digest) in files.items()])
+            self._update_changes(connection)
+
+    @staticmethod
+    def _update_changes(connection: sqlite3.Connection) -> None:
+        """Recomputes the change counts of every entry whose previous backup is no longer the one counted against."""
+        rows = connection.execute("SELECT id, previous_id FROM backups ORDER BY created, id").fetchall()
+        previous_id = None
+        for backup_id, counted_against in rows:
+            if counted_against != previous_id:
+                added = changed = removed = None
+                if previous_id is not None:
+                    added, changed, removed = connection.execute("""
+                        SELECT
+                            (SELECT COUNT(*) FROM files f WHERE f.backup_id = :current AND NOT EXISTS
+                                (SELECT 1 FROM files p WHERE p.backup_id = :previous AND p.path = f.path)),
+                            (SELECT COUNT(*) FROM files f JOIN files p ON p.path = f.path
+                                WHERE f.backup_id = :current AND p.backup_id = :previous AND p.digest != f.digest),
+                            (SELECT COUNT(*) FROM files p WHERE p.backup_id = :previous AND NOT EXISTS
+                                (SELECT 1 FROM files f WHERE f.backup_id = :current AND f.path = p.path))
+                        """, {"current": backup_id, "previous": previous_id}).fetchone()
+                connection.execute("UPDATE backups SET previous_id = ?, added = ?, changed = ?, removed = ? WHERE id = ?",
+                                   (previous_id, added, changed, removed, backup_id))
+            previous_id = backup_id
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Which backups automatic pruning keeps: the keep_last newest ones, plus the newest backup of
+    each of the keep_daily most recent days and of the keep_weekly most recent weeks that have
+    backups. A value of 0 disables that rule; all three at 0 disables pruning.
+    """
+    keep_last: int = 10
+    keep_daily: int = 7
+    keep_weekly: int = 8
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.keep_last or self.keep_daily or self.keep_weekly)
+
+    def backups_to_keep(self, entries: list[CatalogEntry]) -> set[str]:
+        newest_first = sorted(entries, key=lambda entry: (entry.created, entry.id), reverse=True)
+        keep = {entry.id for entry in newest_first[:self.keep_last]}
+        for limit, period_of in ((self.keep_daily, lambda moment: moment.date()),
+                                 (self.keep_weekly, lambda moment: moment.isocalendar()[:2])):
+            periods = set()
+            for entry in newest_first:
+                period = period_of(entry.created_datetime)
+                if period in periods:
+                    continue
+                if len(periods) >= limit:
+                    break
+                periods.add(period)
+                keep.add(entry.id) # The newest backup of this day or week
+        return keep
+
+    def backups_to_prune(self, entries: list[CatalogEntry]) -> list[CatalogEntry]:
+        """The managed entries the policy does not keep, newest first. Legacy folders are never pruned."""
+        if not self.enabled:
+            return []
+        managed = [entry for entry in entries if entry.is_managed]
+        keep = self.backups_to_keep(managed)
+        return [entry for entry in sorted(managed, key=lambda entry: (entry.created, entry.id), reverse=True)
+                if entry.id not in keep]
+
+
+DEFAULT_RETENTION = RetentionPolicy()
+
+
+def legacy_created(folder: Path) -> str | None:
+    """The creation time encoded in a legacy backup folder's name, or None if it is not one."""
+    _config_name, marker, timestamp = folder.name.rpartition(LEGACY_FOLDER_MARKER)
+    if not marker:
+        return None
+    try:
+        return datetime.datetime.strptime(timestamp, LEGACY_TIMESTAMP_FORMAT).isoformat(timespec="seconds")
+    except ValueError:
+        return None
+
+
+def legacy_backup_folders(config_dir: Path) -> list[Path]:
+    """Full-copy backup folders made by older versions next to the config folder."""
+    prefix = config_dir.name + LEGACY_FOLDER_MARKER
+    try:
+        candidates = list(config_dir.parent.iterdir())
+    except OSError:
+        return []
+    return sorted(path for path in candidates
+                  if path.name.startswith(prefix) and legacy_created(path) is not None and path.is_dir())
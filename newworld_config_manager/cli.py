@@ -0,0 +1,432 @@
+"""
+Headless command line interface, for scripting many game installs without a display:
+
+    python -m newworld_config_manager apply --preset reticle.json DIR [DIR ...]
+    python -m newworld_config_manager get --setting m_reticleColor DIR
+    python -m newworld_config_manager export --output reticle.json --setting m_reticleColor DIR
+    python -m newworld_config_manager backup --label before-patch [--archive] DIR [DIR ...]
+    python -m newworld_config_manager restore --snapshot latest DIR
+    python -m newworld_config_manager list DIR
+    python -m newworld_config_manager prune --keep-last 5 [--dry-run] DIR
+    python -m newworld_config_manager diff --against latest DIR
+
+Each config directory is processed in its own worker process and a JSON summary is printed
+to stdout. Log records are captured per directory (see --verbose).
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from .catalog import DEFAULT_RETENTION, RetentionPolicy
+from .config_parser import ConfigParser
+from .presets import (Preset, apply_bindings, apply_settings, capture_bindings, capture_settings, format_binding_key,
+                      load_preset, parse_binding_key, save_preset)
+from .rebindings_index import index_bindings
+
+
+class CommandError(Exception):
+    """A command could not be completed for one config directory."""
+
+
+def _load_user_settings(parser: ConfigParser) -> tuple[str, object]:
+    loaded = parser.load_user_settings_config()
+    if not loaded or loaded[1] is None:
+        raise CommandError("usersettings.javsave could not be loaded")
+    return loaded
+
+
+def _load_rebindings(parser: ConfigParser) -> tuple[str, object]:
+    filepath = parser._find_latest_rebindings_file()
+    root = parser.load_xml_config(filepath) if filepath else None
+    if root is None:
+        raise CommandError("no rebindings file could be loaded")
+    return filepath, root
+
+
+def _apply_bindings_to_all_files(parser: ConfigParser, bindings: dict, dry_run: bool) -> dict:
+    """Sets the bindings in every rebindings file that has them; only files whose values change are saved."""
+    variants = parser.load_rebindings_variants()
+    if variants is None or not variants.files:
+        raise CommandError("no rebindings file could be loaded")
+    changes = []
+    for key, input_name in bindings.items():
+        changes += variants.set_input(key, input_name)
+    changed_files = variants.changes_by_file((change.element, change.attribute) for change in changes)
+    if changes and not dry_run:
+        saved = parser.save_rebindings_variants(variants, [(change.element, change.attribute) for change in changes])
+        failed = [Path(path).name for path, success in saved.items() if not success]
+        if failed:
+            raise CommandError(f"could not save {', '.join(failed)}")
+    return {
+        "files": [file.path for file in variants.files],
+        "changed": len(changes),
+        "changed_files": sorted(changed_files),
+        "missing": [format_binding_key(key) for key in bindings if not variants.sources(key)],
+        "unreadable": variants.unreadable,
+    }
+
+
+def _command_get(parser: ConfigParser, options: dict) -> dict:
+    result = {}
+    if options["settings"]:
+        _filepath, root = _load_user_settings(parser)
+        values = dict.fromkeys(options["settings"])
+        for element in root.iter("Class"):
+            field_name = element.get("field")
+            if field_name in values and values[field_name] is None:
+                values[field_name] = element.get("value")
+        result["settings"] = values
+    if options["bindings"]:
+        _filepath, root = _load_rebindings(parser)
+        bindings = index_bindings(root)
+        result["bindings"] = {}
+        for key in map(parse_binding_key, options["bindings"]):
+            rebind_element = bindings.get(key)
+            result["bindings"][format_binding_key(key)] = rebind_element.get('input') if rebind_element is not None else None
+    return result
+
+
+def _command_apply(parser: ConfigParser, options: dict) -> dict:
+    preset = Preset.from_dict(options["preset"])
+    dry_run = options["dry_run"]
+    result = {}
+    if options["backup"] and not dry_run:
+        backup_path = parser.backup_config_folder(label=options.get("label") or "before preset")
+        if not backup_path:
+            raise CommandError("backup before applying the preset failed")
+        result["backup"] = backup_path
+
+    for kind, values, load, apply in (("settings", preset.settings, _load_user_settings, apply_settings),
+                                      ("bindings", preset.bindings, _load_rebindings, apply_bindings)):
+        if not values:
+            continue
+        if kind == "bindings" and options.get("all_rebindings"):
+            result[kind] = _apply_bindings_to_all_files(parser, values, dry_run)
+            continue
+        filepath, root = load(parser)
+        changes, missing = apply(root, values)
+        # Only the changed attribute values are rewritten in the file
+        if changes and not dry_run and not parser.save_xml_config(
+                filepath, root, {(change.element, change.attribute) for change in changes}):
+            raise CommandError(f"could not save {Path(filepath).name}")
+        result[kind] = {
+            "file": filepath,
+            "changed": len(changes),
+            "missing": [format_binding_key(key) if kind == "bindings" else key for key in missing],
+        }
+    return result
+
+
+def _command_export(parser: ConfigParser, options: dict) -> dict:
+    """Writes the named settings and bindings, or all of them if none are named, to a preset file."""
+    fields, keys = options["settings"], [parse_binding_key(text) for text in options["bindings"]]
+    everything = not fields and not keys
+    preset = Preset()
+    if everything or fields:
+        _filepath, root = _load_user_settings(parser)
+        settings = capture_settings(root.iter("Class"))
+        preset.settings = settings if everything else {name: settings[name] for name in fields if name in settings}
+    if everything or keys:
+        _filepath, root = _load_rebindings(parser)
+        bindings = capture_bindings(root)
+        preset.bindings = bindings if everything else {key: bindings[key] for key in keys if key in bindings}
+    save_preset(preset, options["output"])
+    return {
+        "output": options["output"],
+        "settings": len(preset.settings),
+        "bindings": len(preset.bindings),
+        "missing": [name for name in fields if name not in preset.settings]
+                   + [format_binding_key(key) for key in keys if key not in preset.bindings],
+    }
+
+
+def _command_backup(parser: ConfigParser, options: dict) -> dict:
+    backup_path = parser.backup_config_folder(label=options.get("label"), archive=options.get("archive", False),
+                                              prune=options.get("prune", True))
+    if not backup_path:
+        raise CommandError("backup failed")
+    return {"backup": backup_path}
+
+
+def _command_restore(parser: ConfigParser, options: dict) -> dict:
+    if options.get("folder"):
+        restore_result = parser.restore_backup(backup_dir=options["folder"])
+        source = options["folder"]
+    elif options.get("archive"):
+        restore_result = parser.restore_backup(archive_path=options["archive"])
+        source = options["archive"]
+    else:
+        snapshot_id = options.get("snapshot") or "latest"
+        if snapshot_id == "latest":
+            snapshot_ids = parser.list_backups()
+            if not snapshot_ids:
+                raise CommandError("no backup snapshots found")
+            snapshot_id = snapshot_ids[0]
+        restore_result = parser.restore_backup(snapshot_id=snapshot_id)
+        source = snapshot_id
+    if restore_result is None:
+        raise CommandError(f"restore from {source} failed")
+    return {"restored_from": source, "copied": len(restore_result.copied),
+            "deleted": len(restore_result.deleted), "unchanged": len(restore_result.unchanged)}
+
+
+def _catalog_summary(entry) -> dict:
+    return {"id": entry.id, "kind": entry.kind, "created": entry.created, "label": entry.label,
+            "files": entry.file_count, "bytes": entry.total_bytes, "bytes_on_disk": entry.stored_bytes,
+            "added": entry.added, "changed": entry.changed, "removed": entry.removed}
+
+
+def _command_list(parser: ConfigParser, options: dict) -> dict:
+    """Lists every backup from the catalog, indexing the ones it does not know yet."""
+    return {"backups": [_catalog_summary(entry) for entry in parser.catalog_backups()]}
+
+
+def _command_prune(parser: ConfigParser, options: dict) -> dict:
+    pruned = parser.prune_backups(RetentionPolicy(**options["policy"]), dry_run=options["dry_run"])
+    return {"pruned" if not options["dry_run"] else "would_prune": [entry.id for entry in pruned]}
+
+
+def _command_diff(parser: ConfigParser, options: dict) -> dict:
+    """Field-level changes from a backup or another folder to the live config files."""
+    try:
+        file_diffs = parser.diff_with(options["against"], tuple(options["files"]) or None)
+    except ValueError as e:
+        raise CommandError(str(e))
+    files = []
+    for file_diff in file_diffs:
+        entry = {"file": file_diff.rel_path, "status": file_diff.status}
+        if file_diff.error:
+            entry["error"] = file_diff.error
+        if file_diff.changes:
+            entry["changes"] = [{"path": change.path, "kind": change.kind, "attribute": change.attribute,
+                                 "old": change.old, "new": change.new} for change in file_diff.changes]
+        files.append(entry)
+    return {"against": options["against"], "changes": sum(len(file_diff.changes) for file_diff in file_diffs),
+            "files": files}
+
+
+COMMANDS = {
+    "get": _command_get,
+    "apply": _command_apply,
+    "export": _command_export,
+    "backup": _command_backup,
+    "restore": _command_restore,
+    "list": _command_list,
+    "prune": _command_prune,
+    "diff": _command_diff,
+}
+
+
+@contextlib.contextmanager
+def _capture_log(stream: io.StringIO, level: int = logging.INFO):
+    """Sends the application's log records to stream instead of stderr while the block runs."""
+    logger = logging.getLogger("newworld_config_manager")
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    old_level, old_propagate = logger.level, logger.propagate
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    try:
+        yield
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(old_level)
+        logger.propagate = old_propagate
+
+
+def process_config_dir(command: str, config_dir: str | None, options: dict) -> dict:
+    """Runs one command against one config directory (None = auto-detect). Runs in a worker process."""
+    started = time.perf_counter()
+    summary = {"config_dir": config_dir, "status": "ok"}
+    log = io.StringIO()
+    try:
+        with _capture_log(log):
+            parser = ConfigParser(config_dir, rescan=options.get("rescan", False))
+            if parser.new_world_config_dir is None:
+                raise CommandError("config directory not found")
+            summary["config_dir"] = str(parser.new_world_config_dir)
+            summary.update(COMMANDS[command](parser, options))
+    except Exception as e:
+        summary["status"] = "error"
+        summary["error"] = str(e) or type(e).__name__
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    if options.get("verbose"):
+        summary["log"] = log.getvalue().splitlines()
+    return summary
+
+
+def run(command: str, config_dirs: list[str | None], options: dict, jobs: int | None = None) -> dict:
+    """Processes every config directory, in parallel worker processes when there is more than one."""
+    started = time.perf_counter()
+    workers = min(jobs or os.cpu_count() or 1, len(config_dirs))
+    if workers <= 1:
+        results = [process_config_dir(command, config_dir, options) for config_dir in config_dirs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(config_dirs) // (workers * 4))
+            results = list(executor.map(process_config_dir, repeat(command), config_dirs, repeat(options),
+                                        chunksize=chunksize))
+    failed = sum(1 for result in results if result["status"] != "ok")
+    return {
+        "command": command,
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - started, 3),
+        "results": results,
+    }
+
+
+def _split_assignment(text: str, what: str) -> tuple[str, str]:
+    name, sep, value = text.partition("=")
+    if not sep or not name:
+        raise ValueError(f"{what} '{text}' is not in the form NAME=VALUE")
+    return name, value
+
+
+def _read_config_dirs(args) -> list[str | None]:
+    config_dirs = list(args.config_dirs)
+    if args.from_file:
+        lines = sys.stdin.read().splitlines() if args.from_file == "-" else Path(args.from_file).read_text(encoding="utf-8").splitlines()
+        config_dirs.extend(line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#"))
+    return config_dirs or [None] # No directory given: use the detected one
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("config_dirs", nargs="*", metavar="CONFIG_DIR",
+                        help="New World config folder(s) (default: the detected one)")
+    common.add_argument("--from-file", metavar="FILE",
+                        help="read more config folders from FILE, one per line ('-' for stdin)")
+    common.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    common.add_argument("-v", "--verbose", action="store_true", help="include each folder's log in the summary")
+    common.add_argument("--rescan", action="store_true",
+                        help="without CONFIG_DIR, search for the config folder again instead of using the cached result")
+
+    parser = argparse.ArgumentParser(prog="python -m newworld_config_manager",
+                                     description="Headless New World Config Manager. Prints a JSON summary.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    apply_parser = subparsers.add_parser("apply", parents=[common], help="apply settings and key bindings")
+    apply_parser.add_argument("--preset", metavar="FILE", help="preset file (JSON, or MessagePack for .msgpack)")
+    apply_parser.add_argument("--set", dest="set_values", action="append", default=[], metavar="FIELD=VALUE",
+                              help="set a user setting, e.g. m_reticleColor='0 1 0 1' (repeatable)")
+    apply_parser.add_argument("--bind", action="append", default=[], metavar="ACTIONMAP/ACTION/DEVICE=INPUT",
+                              help="set a key binding, e.g. player/jump/keyboard=space (repeatable)")
+    apply_parser.add_argument("--all-rebindings", action="store_true",
+                              help="set bindings in every rebindings_b*.xml file, not just the newest")
+    apply_parser.add_argument("--backup", action="store_true", help="back up each folder before changing it")
+    apply_parser.add_argument("--dry-run", action="store_true", help="report what would change without saving")
+
+    get_parser = subparsers.add_parser("get", parents=[common], help="read settings and key bindings")
+    get_parser.add_argument("--setting", dest="settings", action="append", default=[], metavar="FIELD")
+    get_parser.add_argument("--binding", dest="bindings", action="append", default=[], metavar="ACTIONMAP/ACTION/DEVICE")
+
+    export_parser = subparsers.add_parser("export", parents=[common], help="save settings and key bindings as a preset")
+    export_parser.add_argument("-o", "--output", required=True, metavar="FILE",
+                               help="preset file to write (JSON, or MessagePack for .msgpack)")
+    export_parser.add_argument("--setting", dest="settings", action="append", default=[], metavar="FIELD",
+                               help="setting to export (repeatable; default: every setting and binding)")
+    export_parser.add_argument("--binding", dest="bindings", action="append", default=[],
+                               metavar="ACTIONMAP/ACTION/DEVICE", help="binding to export (repeatable)")
+
+    backup_parser = subparsers.add_parser("backup", parents=[common], help="back up config folders")
+    backup_parser.add_argument("--label", help="label stored with the snapshot")
+    backup_parser.add_argument("--archive", action="store_true",
+                               help="write a compressed, self-contained archive instead of a snapshot")
+    backup_parser.add_argument("--no-prune", action="store_true",
+                               help="keep all older backups instead of applying the default retention policy")
+
+    restore_parser = subparsers.add_parser("restore", parents=[common], help="restore config folders from a backup")
+    source = restore_parser.add_mutually_exclusive_group()
+    source.add_argument("--snapshot", default="latest", help="snapshot id to restore (default: latest)")
+    source.add_argument("--folder", help="restore from a plain backup folder instead of a snapshot")
+    source.add_argument("--archive", metavar="FILE", help="restore from a backup archive file")
+
+    subparsers.add_parser("list", parents=[common], help="list all backups with what changed in each")
+
+    prune_parser = subparsers.add_parser("prune", parents=[common],
+                                         help="delete the snapshots and archives a retention policy does not keep")
+    prune_parser.add_argument("--keep-last", type=int, default=DEFAULT_RETENTION.keep_last, metavar="N",
+                              help=f"keep the N newest backups (default: {DEFAULT_RETENTION.keep_last})")
+    prune_parser.add_argument("--keep-daily", type=int, default=DEFAULT_RETENTION.keep_daily, metavar="N",
+                              help=f"keep the newest backup of each of the last N days with backups "
+                                   f"(default: {DEFAULT_RETENTION.keep_daily})")
+    prune_parser.add_argument("--keep-weekly", type=int, default=DEFAULT_RETENTION.keep_weekly, metavar="N",
+                              help=f"keep the newest backup of each of the last N weeks with backups "
+                                   f"(default: {DEFAULT_RETENTION.keep_weekly})")
+    prune_parser.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+
+    diff_parser = subparsers.add_parser("diff", parents=[common],
+                                        help="show what changed in the live settings and bindings since a backup")
+    diff_parser.add_argument("--against", default="latest", metavar="SOURCE",
+                             help="backup id, config or backup folder, or archive file to compare with (default: latest)")
+    diff_parser.add_argument("--file", dest="files", action="append", default=[], metavar="PATTERN",
+                             help="relative path or glob of the files to compare "
+                                  "(default: savedata/usersettings.javsave and rebindings*.xml; repeatable)")
+    return parser
+
+
+def _build_options(parser: argparse.ArgumentParser, args) -> dict:
+    options = {"verbose": args.verbose, "rescan": args.rescan}
+    try:
+        if args.command == "apply":
+            preset = load_preset(args.preset) if args.preset else Preset()
+            for text in args.set_values:
+                name, value = _split_assignment(text, "Setting")
+                preset.settings[name] = value
+            for text in args.bind:
+                key_text, value = _split_assignment(text, "Binding")
+                preset.bindings[parse_binding_key(key_text)] = value
+            if preset.is_empty():
+                parser.error("apply needs --preset, --set or --bind")
+            options.update(preset=preset.to_dict(), backup=args.backup, dry_run=args.dry_run,
+                           all_rebindings=args.all_rebindings)
+        elif args.command == "get":
+            for text in args.bindings:
+                parse_binding_key(text)
+            if not args.settings and not args.bindings:
+                parser.error("get needs --setting or --binding")
+            options.update(settings=args.settings, bindings=args.bindings)
+        elif args.command == "export":
+            for text in args.bindings:
+                parse_binding_key(text)
+            if len(args.config_dirs) > 1 or args.from_file:
+                parser.error("export reads a single config folder")
+            options.update(output=str(Path(args.output).resolve()), settings=args.settings, bindings=args.bindings)
+        elif args.command == "backup":
+            options.update(label=args.label, archive=args.archive, prune=not args.no_prune)
+        elif args.command == "restore":
+            options.update(snapshot=args.snapshot, folder=args.folder, archive=args.archive)
+        elif args.command == "diff":
+            options.update(against=args.against, files=args.files)
+        elif args.command == "prune":
+            if min(args.keep_last, args.keep_daily, args.keep_weekly) < 0:
+                parser.error("--keep-* values cannot be negative")
+            if not RetentionPolicy(args.keep_last, args.keep_daily, args.keep_weekly).enabled:
+                parser.error("prune needs at least one --keep-* value above 0")
+            options.update(policy={"keep_last": args.keep_last, "keep_daily": args.keep_daily,
+                                   "keep_weekly": args.keep_weekly}, dry_run=args.dry_run)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+    return options
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(argv)
+    options = _build_options(parser, args)
+    summary = run(args.command, _read_config_dirs(args), options, jobs=args.jobs)
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0 if summary["failed"] == 0 else 1
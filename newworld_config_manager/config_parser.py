@@ -1,104 +1,209 @@
+import logging
 import xml.etree.ElementTree as ET
 import os
-import glob
 from pathlib import Path
-import shutil
-import datetime
+from typing import TYPE_CHECKING, Iterable
+from .discovery import discover_config_dir, find_latest_rebindings_file, find_rebindings_files
+from .instrumentation import span
+from .progress import OperationCancelled, Progress
+
+# Backups, restores, parsing and saving are imported where they are first used, which keeps
+# them (and hashlib, shutil, dataclasses, pyexpat, ...) off the startup path
+if TYPE_CHECKING:
+    from .backup_store import BackupStore
+    from .catalog import CatalogEntry, RetentionPolicy
+    from .parse_cache import ParseCache
+    from .rebindings_variants import RebindingsVariants
+    from .restore import RestoreResult
+    from .xml_diff import FileDiff
+    from .xml_source import SourceMap
+
+BACKUP_STORE_SUFFIX = "_backups"
+
+log = logging.getLogger(__name__)
 
 # For INI-style CFG files, you might use configparser
 # import configparser
 
 class ConfigParser:
-    def __init__(self):
-        self.new_world_config_dir = self._get_new_world_config_dir()
+    def __init__(self, config_dir: str | Path | None = None, discover: bool = True, rescan: bool = False):
+        """
+        config_dir overrides the automatically detected New World config directory.
+        With discover=False and no config_dir, the directory stays None until discover() is
+        called, e.g. on a worker thread after the window is shown. rescan ignores the cached
+        result of an earlier search.
+        """
+        self._parse_cache: "ParseCache | None" = None
+        self._source_maps: dict[str, "SourceMap"] = {} # Resolved path -> source of the tree last loaded from it
+        self.new_world_config_dir: Path | None = None
+        self.retention_policy: "RetentionPolicy | None" = None # None uses catalog.DEFAULT_RETENTION
+        if config_dir is not None:
+            self.new_world_config_dir = Path(config_dir) if Path(config_dir).is_dir() else None
+            if not self.new_world_config_dir:
+                log.warning(f"New World config directory not found at {config_dir}.")
+        elif discover:
+            self.discover(rescan)
+
+    @property
+    def parse_cache(self) -> "ParseCache":
+        """Skips re-parsing files that have not changed since they were last loaded."""
+        if self._parse_cache is None:
+            from .parse_cache import ParseCache
+            self._parse_cache = ParseCache()
+        return self._parse_cache
+
+    def discover(self, rescan: bool = False) -> Path | None:
+        """
+        Looks for the config directory (see _get_new_world_config_dir) and returns it.
+        rescan searches every location again instead of using the cached result.
+        """
+        self.new_world_config_dir = self._get_new_world_config_dir(rescan)
         if not self.new_world_config_dir:
-            print("Warning: New World config directory not found.")
+            log.warning("New World config directory not found.")
+        return self.new_world_config_dir
 
-    def _get_new_world_config_dir(self) -> Path | None:
+    def _get_new_world_config_dir(self, rescan: bool = False) -> Path | None:
         """
         Attempts to find the New World configuration directory.
-        Default path: %APPDATA%/AGS/New World
-        """
-        appdata_path = os.getenv('APPDATA')
-        if appdata_path:
-            nw_config_path = Path(appdata_path) / "AGS" / "New World"
-            if nw_config_path.is_dir():
-                print(f"Found New World config directory: {nw_config_path}")
-                return nw_config_path
-        # Fallback for non-Windows or if APPDATA is not set, though less likely for this game
-        # On Linux, it might be ~/.config/AGS/New World or similar through Proton
-        # For now, we focus on the standard Windows path.
-        # TODO: Add platform-specific paths or allow user to specify path
-        home_path = Path.home()
-        # A common Proton path structure might be:
-        # Path.home() / ".steam" / "steam" / "steamapps" / "compatdata" / "1063730" / "pfx" / "drive_c" / "users" / "steamuser" / "AppData" / "Roaming" / "AGS" / "New World"
-        # This is complex and game/Proton version dependent. For now, we'll stick to the direct Windows path.
-        print(f"Could not automatically determine New World config directory using APPDATA.")
-        # As a direct example for the user's request, but this should be dynamic
-        # For development/testing with a known path:
-        # specific_user_path = Path("C:/Users/lukas/AppData/Roaming/AGS/New World")
-        # if specific_user_path.is_dir():
-        #     print(f"Using specific user path: {specific_user_path}")
-        #     return specific_user_path
+        Checks NEW_WORLD_CONFIG_DIR, then %APPDATA%/AGS/New World, then the game's Proton prefix
+        (steamapps/compatdata/1063730/pfx/...) in every Steam library. The result is cached
+        between runs, see discovery.discover_config_dir().
+        """
+        with span("discovery") as info:
+            nw_config_path, source = discover_config_dir(use_cache=not rescan)
+            info["source"] = source
+        if nw_config_path is not None:
+            log.info(f"Found New World config directory: {nw_config_path} ({source})")
+            return nw_config_path
+        log.warning("Could not automatically determine New World config directory "
+                    "(set NEW_WORLD_CONFIG_DIR to choose one).")
         return None
 
     def load_xml_config(self, filepath):
         """Loads an XML configuration file."""
         if not Path(filepath).is_file():
-            print(f"Error: XML file not found at {filepath}")
+            log.error(f"XML file not found at {filepath}")
             return None
         try:
-            tree = ET.parse(filepath)
-            root = tree.getroot()
-            print(f"Successfully loaded XML: {filepath}")
+            root = self._parse_xml_file(filepath)
+            log.info(f"Successfully loaded XML: {filepath}")
             # TODO: Process XML data into a more usable format
             return root
         except ET.ParseError as e:
-            print(f"Error parsing XML file {filepath}: {e}")
+            log.error(f"Error parsing XML file {filepath}: {e}")
             return None
 
-    def save_xml_config(self, filepath: str, root_element: ET.Element) -> bool:
-        """Saves an XML ElementTree root_element to the specified filepath."""
+    def _parse_xml_file(self, filepath) -> ET.Element:
+        """Parses an XML file through the parse cache. Raises ET.ParseError on invalid XML."""
+        with span("parse", file=Path(filepath).name) as info:
+            hits_before = self.parse_cache.hits
+            root, source_map = self.parse_cache.parse_with_source(filepath)
+            self._source_maps[str(Path(filepath).resolve())] = source_map
+            stats = self.parse_cache.stats()
+            source = info["from"] = "parse cache" if stats["hits"] > hits_before else "disk"
+        log.debug(f"Parsed {Path(filepath).name} from {source} (parse cache: {stats['hits']} hits, {stats['misses']} misses)")
+        return root
+
+    def save_xml_config(self, filepath: str, root_element: ET.Element,
+                        changed_attributes: Iterable[tuple[ET.Element, str]] | None = None,
+                        overwrite_changes: bool = False) -> bool:
+        """
+        Saves an XML ElementTree root_element to the specified filepath.
+        If changed_attributes lists every (element, attribute) edited since root_element was loaded
+        or last saved, only those attribute values are rewritten in the original bytes, keeping the
+        game's formatting and comments. Otherwise, or if patching is not possible, the whole tree is
+        re-indented and written. If the file changed on disk since it was loaded, nothing is written
+        and False is returned, so the other program's values are not lost (see file_changed_on_disk()
+        and external_changes.py); overwrite_changes writes the whole tree over it instead.
+        """
         if root_element is None: # Check if root_element is None
-            print("Error: No XML data to save.")
+            log.error("No XML data to save.")
+            return False
+        from .xml_source import SourceMap, parse_with_offsets, write_file_atomically
+        with span("save", file=Path(filepath).name) as info:
+            if changed_attributes is not None:
+                source_map = self._source_maps.get(str(Path(filepath).resolve()))
+                if (source_map is not None and source_map.root is root_element and not overwrite_changes
+                        and not source_map.matches_file(filepath)):
+                    log.error(f"{Path(filepath).name} changed on disk since it was loaded, not saving over it.")
+                    info["mode"] = "refused"
+                    return False
+                if self._save_changed_attributes(filepath, root_element, changed_attributes):
+                    info["mode"] = "patch"
+                    return True
+            info["mode"] = "full"
+            try:
+                tree = ET.ElementTree(root_element)
+                ET.indent(tree, space="  ", level=0) # For pretty printing
+                data = ET.tostring(root_element, encoding="utf-8", xml_declaration=True)
+                st = write_file_atomically(filepath, data)
+                # The written bytes have the same element structure, so later saves can patch them
+                _root, offsets, encoding = parse_with_offsets(data)
+                self._source_maps[str(Path(filepath).resolve())] = SourceMap(
+                    root_element, offsets, data, st.st_size, st.st_mtime_ns, encoding)
+                log.info(f"Successfully saved XML to: {filepath}")
+                return True
+            except Exception as e:
+                log.error(f"Error saving XML file {filepath}: {e}")
+                return False
+
+    def _save_changed_attributes(self, filepath: str, root_element: ET.Element,
+                                 changed_attributes: Iterable[tuple[ET.Element, str]]) -> bool:
+        """Patches the changed attribute values into the file's original bytes. Returns False to fall back to a full write."""
+        from .xml_source import PatchError, write_file_atomically
+        source_map = self._source_maps.get(str(Path(filepath).resolve()))
+        if source_map is None or source_map.root is not root_element:
+            log.warning(f"No source bytes recorded for this document, rewriting all of {Path(filepath).name}.")
+            return False
+        if not source_map.matches_file(filepath): # Only with overwrite_changes, see save_xml_config()
+            log.warning(f"{Path(filepath).name} changed on disk since it was loaded, overwriting the whole file.")
             return False
         try:
-            tree = ET.ElementTree(root_element)
-            ET.indent(tree, space="  ", level=0) # For pretty printing
-            tree.write(filepath, encoding="utf-8", xml_declaration=True)
-            print(f"Successfully saved XML to: {filepath}")
-            return True
+            data, edits = source_map.patch_attributes(changed_attributes)
+        except PatchError as e:
+            log.warning(f"Cannot patch {Path(filepath).name} in place ({e}), rewriting the whole file.")
+            return False
+        try:
+            st = write_file_atomically(filepath, data)
         except Exception as e:
-            print(f"Error saving XML file {filepath}: {e}")
+            log.error(f"Error saving XML file {filepath}: {e}")
             return False
+        source_map.rebase(data, edits, st.st_size, st.st_mtime_ns)
+        log.info(f"Successfully saved XML to: {filepath} ({len(edits)} attribute value(s) rewritten)")
+        return True
+
+    def file_changed_on_disk(self, filepath: str) -> bool:
+        """True if the file is no longer the one last loaded from or saved to it (by size and mtime)."""
+        source_map = self._source_maps.get(str(Path(filepath).resolve()))
+        return source_map is None or not source_map.matches_file(filepath)
+
+    def reload_changed_file(self, filepath: str) -> ET.Element:
+        """
+        Parses a file again after it changed on disk, into a new tree. Raises ET.ParseError or
+        OSError. Once its values are merged into the open tree, call adopt_reloaded().
+        """
+        return self._parse_xml_file(filepath)
+
+    def adopt_reloaded(self, filepath: str, live_root: ET.Element) -> None:
+        """
+        Lets saves of live_root patch the file as reload_changed_file() read it. live_root must
+        have the reloaded tree's structure, see external_changes.merge_external_changes().
+        """
+        source_map = self._source_maps.get(str(Path(filepath).resolve()))
+        if source_map is not None and source_map.root is not live_root:
+            source_map.rebind(live_root)
     def _find_latest_rebindings_file(self) -> str | None:
         if not self.new_world_config_dir:
             return None
 
-        pattern = str(self.new_world_config_dir / "rebindings_b*.xml")
-        hashed_files = glob.glob(pattern)
-
-        latest_file = None
-        latest_mtime = 0
-
-        if hashed_files:
-            for f_path_str in hashed_files:
-                f_path = Path(f_path_str)
-                mtime = f_path.stat().st_mtime
-                if mtime > latest_mtime:
-                    latest_mtime = mtime
-                    latest_file = str(f_path)
-            print(f"Found latest hashed rebindings: {latest_file}")
-            return latest_file
-
-        # If no hashed files, check for the generic rebindings.xml
-        generic_rebindings = self.new_world_config_dir / "rebindings.xml"
-        if generic_rebindings.is_file():
-            print(f"Found generic rebindings: {generic_rebindings}")
-            return str(generic_rebindings)
-
-        print("No rebindings file found.")
-        return None
+        latest_file, is_hashed = find_latest_rebindings_file(self.new_world_config_dir)
+        if latest_file is None:
+            log.warning("No rebindings file found.")
+        elif is_hashed:
+            log.info(f"Found latest hashed rebindings: {latest_file}")
+        else:
+            log.info(f"Found generic rebindings: {latest_file}")
+        return latest_file
 
     def load_rebindings_config(self):
         """Loads the New World rebindings XML configuration."""
@@ -107,6 +212,33 @@ class ConfigParser:
             return self.load_xml_config(rebindings_file_path)
         return None
 
+    def load_rebindings_variants(self, progress: Progress | None = None) -> "RebindingsVariants | None":
+        """
+        Parses every hashed rebindings_b*.xml (or rebindings.xml if there is none) concurrently
+        and merges their bindings, see rebindings_variants.py. The newest file is the primary one.
+        """
+        if not self.new_world_config_dir:
+            return None
+        from .rebindings_variants import parse_rebindings_files
+        paths = find_rebindings_files(self.new_world_config_dir)
+        if not paths:
+            latest_file, _is_hashed = find_latest_rebindings_file(self.new_world_config_dir)
+            paths = [(latest_file, 0)] if latest_file else []
+        with span("parse rebindings variants", files=len(paths)):
+            variants = parse_rebindings_files(paths, self._parse_xml_file, progress)
+        log.info(f"Loaded {len(variants)} rebindings file(s)"
+                 + (f", {len(variants.unreadable)} could not be parsed" if variants.unreadable else ""))
+        return variants
+
+    def save_rebindings_variants(self, variants: "RebindingsVariants",
+                                 changed_attributes: Iterable[tuple[ET.Element, str]]) -> dict[str, bool]:
+        """
+        Saves the rebindings files that hold any of changed_attributes, each rewriting only its
+        own changed values. Files without changes are not written. Returns path -> success.
+        """
+        return {path: self.save_xml_config(path, variants.root_of(path), changed)
+                for path, changed in variants.changes_by_file(changed_attributes).items()}
+
     def load_user_settings_config(self) -> tuple[str, ET.Element | None] | None:
         """
         Attempts to load and parse usersettings.javsave as XML.
@@ -114,49 +246,214 @@ class ConfigParser:
         Returns None if the file cannot be read.
         """
         if not self.new_world_config_dir:
-            print("Cannot load user settings: New World config directory not found.")
+            log.warning("Cannot load user settings: New World config directory not found.")
             return None
         javsave_path = self.new_world_config_dir / "savedata" / "usersettings.javsave"
 
         if javsave_path.is_file():
-            print(f"Found usersettings.javsave at: {javsave_path}")
+            log.info(f"Found usersettings.javsave at: {javsave_path}")
             try:
                 # Attempt to parse directly as XML
-                tree = ET.parse(javsave_path)
-                root = tree.getroot()
-                print(f"Successfully parsed usersettings.javsave as XML: {javsave_path}")
+                root = self._parse_xml_file(javsave_path)
+                log.info(f"Successfully parsed usersettings.javsave as XML: {javsave_path}")
                 return str(javsave_path), root
             except ET.ParseError as e:
-                print(f"Error parsing usersettings.javsave as XML: {e}")
+                log.error(f"Error parsing usersettings.javsave as XML: {e}")
                 return str(javsave_path), None # Return path but None for root to indicate parsing failure
             except Exception as e:
-                print(f"Error processing usersettings.javsave: {e}")
+                log.error(f"Error processing usersettings.javsave: {e}")
                 return None
         else:
-            print(f"usersettings.javsave not found at: {javsave_path}")
+            log.warning(f"usersettings.javsave not found at: {javsave_path}")
             return None
 
-    def backup_config_folder(self) -> str | None:
+    def get_backup_store(self) -> "BackupStore | None":
         """
-        Creates a timestamped backup of the entire New World config folder.
-        The backup is placed in the parent directory of the config folder.
-        e.g., if config is .../AGS/New World/, backup is .../AGS/New World_backup_YYYYMMDD_HHMMSS/
-        Returns the path to the backup folder if successful, None otherwise.
+        Returns the deduplicating backup store that sits next to the config folder.
+        e.g., if config is .../AGS/New World/, the store is .../AGS/New World_backups/
+        """
+        if not self.new_world_config_dir:
+            return None
+        from .backup_store import BackupStore
+        store_dir = self.new_world_config_dir.parent / f"{self.new_world_config_dir.name}{BACKUP_STORE_SUFFIX}"
+        return BackupStore(store_dir)
+
+    def list_backups(self) -> list[str]:
+        """Returns the ids of all backup snapshots and archives, newest first."""
+        store = self.get_backup_store()
+        if store is None:
+            return []
+        return list(reversed(store.list_backups()))
+
+    def catalog_backups(self, progress: Progress | None = None) -> list["CatalogEntry"]:
+        """
+        Returns the catalog entries of all backups, newest first: snapshots, archives and the
+        full-copy backup folders older versions made next to the config folder.
+        Backups not catalogued yet are indexed first (see BackupStore.sync_catalog).
+        """
+        store = self.get_backup_store()
+        if store is None:
+            return []
+        from .catalog import legacy_backup_folders
+        with span("catalog backups"):
+            return store.sync_catalog(legacy_backup_folders(self.new_world_config_dir), progress=progress)
+
+    def delete_backup(self, entry: "CatalogEntry") -> None:
+        """Deletes a backup listed by catalog_backups(), including legacy backup folders."""
+        from .catalog import KIND_FOLDER, legacy_backup_folders
+        store = self.get_backup_store()
+        if entry.kind != KIND_FOLDER:
+            store.delete_backup(entry.id)
+        elif Path(entry.location) in legacy_backup_folders(self.new_world_config_dir):
+            import shutil
+            shutil.rmtree(entry.location)
+            store.catalog.update(removed=[entry.id])
+        else:
+            raise ValueError(f"{entry.location} is not a backup folder of {self.new_world_config_dir}")
+        log.info(f"Deleted backup {entry.id}")
+
+    def prune_backups(self, policy: "RetentionPolicy | None" = None, dry_run: bool = False) -> list["CatalogEntry"]:
+        """
+        Deletes the snapshots and archives the retention policy (default: self.retention_policy)
+        does not keep and returns them. Legacy backup folders are never pruned.
+        """
+        store = self.get_backup_store()
+        if store is None:
+            return []
+        from .catalog import DEFAULT_RETENTION
+        policy = policy or self.retention_policy or DEFAULT_RETENTION
+        with span("prune backups", dry_run=dry_run):
+            return store.prune(policy, dry_run=dry_run)
+
+    def backup_config_folder(self, label: str | None = None, progress: Progress | None = None,
+                             archive: bool = False, prune: bool = True) -> str | None:
+        """
+        Records a timestamped snapshot of the entire New World config folder in the backup store.
+        Unchanged files are deduplicated against earlier snapshots, so only new content is copied.
+        With archive=True, a compressed self-contained archive is written instead (see archive.py).
+        With prune=True, older backups are then pruned by the retention policy (see prune_backups).
+        Returns the path to the snapshot manifest or archive if successful, None otherwise.
         """
         if not self.new_world_config_dir or not self.new_world_config_dir.is_dir():
-            print("Error: New World config directory not found or is not a directory.")
+            log.error("New World config directory not found or is not a directory.")
             return None
 
-        backup_parent_dir = self.new_world_config_dir.parent
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_folder_name = f"{self.new_world_config_dir.name}_backup_{timestamp}"
-        backup_path = backup_parent_dir / backup_folder_name
+        with span("backup", archive=archive):
+            store = self.get_backup_store()
+            try:
+                if archive:
+                    snapshot_id = store.create_archive(self.new_world_config_dir, label=label, progress=progress)
+                    backup_path = store.archive_path(snapshot_id)
+                    log.info(f"Successfully backed up config folder to archive: {backup_path}")
+                else:
+                    snapshot_id = store.create_snapshot(self.new_world_config_dir, label=label, progress=progress)
+                    backup_path = store.manifest_path(snapshot_id)
+                    log.info(f"Successfully backed up config folder to snapshot: {backup_path}")
+            except OperationCancelled:
+                log.info("Backup cancelled.")
+                raise
+            except Exception as e:
+                log.error(f"Error creating backup: {e}")
+                return None
+        if prune:
+            try:
+                self.prune_backups()
+            except Exception as e: # The backup itself succeeded
+                log.warning(f"Could not prune old backups: {e}")
+        return str(backup_path)
+
+    def _read_backup_files(self, source: str | Path, patterns: tuple[str, ...] | None) -> dict[str, bytes]:
+        """The files of a backup or folder that match patterns (see xml_diff.DIFFABLE_FILES), by relative path."""
+        from .archive import ARCHIVE_SUFFIX, SnapshotArchive
+        from .xml_diff import DIFFABLE_FILES, diffable
+        patterns = patterns or DIFFABLE_FILES
+        store = self.get_backup_store()
+        source = str(source)
+        if source == "latest":
+            backup_ids = self.list_backups()
+            if not backup_ids:
+                raise ValueError("There are no backups yet")
+            source = backup_ids[0]
+        if store is not None and store.manifest_path(source).is_file():
+            files = store.load_manifest(source)["files"]
+            return {rel_path: store.object_path(files[rel_path][2]).read_bytes()
+                    for rel_path in diffable(files, patterns)}
+        archive_path = store.archive_path(source) if store is not None else None
+        if archive_path is None or not archive_path.is_file():
+            archive_path = Path(source) if source.endswith(ARCHIVE_SUFFIX) else None
+        if archive_path is not None:
+            with SnapshotArchive(archive_path) as archive:
+                return {rel_path: archive.read(rel_path) for rel_path in diffable(archive.files, patterns)}
+        folder = Path(source)
+        if not folder.is_dir() and self.new_world_config_dir is not None:
+            folder = self.new_world_config_dir.parent / source # A legacy backup folder by name
+        if not folder.is_dir():
+            raise ValueError(f"'{source}' is neither a backup nor a folder")
+        return self._read_folder_files(folder, patterns)
 
-        try:
-            shutil.copytree(self.new_world_config_dir, backup_path)
-            print(f"Successfully backed up config folder to: {backup_path}")
-            return str(backup_path)
-        except Exception as e:
-            print(f"Error creating backup: {e}")
+    @staticmethod
+    def _read_folder_files(folder: Path, patterns: tuple[str, ...]) -> dict[str, bytes]:
+        from .backup_store import iter_files
+        from .xml_diff import diffable
+        return {rel_path: (folder / rel_path).read_bytes()
+                for rel_path in diffable((rel_path for rel_path, _st in iter_files(folder)), patterns)}
+
+    def diff_with(self, source: str | Path, patterns: tuple[str, ...] | None = None) -> list["FileDiff"]:
+        """
+        Compares the live config files with a backup (id from catalog_backups(), or "latest"), another
+        config or backup folder (e.g. from another machine), or an archive file. Changes go from
+        source to live, e.g. a value "added" exists in the live folder but not in the backup.
+        Only usersettings.javsave and rebindings files are compared unless patterns say otherwise.
+        """
+        if not self.new_world_config_dir:
+            raise ValueError("New World config directory not found")
+        from .xml_diff import DIFFABLE_FILES, diff_file_sets
+        with span("diff", source=str(source)) as info:
+            old_files = self._read_backup_files(source, patterns)
+            new_files = self._read_folder_files(self.new_world_config_dir, patterns or DIFFABLE_FILES)
+            results = diff_file_sets(old_files, new_files)
+            info["changes"] = sum(len(result.changes) for result in results)
+        return results
+
+    def restore_backup(self, snapshot_id: str | None = None, backup_dir: str | Path | None = None,
+                       progress: Progress | None = None, archive_path: str | Path | None = None) -> "RestoreResult | None":
+        """
+        Restores the config folder from a backup snapshot or archive (by id), a plain backup folder,
+        or an archive file anywhere (archive_path). Files are streamed out of archives one at a time.
+        Only files that differ from the backup are copied, extra files are removed, and the
+        restored folder is swapped in atomically so a failure leaves the live folder untouched.
+        Returns a RestoreResult describing what changed, or None on failure.
+        Raises OperationCancelled if cancelled through progress; the live folder is then unchanged.
+        """
+        if not self.new_world_config_dir:
+            log.error("New World config directory not found. Cannot restore.")
             return None
+        from .archive import SnapshotArchive
+        from .restore import files_from_archive, files_from_folder, files_from_snapshot, restore_directory
+        with span("restore"):
+            try:
+                if snapshot_id is not None and self.get_backup_store().archive_path(snapshot_id).is_file():
+                    archive_path = self.get_backup_store().archive_path(snapshot_id)
+                if archive_path is not None:
+                    with SnapshotArchive(archive_path) as archive:
+                        result = restore_directory(self.new_world_config_dir, files_from_archive(archive),
+                                                   progress=progress)
+                else:
+                    if snapshot_id is not None:
+                        source_files = files_from_snapshot(self.get_backup_store(), snapshot_id)
+                    elif backup_dir is not None:
+                        source_files = files_from_folder(Path(backup_dir))
+                    else:
+                        log.error("No backup selected to restore from.")
+                        return None
+                    result = restore_directory(self.new_world_config_dir, source_files, progress=progress)
+                log.info(f"Restored {self.new_world_config_dir}: {len(result.copied)} copied, "
+                         f"{len(result.unchanged)} unchanged, {len(result.deleted)} deleted.")
+                return result
+            except OperationCancelled:
+                log.info("Restore cancelled.")
+                raise
+            except Exception as e:
+                log.error(f"Error during restore: {e}")
+                return None
     # TODO: Add methods for CFG and "javsave" files
\ No newline at end of file
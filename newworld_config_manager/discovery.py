@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+
+NEW_WORLD_APP_ID = "1063730"
+CONFIG_SUBPATH = ("AGS", "New World")
+OVERRIDE_ENV = "NEW_WORLD_CONFIG_DIR" # Set to use a specific config folder
+CACHE_VERSION = 2
+MAX_PROBE_THREADS = 8
+
+_VDF_PATH_RE = re.compile(r'"path"\s+"((?:[^"\\]|\\.)*)"')
+
+log = logging.getLogger(__name__)
+
+
+def default_cache_path() -> Path:
+    """Where the discovery result is remembered between runs."""
+    if sys.platform == "win32" and os.getenv("LOCALAPPDATA"):
+        base = Path(os.environ["LOCALAPPDATA"])
+    else:
+        base = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "newworld_config_manager" / "discovery.json"
+
+
+def steam_roots() -> list[Path]:
+    """Default Steam installation folders for this platform (they may not exist)."""
+    home = Path.home()
+    if sys.platform == "win32":
+        program_files = os.getenv("PROGRAMFILES(X86)") or os.getenv("PROGRAMFILES") or "C:/Program Files (x86)"
+        return [Path(program_files) / "Steam"]
+    return [
+        home / ".steam" / "steam",
+        home / ".steam" / "root",
+        home / ".local" / "share" / "Steam",
+        home / ".var" / "app" / "com.valvesoftware.Steam" / ".local" / "share" / "Steam", # Flatpak
+    ]
+
+
+def library_folders_files(roots: list[Path] | None = None) -> list[Path]:
+    """The libraryfolders.vdf file of every Steam root that has one."""
+    files = []
+    for root in roots if roots is not None else steam_roots():
+        vdf = root / "steamapps" / "libraryfolders.vdf"
+        if vdf.is_file():
+            files.append(vdf)
+    return files
+
+
+def steam_libraries(roots: list[Path] | None = None) -> list[Path]:
+    """Every Steam library: the roots themselves plus the paths listed in libraryfolders.vdf."""
+    roots = roots if roots is not None else steam_roots()
+    libraries: dict[str, Path] = {}
+    for root in roots:
+        if root.is_dir():
+            libraries.setdefault(os.path.realpath(root), root)
+    for vdf in library_folders_files(roots):
+        try:
+            text = vdf.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+        for raw_path in _VDF_PATH_RE.findall(text):
+            library = Path(raw_path.replace("\\\\", "\\"))
+            libraries.setdefault(os.path.realpath(library), library)
+    return list(libraries.values())
+
+
+def _probe_config_dir(path: Path) -> Path | None:
+    return path if path.is_dir() else None
+
+
+def _probe_proton_prefix(library: Path) -> Path | None:
+    """Looks for the config folder of any Wine user in the game's Proton prefix of a Steam library."""
+    users_dir = library / "steamapps" / "compatdata" / NEW_WORLD_APP_ID / "pfx" / "drive_c" / "users"
+    try:
+        with os.scandir(users_dir) as entries:
+            user_dirs = [entry.path for entry in entries if entry.is_dir()]
+    except OSError:
+        return None
+    # Proton uses "steamuser"; check it first
+    user_dirs.sort(key=lambda path: os.path.basename(path) != "steamuser")
+    for user_dir in user_dirs:
+        candidate = Path(user_dir, "AppData", "Roaming", *CONFIG_SUBPATH)
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+PROBES = {"folder": _probe_config_dir, "proton_prefix": _probe_proton_prefix} # Probe name -> function(argument)
+
+
+def candidate_probes(override: str | Path | None = None) -> list[tuple[str, str, Path]]:
+    """(source description, probe name in PROBES, probe argument) in priority order."""
+    probes = []
+    if override:
+        probes.append(("override", "folder", Path(override)))
+    appdata = os.getenv("APPDATA")
+    if appdata:
+        probes.append(("APPDATA", "folder", Path(appdata, *CONFIG_SUBPATH)))
+    for library in steam_libraries():
+        probes.append((f"Proton prefix in {library}", "proton_prefix", library))
+    return probes
+
+
+def scan_for_config_dir(override: str | Path | None = None) -> tuple[Path | None, str | None, list]:
+    """
+    Probes every candidate location in parallel (each probe is a few stat/scandir calls, which
+    can be slow on network or removable drives) and returns the highest-priority hit, its source
+    and the probes ranked above it, as [probe name, argument] pairs.
+    """
+    probes = candidate_probes(override)
+    if not probes:
+        return None, None, []
+    from concurrent.futures import ThreadPoolExecutor # Only needed when the cached result cannot be used
+    with ThreadPoolExecutor(max_workers=min(MAX_PROBE_THREADS, len(probes))) as executor:
+        results = list(executor.map(lambda probe: PROBES[probe[1]](probe[2]), probes))
+    for position, ((source, _probe, _argument), found) in enumerate(zip(probes, results)):
+        if found is not None:
+            return found, source, [[probe, str(argument)] for _source, probe, argument in probes[:position]]
+    return None, None, []
+
+
+def _higher_priority_found(probes: list) -> bool:
+    """True if one of the cached [probe name, argument] pairs now finds a config folder."""
+    try:
+        return any(PROBES[probe](Path(argument)) is not None for probe, argument in probes)
+    except (KeyError, TypeError, ValueError):
+        return True # Not written by this version; scan again
+
+
+def _cache_inputs(override: str | None) -> dict:
+    """Everything that can change the discovery result; the cache is only used while it is unchanged."""
+    inputs = {"override": override or "", "APPDATA": os.getenv("APPDATA", "")}
+    for vdf in library_folders_files():
+        try:
+            inputs[str(vdf)] = os.stat(vdf).st_mtime_ns
+        except OSError:
+            pass
+    return inputs
+
+
+def discover_config_dir(override: str | Path | None = None, cache_path: Path | None = None,
+                        use_cache: bool = True) -> tuple[Path | None, str | None]:
+    """
+    Finds the New World config folder: the override (argument or NEW_WORLD_CONFIG_DIR), then
+    %APPDATA%/AGS/New World, then the game's Proton prefix in every Steam library.
+    The result is remembered in a small cache file and reused while the folder still exists, the
+    inputs (override, APPDATA, libraryfolders.vdf mtimes) are unchanged and none of the locations
+    ranked above it has gained a config folder since. use_cache=False always scans again.
+    Returns (config folder or None, where it was found; "cache: ..." for cached results).
+    """
+    override = str(override) if override else os.getenv(OVERRIDE_ENV) or None
+    cache_path = cache_path or default_cache_path()
+    inputs = _cache_inputs(override)
+
+    if use_cache:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if (cached.get("version") == CACHE_VERSION and cached.get("inputs") == inputs
+                    and cached.get("config_dir") and os.path.isdir(cached["config_dir"])
+                    and not _higher_priority_found(cached.get("higher_priority", []))):
+                return Path(cached["config_dir"]), f"cache: {cached.get('source')}"
+        except (OSError, ValueError):
+            pass
+
+    config_dir, source, higher_priority = scan_for_config_dir(override)
+    if config_dir is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "config_dir": str(config_dir), "source": source,
+                           "inputs": inputs, "higher_priority": higher_priority}, f, indent=2)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            log.warning(f"Could not write discovery cache {cache_path}: {e}")
+    return config_dir, source
+
+
+def find_rebindings_files(config_dir: str | Path) -> list[tuple[str, int]]:
+    """(path, mtime_ns) of every rebindings_b*.xml in config_dir, from a single directory scan."""
+    found = []
+    try:
+        with os.scandir(config_dir) as entries:
+            for entry in entries:
+                name = entry.name.lower() # Windows file names are case-insensitive
+                if name.startswith("rebindings_b") and name.endswith(".xml") and entry.is_file():
+                    found.append((entry.path, entry.stat().st_mtime_ns))
+    except OSError:
+        pass
+    return found
+
+
+def find_latest_rebindings_file(config_dir: str | Path) -> tuple[str | None, bool]:
+    """
+    The most recently modified rebindings_b*.xml, or rebindings.xml if there is none.
+    Returns (path or None, whether it is one of the hashed rebindings_b*.xml files).
+    """
+    hashed_files = find_rebindings_files(config_dir)
+    if hashed_files:
+        return max(hashed_files, key=lambda item: item[1])[0], True
+    generic_rebindings = Path(config_dir) / "rebindings.xml"
+    if generic_rebindings.is_file():
+        return str(generic_rebindings), False
+    return None, False
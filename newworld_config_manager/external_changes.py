@@ -0,0 +1,96 @@
+"""
+Merging a config file that was rewritten on disk (e.g. by the game) into the open document.
+
+The file is parsed again and compared with the live tree element by element, in document
+order. When the game rewrites a file it writes the same elements with other values, so the
+two trees line up one to one and only attribute values need to be looked at; comparing an
+element's attributes is a dict comparison, so the check is linear and cheap. Anything else
+(elements added, removed, reordered or with other text) is a structural change, which is not
+merged: the document has to be loaded again.
+
+Each attribute that differs is sorted by what the user did with it since the last save:
+- not edited: the value on disk is taken over into the live tree;
+- edited, and the file still holds the value it had when loaded: the user's edit stays;
+- edited, and the file now holds another value: a conflict. The user's value stays in the
+  tree (saving writes it), and the value on disk becomes the one Reset goes back to.
+"""
+import xml.etree.ElementTree as ET
+from typing import NamedTuple
+
+from .journal import Change
+
+
+class Conflict(NamedTuple):
+    """An attribute the user edited that was also changed on disk."""
+    element: ET.Element
+    attribute: str
+    saved_value: str | None # On disk when the document was loaded or last saved
+    mine: str | None # The user's unsaved value, kept in the tree
+    theirs: str | None # On disk now
+
+    def describe(self) -> str:
+        return f"changed on disk to '{self.theirs or ''}' while you changed it to '{self.mine or ''}'"
+
+
+class ExternalChanges(NamedTuple):
+    applied: list[Change] # Values taken over from disk, already set in the live tree
+    conflicts: list[Conflict]
+    # (element, attribute) -> its value on disk now, for the edited attributes whose value on disk
+    # changed; see EditJournal.rebase_saved()
+    saved_values: dict[tuple[ET.Element, str], str | None]
+    structural: bool = False # Not merged; nothing was changed
+
+    def __bool__(self) -> bool:
+        return bool(self.applied or self.conflicts or self.saved_values or self.structural)
+
+    def changed_elements(self) -> set[ET.Element]:
+        return ({change.element for change in self.applied} | {conflict.element for conflict in self.conflicts}
+                | {element for element, _attribute in self.saved_values})
+
+
+def _same_structure(live_element: ET.Element, disk_element: ET.Element) -> bool:
+    return (live_element.tag == disk_element.tag
+            and (live_element.text or "").strip() == (disk_element.text or "").strip())
+
+
+def merge_external_changes(live_root: ET.Element, disk_root: ET.Element,
+                           saved_values: dict[tuple[ET.Element, str], str | None]) -> ExternalChanges:
+    """
+    Takes the values of disk_root, the file as it is on disk now, over into live_root.
+    saved_values are the user's unsaved edits as (element, attribute) -> value at the last save,
+    see EditJournal.dirty_attributes(). On a structural change nothing is touched and the result
+    has structural set.
+    """
+    live_elements, disk_elements = list(live_root.iter()), list(disk_root.iter())
+    if len(live_elements) != len(disk_elements):
+        return ExternalChanges([], [], {}, structural=True)
+    edited_elements = {element for element, _attribute in saved_values}
+    differing = []
+    for live_element, disk_element in zip(live_elements, disk_elements):
+        if not _same_structure(live_element, disk_element):
+            return ExternalChanges([], [], {}, structural=True)
+        if live_element.attrib != disk_element.attrib or live_element in edited_elements:
+            differing.append((live_element, disk_element))
+
+    applied, conflicts, rebased = [], [], {}
+    for live_element, disk_element in differing:
+        attributes = list(live_element.attrib) + [name for name in disk_element.attrib if name not in live_element.attrib]
+        for attribute in attributes:
+            mine, theirs = live_element.get(attribute), disk_element.get(attribute)
+            key = (live_element, attribute)
+            if key not in saved_values:
+                if mine != theirs:
+                    applied.append(Change(live_element, attribute, mine, theirs))
+                continue
+            if theirs == saved_values[key]:
+                continue # Only the user changed it
+            rebased[key] = theirs
+            if mine != theirs:
+                conflicts.append(Conflict(live_element, attribute, saved_values[key], mine, theirs))
+
+    for change in applied:
+        if change.new_value is None:
+            change.element.attrib.pop(change.attribute, None)
+        else:
+            change.element.set(change.attribute, change.new_value)
+    return ExternalChanges(applied, conflicts, rebased)
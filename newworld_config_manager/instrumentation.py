@@ -0,0 +1,159 @@
+"""
+Timing spans and logging setup.
+
+    with span("parse", file=name):
+        ...
+
+Every span is logged at DEBUG level (INFO when slow), counted in per-name totals for the
+timing panel and kept in a bounded buffer that can be exported as Chrome trace-event JSON
+(open it in chrome://tracing or https://ui.perfetto.dev).
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import NamedTuple
+
+LOG_LEVEL_ENV = "NWCM_LOG_LEVEL" # e.g. DEBUG to log every span and edit
+TRACE_FILE_ENV = "NWCM_TRACE_FILE" # Write a Chrome trace of the session here on exit
+MAX_SPANS = 10000 # Spans kept for trace export; totals are kept for every span
+SLOW_SPAN_MS = 500 # Spans slower than this are logged at INFO level
+
+log = logging.getLogger(__name__)
+
+
+class SpanRecord(NamedTuple):
+    name: str
+    start_ns: int # time.perf_counter_ns() when the span started
+    duration_ns: int
+    thread_id: int
+    thread_name: str
+    args: dict
+
+
+class SpanTotals(NamedTuple):
+    count: int
+    total_ns: int
+    max_ns: int
+    last_ns: int
+
+
+class Tracer:
+    """Collects finished spans from any thread."""
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self._lock = threading.Lock()
+        self._spans: deque[SpanRecord] = deque(maxlen=max_spans)
+        self._totals: dict[str, SpanTotals] = {}
+        self.generation = 0 # Incremented for every finished span, so viewers can poll cheaply
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """Times the block. args are shown in the trace; an exception is recorded and re-raised."""
+        start_ns = time.perf_counter_ns()
+        try:
+            yield args # The block may add results, e.g. args["rows"] = n
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            self.add(name, start_ns, time.perf_counter_ns() - start_ns, args)
+
+    def traced(self, name: str):
+        """Decorator form of span()."""
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def add(self, name: str, start_ns: int, duration_ns: int, args: dict | None = None):
+        thread = threading.current_thread()
+        record = SpanRecord(name, start_ns, duration_ns, thread.ident or 0, thread.name, args or {})
+        with self._lock:
+            self._spans.append(record)
+            totals = self._totals.get(name)
+            if totals is None:
+                self._totals[name] = SpanTotals(1, duration_ns, duration_ns, duration_ns)
+            else:
+                self._totals[name] = SpanTotals(totals.count + 1, totals.total_ns + duration_ns,
+                                                max(totals.max_ns, duration_ns), duration_ns)
+            self.generation += 1
+        milliseconds = duration_ns / 1e6
+        level = logging.INFO if milliseconds >= SLOW_SPAN_MS else logging.DEBUG
+        if log.isEnabledFor(level):
+            log.log(level, "%s took %.2f ms %s", name, milliseconds, record.args or "")
+
+    def spans(self) -> list[SpanRecord]:
+        with self._lock:
+            return list(self._spans)
+
+    def totals(self) -> dict[str, SpanTotals]:
+        with self._lock:
+            return dict(self._totals)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._totals.clear()
+            self.generation += 1
+
+    def chrome_trace(self) -> dict:
+        """The recorded spans in Chrome trace-event format (complete "X" events, microseconds)."""
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        for record in self.spans():
+            thread_names[record.thread_id] = record.thread_name
+            events.append({"name": record.name, "cat": "nwcm", "ph": "X", "pid": pid, "tid": record.thread_id,
+                           "ts": record.start_ns / 1000, "dur": record.duration_ns / 1000,
+                           "args": {key: str(value) for key, value in record.args.items()}})
+        for thread_id, thread_name in thread_names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                           "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str | os.PathLike) -> int:
+        """Writes the recorded spans to path. Returns the number of spans written."""
+        trace = self.chrome_trace()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        return sum(1 for event in trace["traceEvents"] if event["ph"] == "X")
+
+
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+
+
+def configure_logging(level: str | int | None = None):
+    """
+    Sends the application's log records to stderr. The level comes from the argument, then
+    NWCM_LOG_LEVEL, then INFO. If NWCM_TRACE_FILE is set, a Chrome trace is written there on exit.
+    """
+    level = level or os.getenv(LOG_LEVEL_ENV) or logging.INFO
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+    logging.basicConfig(format="%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+    logging.getLogger("newworld_config_manager").setLevel(level)
+
+    trace_file = os.getenv(TRACE_FILE_ENV)
+    if trace_file:
+        atexit.register(_export_on_exit, trace_file)
+
+
+def _export_on_exit(path: str):
+    try:
+        count = tracer.export_chrome_trace(path)
+        log.info("Wrote %d span(s) to %s", count, path)
+    except OSError as e:
+        log.error("Could not write trace file %s: %s", path, e)
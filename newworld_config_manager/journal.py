@@ -0,0 +1,131 @@
+import xml.etree.ElementTree as ET
+from typing import Iterable, NamedTuple
+
+
+class Change(NamedTuple):
+    """One attribute edit. A value of None means the attribute was absent."""
+    element: ET.Element
+    attribute: str
+    old_value: str | None
+    new_value: str | None
+
+
+def _set_attribute(element: ET.Element, attribute: str, value: str | None) -> None:
+    if value is None:
+        element.attrib.pop(attribute, None)
+    else:
+        element.set(attribute, value)
+
+
+class EditJournal:
+    """
+    Undo/redo history of attribute edits on a loaded XML document.
+
+    Each journal entry is a tuple of Changes that are undone and redone together, so a
+    bulk operation is a single undo step. Alongside the history the journal keeps the
+    value every edited attribute had at the last save point; an attribute stops being
+    dirty as soon as it is set back to that value. Recording, undoing and redoing an
+    entry are O(number of changes in the entry).
+    """
+
+    def __init__(self):
+        self._entries: list[tuple[Change, ...]] = []
+        self._position = 0 # Entries before this index are applied; the rest can be redone
+        self._saved_values: dict[tuple[ET.Element, str], str | None] = {}
+
+    def clear(self) -> None:
+        """Forgets all history, e.g. after loading a different document."""
+        self._entries.clear()
+        self._position = 0
+        self._saved_values.clear()
+
+    def record(self, element: ET.Element, attribute: str, old_value: str | None, new_value: str | None) -> None:
+        """Records an edit that has already been applied to element."""
+        self.record_batch([Change(element, attribute, old_value, new_value)])
+
+    def record_batch(self, changes: Iterable[Change]) -> None:
+        """Records several already-applied edits as one undo step."""
+        entry = tuple(change for change in changes if change.old_value != change.new_value)
+        if not entry:
+            return
+        del self._entries[self._position:] # A new edit discards the redo history
+        self._entries.append(entry)
+        self._position += 1
+        for change in entry:
+            self._track(change.element, change.attribute, change.old_value, change.new_value)
+
+    @property
+    def can_undo(self) -> bool:
+        return self._position > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._position < len(self._entries)
+
+    def undo(self) -> tuple[Change, ...]:
+        """Reverts the latest entry on the XML elements and returns its changes (empty if none)."""
+        if not self.can_undo:
+            return ()
+        self._position -= 1
+        entry = self._entries[self._position]
+        for change in reversed(entry):
+            _set_attribute(change.element, change.attribute, change.old_value)
+            self._track(change.element, change.attribute, change.new_value, change.old_value)
+        return entry
+
+    def redo(self) -> tuple[Change, ...]:
+        """Re-applies the next undone entry and returns its changes (empty if none)."""
+        if not self.can_redo:
+            return ()
+        entry = self._entries[self._position]
+        self._position += 1
+        for change in entry:
+            _set_attribute(change.element, change.attribute, change.new_value)
+            self._track(change.element, change.attribute, change.old_value, change.new_value)
+        return entry
+
+    def revert_to_saved(self) -> tuple[Change, ...]:
+        """
+        Sets every dirty attribute back to its value at the last save point, without
+        touching disk. The revert is recorded as one entry, so it can itself be undone.
+        """
+        changes = []
+        for (element, attribute), saved_value in list(self._saved_values.items()):
+            current_value = element.get(attribute)
+            _set_attribute(element, attribute, saved_value)
+            changes.append(Change(element, attribute, current_value, saved_value))
+        self.record_batch(changes)
+        return tuple(changes)
+
+    def mark_saved(self) -> None:
+        """Makes the current values the new save point, e.g. after writing the file."""
+        self._saved_values.clear()
+
+    def rebase_saved(self, saved_values: dict[tuple[ET.Element, str], str | None]) -> None:
+        """
+        Moves the save point of single attributes, e.g. when the file was rewritten on disk with
+        other values: each (element, attribute) is dirty again only if it differs from its new value.
+        """
+        for (element, attribute), saved_value in saved_values.items():
+            if element.get(attribute) == saved_value:
+                self._saved_values.pop((element, attribute), None)
+            else:
+                self._saved_values[(element, attribute)] = saved_value
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._saved_values)
+
+    def dirty_attributes(self) -> dict[tuple[ET.Element, str], str | None]:
+        """Maps each (element, attribute) that differs from the save point to its saved value."""
+        return dict(self._saved_values)
+
+    def dirty_elements(self) -> set[ET.Element]:
+        """The exact set of elements with at least one attribute that differs from the save point."""
+        return {element for element, _attribute in self._saved_values}
+
+    def _track(self, element: ET.Element, attribute: str, old_value: str | None, new_value: str | None) -> None:
+        key = (element, attribute)
+        saved_value = self._saved_values.setdefault(key, old_value)
+        if new_value == saved_value:
+            del self._saved_values[key]
@@ -1,85 +1,43 @@
+import functools
+import logging
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
-    QLabel, QPushButton, QMessageBox, QTreeWidget, QTreeWidgetItem, QFileDialog,
-    QSlider, QDoubleSpinBox, QStyledItemDelegate, QStyleOptionViewItem) # Added QSlider, QDoubleSpinBox, QStyledItemDelegate, QStyleOptionViewItem
-from PyQt6.QtCore import Qt, pyqtSignal # Import pyqtSignal
-from PyQt6.QtGui import QFont, QColor, QPixmap, QIcon
+    QLabel, QPushButton, QMessageBox, QProgressBar, QLineEdit, QTabWidget, QCheckBox, QFileDialog)
+from PyQt6.QtCore import Qt, QModelIndex, QTimer
+from PyQt6.QtGui import QKeySequence, QShortcut
 from .config_parser import ConfigParser
+from .instrumentation import span, tracer
+from .rebindings_variants import RebindingsVariants
+from .search_index import SearchIndex
+from .ui.document_view import DOC_REBINDINGS, DOC_USER_SETTINGS, DocumentView
+from .ui.file_watcher import ConfigFileWatcher
+from .ui.jobs import JobRunner
 from pathlib import Path # Ensure Path is imported
 import xml.etree.ElementTree as ET # For type hinting and working with XML elements
-import shutil # For restore from backup
+
+PRESET_FILE_FILTER = "Presets (*.json *.msgpack);;All files (*)"
+
+log = logging.getLogger(__name__)
+
+# How a file changed on disk was merged into its document, see MainWindow._merge_files_changed_on_disk()
+DISK_MERGED = "merged"
+DISK_CONFLICTS = "conflicts"
+DISK_STRUCTURAL = "structural"
+DISK_UNREADABLE = "unreadable"
 
 class MainWindow(QMainWindow):
-    class ColorEditorWidget(QWidget):
-        """Custom widget for editing RGBA color values with sliders."""
-        color_changed_signal = pyqtSignal(tuple) # (R, G, B, A) floats 0.0-1.0
-
-        def __init__(self, initial_rgba_floats=(0.0, 0.0, 0.0, 1.0), parent=None):
-            super().__init__(parent)
-            self.rgba_floats = initial_rgba_floats
-
-            layout = QHBoxLayout(self)
-            layout.setContentsMargins(2, 2, 2, 2) # Small margins
-            layout.setSpacing(3)
-
-            self.sliders = {}
-            self.value_labels = {} # To display current slider value
-
-            # R, G, B Sliders
-            for i, label_text in enumerate(["R", "G", "B"]):
-                slider = QSlider(Qt.Orientation.Horizontal)
-                slider.setMinimum(0)
-                slider.setMaximum(255)
-                slider.setValue(int(self.rgba_floats[i] * 255))
-                slider.setFixedWidth(60) # Make sliders a bit smaller
-                slider.valueChanged.connect(self._update_color_from_sliders)
-                self.sliders[label_text] = slider
-                
-                val_label = QLabel(str(slider.value()))
-                val_label.setFixedWidth(25)
-                self.value_labels[label_text] = val_label
-
-                layout.addWidget(QLabel(label_text + ":"))
-                layout.addWidget(slider)
-                layout.addWidget(val_label)
-
-            # Alpha SpinBox
-            layout.addWidget(QLabel("A:"))
-            self.alpha_spinbox = QDoubleSpinBox()
-            self.alpha_spinbox.setMinimum(0.0)
-            self.alpha_spinbox.setMaximum(1.0)
-            self.alpha_spinbox.setSingleStep(0.05)
-            self.alpha_spinbox.setDecimals(2)
-            self.alpha_spinbox.setValue(self.rgba_floats[3])
-            self.alpha_spinbox.setFixedWidth(50)
-            self.alpha_spinbox.valueChanged.connect(self._update_color_from_sliders)
-            layout.addWidget(self.alpha_spinbox)
-
-        def _update_color_from_sliders(self):
-            r = self.sliders["R"].value() / 255.0
-            g = self.sliders["G"].value() / 255.0
-            b = self.sliders["B"].value() / 255.0
-            a = self.alpha_spinbox.value()
-            self.rgba_floats = (r, g, b, a)
-            self.value_labels["R"].setText(str(self.sliders["R"].value()))
-            self.value_labels["G"].setText(str(self.sliders["G"].value()))
-            self.value_labels["B"].setText(str(self.sliders["B"].value()))
-            self.color_changed_signal.emit(self.rgba_floats)
-
-    def __init__(self):
+    def __init__(self, rescan_config_dir: bool = False):
+        """rescan_config_dir searches for the config folder again instead of using the cached result."""
         super().__init__()
         self.setWindowTitle("New World Config Manager - by Involvex")
         self.setGeometry(100, 100, 800, 600)  # Increased size for tree view
 
-        self.config_parser = ConfigParser()
-        self.current_rebindings_root: ET.Element | None = None # To store the loaded XML root
-        self.current_rebindings_filepath: str | None = None # To store the path of the loaded rebindings file
-        self.item_id_to_rebind_element: dict[int, ET.Element] = {} # Maps tree item id to its XML rebind element
-
-        self.current_usersettings_root: ET.Element | None = None
-        self.current_usersettings_filepath: str | None = None
-        self.item_id_to_usersetting_element: dict[int, ET.Element] = {} # Maps tree item id to its user setting <Class> element
+        # The config folder is looked for after the window is shown, see _start_discovery()
+        self.config_parser = ConfigParser(discover=False)
+        self._rescan_config_dir = rescan_config_dir
+        # Open files by kind (DOC_REBINDINGS, DOC_USER_SETTINGS); each keeps its XML, tree and history in a tab
+        self.documents: dict[str, DocumentView] = {}
         self.changes_made_in_current_config = False
         
         self.central_widget = QWidget()
@@ -93,6 +51,23 @@ class MainWindow(QMainWindow):
         self.status_label = QLabel("Welcome to New World Config Manager!") # For dynamic messages
         self.statusBar.addWidget(self.status_label, 1) # Stretch factor 1
 
+        # Progress of background jobs (load, save, backup, restore); hidden while idle
+        self.job_progress_bar = QProgressBar()
+        self.job_progress_bar.setMaximumWidth(200)
+        self.job_progress_bar.setVisible(False)
+        self.statusBar.addPermanentWidget(self.job_progress_bar)
+
+        self.cancel_job_button = QPushButton("Cancel")
+        self.cancel_job_button.setVisible(False)
+        self.statusBar.addPermanentWidget(self.cancel_job_button)
+
+        # Where time goes (parse, populate, save, ...); the panel is created when first shown
+        self.timing_panel = None
+        self.timings_button = QPushButton("Timings")
+        self.timings_button.setCheckable(True)
+        self.timings_button.toggled.connect(self._set_timing_panel_visible)
+        self.statusBar.addPermanentWidget(self.timings_button)
+
         self.created_by_label = QLabel("Created by Involvex")
         self.created_by_label.setAlignment(Qt.AlignmentFlag.AlignRight)
         self.statusBar.addPermanentWidget(self.created_by_label)
@@ -104,15 +79,18 @@ class MainWindow(QMainWindow):
         self.action_status_label.setFont(font)
         main_layout.addWidget(self.action_status_label)
 
-        # Horizontal layout for buttons
-        button_layout = QHBoxLayout()
+        # Horizontal layout for buttons, inside a container so they can be disabled together while a job runs
+        self.button_bar = QWidget()
+        button_layout = QHBoxLayout(self.button_bar)
+        button_layout.setContentsMargins(0, 0, 0, 0)
         button_layout.setSpacing(10) # Add spacing between buttons
         self.load_rebindings_button = QPushButton("Load Rebindings Config")
-        self.load_rebindings_button.clicked.connect(self.handle_load_rebindings)
+        # Lambdas so the clicked(checked) argument is not passed as prompt_for_backup
+        self.load_rebindings_button.clicked.connect(lambda: self.handle_load_rebindings())
         button_layout.addWidget(self.load_rebindings_button)
 
         self.load_user_settings_button = QPushButton("Load User Settings (javsave)")
-        self.load_user_settings_button.clicked.connect(self.handle_load_user_settings)
+        self.load_user_settings_button.clicked.connect(lambda: self.handle_load_user_settings())
         button_layout.addWidget(self.load_user_settings_button)
 
         self.backup_button = QPushButton("Backup Settings Now")
@@ -121,172 +99,219 @@ class MainWindow(QMainWindow):
 
         self.restore_backup_button = QPushButton("Restore from Backup")
         self.restore_backup_button.clicked.connect(self.handle_restore_from_backup)
-        self.restore_backup_button.setEnabled(self.config_parser.new_world_config_dir is not None)
+        self.restore_backup_button.setEnabled(False) # Until the config folder was found
         button_layout.addWidget(self.restore_backup_button)
 
+        self.import_preset_button = QPushButton("Import Preset...")
+        self.import_preset_button.setToolTip("Apply the settings and bindings of a preset file to the open files")
+        self.import_preset_button.clicked.connect(self.handle_import_preset)
+        button_layout.addWidget(self.import_preset_button)
+
+        self.export_preset_button = QPushButton("Export Preset...")
+        self.export_preset_button.setToolTip("Save the settings and bindings of the open files (only the search matches "
+                                             "while searching) as a preset file")
+        self.export_preset_button.clicked.connect(self.handle_export_preset)
+        button_layout.addWidget(self.export_preset_button)
+
         self.reset_changes_button = QPushButton("Reset Current Changes")
         self.reset_changes_button.clicked.connect(self.handle_reset_changes)
         self.reset_changes_button.setEnabled(False) # Initially disabled
         button_layout.addWidget(self.reset_changes_button)
 
+        self.undo_button = QPushButton("Undo")
+        self.undo_button.clicked.connect(self.handle_undo)
+        self.undo_button.setEnabled(False)
+        button_layout.addWidget(self.undo_button)
+
+        self.redo_button = QPushButton("Redo")
+        self.redo_button.clicked.connect(self.handle_redo)
+        self.redo_button.setEnabled(False)
+        button_layout.addWidget(self.redo_button)
+
         self.save_button = QPushButton("Save Current Config") # Changed button text
         self.save_button.clicked.connect(self.handle_save_current_config) # Changed handler
         self.save_button.setEnabled(False) # Disabled until a config is loaded
         button_layout.addWidget(self.save_button)
 
-        main_layout.addLayout(button_layout)
-
-
-        # Tree widget for displaying config
-        self.config_tree_widget = QTreeWidget()
-        self.config_tree_widget.setColumnCount(2)
-        self.config_tree_widget.setHeaderLabels(["Name", "Value"])
-        main_layout.addWidget(self.config_tree_widget)
-        self.config_tree_widget.itemChanged.connect(self.handle_item_changed)
-
-    def _populate_rebindings_tree(self, root_element: ET.Element):
-        """
-        Populates the QTreeWidget with rebindings data from the XML root element.
-        Columns: "Action/Setting", "Current Value", "Default Value"
-        """
-        self.config_tree_widget.blockSignals(True) # Block signals during population
-        self.config_tree_widget.clear()
-        self.config_tree_widget.setColumnCount(3)
-        self.config_tree_widget.setHeaderLabels(["Action/Setting", "Current Binding", "Default Binding"])
-        self.item_id_to_rebind_element.clear() # Clear previous mapping
+        self.save_all_button = QPushButton("Save All")
+        self.save_all_button.setToolTip("Save every open file with unsaved changes")
+        self.save_all_button.clicked.connect(self.handle_save_all)
+        self.save_all_button.setEnabled(False)
+        button_layout.addWidget(self.save_all_button)
+
+        main_layout.addWidget(self.button_bar)
+
+
+        # Search across setting names, values, actions and inputs
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search settings and bindings...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.handle_search_text_changed)
+        search_layout.addWidget(self.search_edit)
+
+        # Only shown when the config folder has more than one rebindings file
+        self.edit_all_rebindings_checkbox = QCheckBox("Edit all rebindings files")
+        self.edit_all_rebindings_checkbox.setToolTip("Also change a binding in the other rebindings files that have it")
+        self.edit_all_rebindings_checkbox.setVisible(False)
+        search_layout.addWidget(self.edit_all_rebindings_checkbox)
+        self.compare_rebindings_button = QPushButton("Compare Rebindings Files")
+        self.compare_rebindings_button.setToolTip("Show the bindings that differ between the rebindings files")
+        self.compare_rebindings_button.clicked.connect(self.handle_compare_rebindings_files)
+        self.compare_rebindings_button.setVisible(False)
+        search_layout.addWidget(self.compare_rebindings_button)
+        main_layout.addLayout(search_layout)
+
+        # One tab per open file. Hidden tabs keep their parsed XML, tree and undo history,
+        # so switching between rebindings and user settings reads nothing from disk.
+        self.document_tabs = QTabWidget()
+        self.document_tabs.setTabsClosable(True)
+        self.document_tabs.setDocumentMode(True)
+        self.document_tabs.currentChanged.connect(lambda _index: self._show_current_document())
+        self.document_tabs.tabCloseRequested.connect(self.handle_close_document)
+        main_layout.addWidget(self.document_tabs)
+
+        QShortcut(QKeySequence.StandardKey.Undo, self, activated=self.handle_undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self, activated=self.handle_redo)
+
+        # Background jobs: one at a time, the buttons and tree are disabled while one runs
+        self.job_runner = JobRunner(self)
+        self.job_runner.job_started.connect(self._on_job_started)
+        self.job_runner.job_progress.connect(self._on_job_progress)
+        self.job_runner.busy_changed.connect(self._on_job_busy_changed)
+        self.cancel_job_button.clicked.connect(self.job_runner.cancel)
+
+        # Open files rewritten by the game are merged into their tabs, see _on_files_changed_on_disk()
+        self.file_watcher = ConfigFileWatcher(self)
+        self.file_watcher.files_changed.connect(self._on_files_changed_on_disk)
+
+        QTimer.singleShot(0, self._start_discovery) # Runs once the event loop has started, after the first paint
+
+    def _start_discovery(self):
+        """Looks for the config folder on the worker thread so slow drives do not delay the window."""
+        self.job_runner.start("Looking for the New World config folder",
+                              lambda progress: self.config_parser.discover(self._rescan_config_dir),
+                              on_success=self._on_discovery_finished,
+                              on_failure=lambda error: self._on_discovery_finished(None))
+
+    def _on_discovery_finished(self, config_dir: Path | None):
+        self.restore_backup_button.setEnabled(config_dir is not None)
+        if config_dir is not None:
+            self.status_label.setText(f"Config folder: {config_dir}")
+        else:
+            self.status_label.setText("New World config folder not found. Set NEW_WORLD_CONFIG_DIR to choose one.")
 
-        if root_element is None:
+    def _set_timing_panel_visible(self, visible: bool):
+        if self.timing_panel is None:
+            if not visible:
+                return
+            from .ui.timing_panel import TimingPanel
+            self.timing_panel = TimingPanel(tracer, self)
+            self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.timing_panel)
+            self.timing_panel.visibilityChanged.connect(self.timings_button.setChecked)
+        self.timing_panel.setVisible(visible)
+
+    def _on_job_started(self, name: str, cancellable: bool):
+        self.status_label.setText(f"{name}...")
+        self.job_progress_bar.setRange(0, 0) # Busy indicator until the job reports a total
+        self.job_progress_bar.setVisible(True)
+        self.cancel_job_button.setEnabled(True)
+        self.cancel_job_button.setVisible(cancellable)
+
+    def _on_job_progress(self, done: int, total: int, message: str):
+        if total > 0:
+            self.job_progress_bar.setRange(0, total)
+            self.job_progress_bar.setValue(done)
+        if message and self.job_runner.current_job is not None:
+            self.status_label.setText(f"{self.job_runner.current_job.name}: {message}")
+
+    def _on_job_busy_changed(self, busy: bool):
+        self.button_bar.setEnabled(not busy)
+        self.document_tabs.setEnabled(not busy)
+        if not busy:
+            self.job_progress_bar.setVisible(False)
+            self.cancel_job_button.setVisible(False)
+
+    def closeEvent(self, event):
+        if self.job_runner.is_busy:
+            self.job_runner.cancel()
+            self.job_runner.wait_for_done()
+        super().closeEvent(event)
+
+    @property
+    def current_document(self) -> DocumentView | None:
+        return self.document_tabs.currentWidget()
+
+    def _open_document(self, kind: str, filepath: str, root: ET.Element | None, search_index: SearchIndex | None,
+                       variants: RebindingsVariants | None = None) -> DocumentView:
+        """Shows a parsed file in the tab for its kind, creating the tab the first time."""
+        document = self.documents.get(kind)
+        if document is None:
+            document = DocumentView(kind)
+            document.model.value_edited.connect(functools.partial(self.handle_item_changed, document))
+            document.model.value_rejected.connect(lambda _index, reason: self.status_label.setText(f"{reason}."))
+            self.documents[kind] = document
+            self.document_tabs.addTab(document, document.title)
+        document.show_document(filepath, root, search_index, variants)
+        self._update_watched_files()
+        if self.document_tabs.currentWidget() is document:
+            self._show_current_document()
+        else:
+            self.document_tabs.setCurrentWidget(document) # Shown by the currentChanged signal
+        return document
+
+    def _close_document(self, document: DocumentView):
+        del self.documents[document.kind]
+        self.document_tabs.removeTab(self.document_tabs.indexOf(document)) # Shows the next tab, if any
+        document.deleteLater()
+        self._update_watched_files()
+
+    def _update_watched_files(self):
+        self.file_watcher.set_files(path for document in self.documents.values() for path in document.watched_files())
+
+    def handle_close_document(self, tab_index: int):
+        document = self.document_tabs.widget(tab_index)
+        if document.journal.is_dirty:
+            reply = QMessageBox.question(self, "Unsaved Changes",
+                                         f"{document.filename} has unsaved changes. Close it and discard them?",
+                                         QMessageBox.StandardButton.Discard | QMessageBox.StandardButton.Cancel,
+                                         QMessageBox.StandardButton.Cancel)
+            if reply != QMessageBox.StandardButton.Discard:
+                return
+        self._close_document(document)
+
+    def _show_current_document(self):
+        """Updates the labels, buttons and search for the document in the current tab."""
+        document = self.current_document
+        if document is None:
+            self.action_status_label.setText("Load a configuration file to begin.")
+        elif document.root is None:
+            self.action_status_label.setText(f"Error parsing {document.filename}.")
+        else:
+            other_files = f" (+{document.other_files} other rebindings file(s))" if document.other_files else ""
+            self.action_status_label.setText(f"{document.title} loaded: {document.filename}{other_files}")
+        has_other_files = document is not None and document.other_files > 0
+        self.edit_all_rebindings_checkbox.setVisible(has_other_files)
+        self.compare_rebindings_button.setVisible(has_other_files)
+        self._update_edit_state()
+        self.handle_search_text_changed(self.search_edit.text()) # Instant unless the text changed since it was last shown
+
+    def handle_search_text_changed(self, text: str):
+        """Filters the current tree to rows matching every search term, keeping their parents visible."""
+        document = self.current_document
+        if document is None:
             return
-
-        for actionmap_element in root_element.findall('actionmap'):
-            actionmap_name = actionmap_element.get('name', 'Unknown ActionMap')
-            actionmap_item = QTreeWidgetItem(self.config_tree_widget)
-            actionmap_item.setText(0, actionmap_name)
-            
-            font = actionmap_item.font(0)
-            font.setBold(True)
-            actionmap_item.setFont(0, font)
-            actionmap_item.setExpanded(True) # Expand action maps by default
-
-            for action_element in actionmap_element.findall('action'):
-                action_name = action_element.get('name', 'Unknown Action')
-                
-                # Handle multiple rebinds per action if they exist
-                rebinds = action_element.findall('rebind')
-                if not rebinds: # Action might not have a rebind, or structure is different
-                    action_row_item = QTreeWidgetItem(actionmap_item)
-                    action_row_item.setText(0, f"  {action_name}") # Indent action name
-                    action_row_item.setText(1, "N/A")
-                    action_row_item.setText(2, "N/A")
-                else:
-                    for rebind_element in rebinds:
-                        device = rebind_element.get('device', '')
-                        input_val = rebind_element.get('input', '')
-                        default_input_val = rebind_element.get('defaultInput', '')
-
-                        action_row_item = QTreeWidgetItem(actionmap_item)
-                        action_row_item.setText(0, f"  {action_name} ({device})")
-                        action_row_item.setText(1, input_val)
-                        # Make the "Current Binding" column (index 1) editable
-                        action_row_item.setFlags(action_row_item.flags() | Qt.ItemFlag.ItemIsEditable)
-                        action_row_item.setText(2, default_input_val)
-                        self.item_id_to_rebind_element[id(action_row_item)] = rebind_element # Store mapping using item's id
-        
-        for i in range(self.config_tree_widget.columnCount()):
-            self.config_tree_widget.resizeColumnToContents(i)
-        self.config_tree_widget.blockSignals(False) # Unblock signals
-
-    def _populate_generic_xml_tree(self, parent_item_or_tree, element: ET.Element):
-        """
-        Recursively adds generic XML elements and their attributes to the QTreeWidget.
-        Columns: "Name", "Value"
-        """
-        # If the element is a "Class" with a "field" attribute, we treat it as a setting
-        if element.tag == "Class" and "field" in element.attrib:
-            field_name = element.get("field")
-            value = element.get("value", "") # Default to empty string if no value attribute
-
-            # Create a tree item for this setting
-            setting_item = QTreeWidgetItem(parent_item_or_tree)
-            setting_item.setText(0, field_name) # Show field name in the first column
-
-            is_generic_color_candidate = "color" in field_name.lower()
-            is_specific_reticle_color = field_name.lower() in ("m_reticletargetcolor", "m_reticlecolor")
-
-            use_color_editor_widget = False
-            parsed_rgba_floats = None
-
-            # Try to parse value as RGBA if it looks like it could be one
-            if " " in value: # A basic check for space-separated values
-                try:
-                    parts = [float(x) for x in value.split()]
-                    if len(parts) == 4:
-                        parsed_rgba_floats = tuple(parts)
-                except ValueError:
-                    parsed_rgba_floats = None # Parsing failed
-
-            if is_specific_reticle_color:
-                use_color_editor_widget = True
-                # Default to green if specific reticle color and value is bad/missing
-                if parsed_rgba_floats is None:
-                    parsed_rgba_floats = (0.0, 1.0, 0.0, 1.0) 
-                    # Update the XML element in memory immediately if we're applying a default
-                    element.set('value', " ".join(map(str, parsed_rgba_floats)))
-                    print(f"Applied default color {parsed_rgba_floats} to '{field_name}' due to missing/invalid value: '{value}'.")
-            elif is_generic_color_candidate and parsed_rgba_floats is not None:
-                # For other "color" fields, only use editor if value was successfully parsed as RGBA
-                use_color_editor_widget = True
-
-            if use_color_editor_widget:
-                # Ensure parsed_rgba_floats is not None here; if specific_reticle_color, it's defaulted.
-                # If generic, it must have been valid. Fallback just in case.
-                editor_initial_rgba = parsed_rgba_floats if parsed_rgba_floats else (0.0,0.0,0.0,1.0)
-
-                pixmap_preview = QPixmap(16, 16)
-                q_color = QColor(int(editor_initial_rgba[0]*255), int(editor_initial_rgba[1]*255), int(editor_initial_rgba[2]*255), int(editor_initial_rgba[3]*255))
-                pixmap_preview.fill(q_color)
-                setting_item.setIcon(0, QIcon(pixmap_preview))
-                
-                editor_widget = MainWindow.ColorEditorWidget(initial_rgba_floats=editor_initial_rgba)
-                self.config_tree_widget.setItemWidget(setting_item, 1, editor_widget)
-                editor_widget.color_changed_signal.connect(
-                    lambda new_rgba, item=setting_item: self.handle_color_editor_changed(item, new_rgba)
-                )
-            else: # Not using color editor
-                setting_item.setText(1, value) # Show value in the second column
-                setting_item.setFlags(setting_item.flags() | Qt.ItemFlag.ItemIsEditable)
-            
-            self.item_id_to_usersetting_element[id(setting_item)] = element # Map item to its <Class> element
-            
-            # We've processed this "Class as a setting", so we don't recurse into its attributes or children in the same way
-            # If there are nested settings within this Class element (unlikely based on example), they'll be handled by recursive calls.
-
-            # For "Class with field", children are processed as if they are direct children of the original parent_item_or_tree
-            # to flatten the list of settings.
-            for child_element in element:
-                self._populate_generic_xml_tree(parent_item_or_tree, child_element)
-            return # Important: stop further processing for this element
-
-        # Handle elements that are NOT "Class with field" (e.g., ObjectStream, or Class without field if we want to show them)
-        # We only create a tree item if it's not a 'Class' tag at all, or if it's a 'Class' tag
-        # that we explicitly want to treat as a container (which current logic tries to avoid for display).
-        # To strictly show only field/values, we might only want to process children of the root.
-        # For now, let's create an item for non-Class tags or the root.
-        item = None
-        if element.tag != "Class" or parent_item_or_tree == self.config_tree_widget : # Show root or non-Class tags
-            item = QTreeWidgetItem(parent_item_or_tree)
-            item.setText(0, element.tag)
-            if element.text and element.text.strip():
-                item.setText(1, element.text.strip())
-
-        # Recurse for children. If 'item' was created, children go under it.
-        # Otherwise (e.g. for a 'Class' tag we skipped creating an item for), children are processed
-        # as if they are direct children of parent_item_or_tree.
-        for child_element in element:
-            self._populate_generic_xml_tree(item if item is not None else parent_item_or_tree, child_element)
-
+        was_filtering = document.search_proxy.is_filtering
+        matches = document.apply_search(text)
+        if matches is not None:
+            self.status_label.setText(f"{matches} match(es) for '{text.strip()}'.")
+        elif was_filtering:
+            self.status_label.setText("Search cleared.")
 
     def handle_load_rebindings(self, prompt_for_backup=True):
+        if DOC_REBINDINGS in self.documents: # Already parsed: show its tab, without reading the file again
+            self.document_tabs.setCurrentWidget(self.documents[DOC_REBINDINGS])
+            return
         if not self.config_parser.new_world_config_dir:
             QMessageBox.warning(self, "Config Directory Error", "New World config directory not found. Cannot load rebindings.")
             return
@@ -299,55 +324,47 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.StandardButton.Cancel:
                 return
             if reply == QMessageBox.StandardButton.Yes:
-                self.perform_backup()
+                self.perform_backup(then=self._start_load_rebindings)
+                return
 
-        # Clear any user settings specific data if we are loading rebindings
-        self.current_usersettings_root = None
-        self.current_usersettings_filepath = None
-        self.item_id_to_usersetting_element.clear()
+        self._start_load_rebindings()
 
-        self.config_tree_widget.clear() # Clear previous content
-        
-        temp_rebindings_filepath = self.config_parser._find_latest_rebindings_file()
-        if not temp_rebindings_filepath:
+    def _start_load_rebindings(self):
+        """
+        Parses every rebindings file on the worker thread (see rebindings_variants.py);
+        the newest one is shown and edited.
+        """
+        def load_rebindings(progress):
+            filepath = self.config_parser._find_latest_rebindings_file()
+            variants = self.config_parser.load_rebindings_variants(progress) if filepath else None
+            root = variants.root_of(filepath) if variants is not None else None
+            if root is None:
+                return filepath, None, None, None
+            with span("build search index", kind="rebindings"):
+                return filepath, root, SearchIndex.for_rebindings(root), variants
+
+        self.job_runner.start("Loading rebindings", load_rebindings,
+                              on_success=self._on_rebindings_loaded,
+                              on_failure=lambda error: self._on_rebindings_loaded((None, None, None, None)))
+
+    def _on_rebindings_loaded(self, result: tuple[str | None, ET.Element | None, SearchIndex | None,
+                                                  RebindingsVariants | None]):
+        filepath, root, search_index, variants = result
+        if not filepath:
             self.status_label.setText("Failed to find rebindings XML file.")
-            self.action_status_label.setText("Could not load rebindings.")
-            self.config_tree_widget.clear()
-            self.config_tree_widget.setColumnCount(2)
-            self.config_tree_widget.setHeaderLabels(["Name", "Value"])
             QMessageBox.information(self, "Load Rebindings", "Could not find rebindings file. Check console for details.")
-            self.save_button.setEnabled(False)
-            self.changes_made_in_current_config = False
-            self.reset_changes_button.setEnabled(False)
-            self.current_rebindings_root = None
-            self.current_rebindings_filepath = None
-            return
-        
-        rebindings_data_root = self.config_parser.load_xml_config(temp_rebindings_filepath)
-
-        if rebindings_data_root is not None:
-            self.current_rebindings_filepath = temp_rebindings_filepath
-            self.current_rebindings_root = rebindings_data_root
-            self.action_status_label.setText(f"Rebindings loaded: {Path(self.current_rebindings_filepath).name}")
-            self.status_label.setText("Rebindings XML loaded successfully!")
-            self._populate_rebindings_tree(rebindings_data_root)
-            self.save_button.setEnabled(True) # Enable save button
-            self.changes_made_in_current_config = False
-            self.reset_changes_button.setEnabled(False)
+        elif root is None:
+            self.status_label.setText(f"Failed to load rebindings XML from {Path(filepath).name}.")
+            QMessageBox.information(self, "Load Rebindings", f"Could not load rebindings from {Path(filepath).name}. Check console.")
         else:
-            self.status_label.setText(f"Failed to load rebindings XML from {Path(temp_rebindings_filepath).name}.")
-            self.action_status_label.setText("Failed to load rebindings.")
-            self.config_tree_widget.clear() # Clear tree on failure
-            self.config_tree_widget.setColumnCount(2) # Reset to default if needed
-            self.config_tree_widget.setHeaderLabels(["Name", "Value"])
-            QMessageBox.information(self, "Load Rebindings", f"Could not load rebindings from {Path(temp_rebindings_filepath).name}. Check console.")
-            self.save_button.setEnabled(False) # Disable save button
-            self.changes_made_in_current_config = False
-            self.reset_changes_button.setEnabled(False)
-            self.current_rebindings_root = None
-            self.current_rebindings_filepath = None
+            differences = f" {len(variants.differences())} binding(s) differ between the files." if len(variants) > 1 else ""
+            self.status_label.setText(f"Rebindings XML loaded successfully!{differences}")
+            self._open_document(DOC_REBINDINGS, filepath, root, search_index, variants)
 
     def handle_load_user_settings(self, prompt_for_backup=True):
+        if DOC_USER_SETTINGS in self.documents:
+            self.document_tabs.setCurrentWidget(self.documents[DOC_USER_SETTINGS])
+            return
         if not self.config_parser.new_world_config_dir:
             QMessageBox.warning(self, "Config Directory Error", "New World config directory not found. Cannot load user settings.")
             return
@@ -360,72 +377,62 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.StandardButton.Cancel:
                 return
             if reply == QMessageBox.StandardButton.Yes:
-                self.perform_backup()
-
-        # Clear any rebindings specific data
-        self.current_rebindings_root = None
-        self.current_rebindings_filepath = None
-        self.item_id_to_rebind_element.clear()
+                self.perform_backup(then=self._start_load_user_settings)
+                return
 
-        self.config_tree_widget.clear() # Clear tree if showing other data
-        self.item_id_to_usersetting_element.clear() # Clear previous mapping
-        self.config_tree_widget.setColumnCount(2) # Reset to default columns
-        self.config_tree_widget.setHeaderLabels(["Name", "Value"]) # Generic headers for XML
+        self._start_load_user_settings()
 
-        self.config_tree_widget.blockSignals(True)
-        try:
+    def _start_load_user_settings(self):
+        """Reads and parses usersettings.javsave on the worker thread."""
+        def load_user_settings(progress):
             result = self.config_parser.load_user_settings_config()
-            if result:
-                javsave_path, root_element = result
-                self.current_usersettings_filepath = javsave_path # Store path even if root is None
-                if root_element is not None:
-                    self.action_status_label.setText(f"User Settings loaded: {Path(javsave_path).name}")
-                    self.status_label.setText(f"Successfully parsed {Path(javsave_path).name} as XML.")
-                    self.current_usersettings_root = root_element
-                    self._populate_generic_xml_tree(self.config_tree_widget, root_element)
-                    self.config_tree_widget.setColumnWidth(0, 250) # Name column
-                    self.config_tree_widget.setColumnWidth(1, 350) # Value column (for sliders)
-                    self.config_tree_widget.expandToDepth(1)
-                    self.save_button.setEnabled(True) # Enable save for user settings
-                    self.changes_made_in_current_config = False
-                    self.reset_changes_button.setEnabled(False)
-                else:
-                    self.status_label.setText(f"Found {Path(javsave_path).name}, but failed to parse as XML. See console.")
-                    self.action_status_label.setText(f"Error parsing {Path(javsave_path).name}.")
-                    # Optionally display the path or an error message in the tree
-                    error_item = QTreeWidgetItem(self.config_tree_widget)
-                    error_item.setText(0, "Error")
-                    error_item.setText(1, f"Could not parse {Path(javsave_path).name} as XML.")
-                    self.save_button.setEnabled(False)
-                    self.changes_made_in_current_config = False
-                    self.reset_changes_button.setEnabled(False)
-                    self.current_usersettings_root = None
-                    # self.current_usersettings_filepath is already set
-            else:
-                self.status_label.setText("usersettings.javsave not found or could not be processed.")
-                self.action_status_label.setText("Could not load user settings.")
-                QMessageBox.information(self, "Load User Settings", "Could not find usersettings.javsave. Check console for details.")
-                self.save_button.setEnabled(False)
-                self.changes_made_in_current_config = False
-                self.reset_changes_button.setEnabled(False)
-                self.current_usersettings_root = None
-                self.current_usersettings_filepath = None
-        finally:
-            self.config_tree_widget.blockSignals(False)
-
-    
-    def perform_backup(self):
+            root = result[1] if result else None
+            if root is None:
+                return result, None
+            with span("build search index", kind="user settings"):
+                return result, SearchIndex.for_user_settings(root)
+
+        self.job_runner.start("Loading user settings", load_user_settings,
+                              on_success=lambda payload: self._on_user_settings_loaded(*payload),
+                              on_failure=lambda error: self._on_user_settings_loaded(None))
+
+    def _on_user_settings_loaded(self, result: tuple[str, ET.Element | None] | None, search_index: SearchIndex | None = None):
+        if not result:
+            self.status_label.setText("usersettings.javsave not found or could not be processed.")
+            QMessageBox.information(self, "Load User Settings", "Could not find usersettings.javsave. Check console for details.")
+            return
+        javsave_path, root_element = result
+        if root_element is not None:
+            self.status_label.setText(f"Successfully parsed {Path(javsave_path).name} as XML.")
+        else:
+            self.status_label.setText(f"Found {Path(javsave_path).name}, but failed to parse as XML. See console.")
+        # A file that could not be parsed gets a tab with an error row, so Reset can try loading it again
+        self._open_document(DOC_USER_SETTINGS, javsave_path, root_element, search_index)
+
+    def perform_backup(self, then=None):
+        """
+        Backs up the config folder on the worker thread.
+        then, if given, is called after the backup finished (successfully or not) but not when it was cancelled.
+        """
         if not self.config_parser.new_world_config_dir:
             QMessageBox.critical(self, "Backup Error", "New World config directory not found. Cannot perform backup.")
             return False
-        
-        backup_path = self.config_parser.backup_config_folder()
-        if backup_path:
-            QMessageBox.information(self, "Backup Successful", f"Settings successfully backed up to:\n{backup_path}")
-            return True
-        else:
-            QMessageBox.warning(self, "Backup Failed", "Failed to back up settings. Check console for details.")
-            return False
+
+        def on_backup_finished(backup_path):
+            if backup_path:
+                QMessageBox.information(self, "Backup Successful", f"Settings successfully backed up to:\n{backup_path}")
+                self.status_label.setText("Backup completed.")
+            else:
+                QMessageBox.warning(self, "Backup Failed", "Failed to back up settings. Check console for details.")
+                self.status_label.setText("Backup failed.")
+            if then is not None:
+                then()
+
+        return self.job_runner.start("Backing up settings", self.config_parser.backup_config_folder,
+                                     on_success=on_backup_finished,
+                                     on_failure=lambda error: on_backup_finished(None),
+                                     on_cancel=lambda: self.status_label.setText("Backup cancelled."),
+                                     cancellable=True)
 
     def handle_backup_settings(self):
         self.perform_backup()
@@ -434,24 +441,35 @@ class MainWindow(QMainWindow):
         if not self.config_parser.new_world_config_dir:
             QMessageBox.critical(self, "Restore Error", "New World config directory not found. Cannot perform restore.")
             return
+        # Backups made since the last visit are indexed on the worker thread, then the browser lists the catalog
+        self.job_runner.start("Indexing backups", self.config_parser.catalog_backups,
+                              on_success=self._show_backup_browser,
+                              on_failure=lambda error: QMessageBox.warning(self, "Backups Unavailable",
+                                                                           f"Could not list the backups: {error}"),
+                              cancellable=True)
+
+    def _show_backup_browser(self, entries):
+        from .catalog import KIND_FOLDER
+        from .ui.backup_browser import BackupBrowserDialog
+        dialog = BackupBrowserDialog(self.config_parser, entries, self)
+        if not dialog.exec():
+            return
+        entry = dialog.selected_entry
+        if entry is None:
+            selected_backup_description = str(dialog.selected_folder)
+            restore_kwargs = {"backup_dir": dialog.selected_folder}
+        elif entry.kind == KIND_FOLDER:
+            selected_backup_description = entry.location
+            restore_kwargs = {"backup_dir": Path(entry.location)}
+        else:
+            selected_backup_description = f"backup {entry.id}" + (f" ({entry.label})" if entry.label else "")
+            restore_kwargs = {"snapshot_id": entry.id}
 
-        backup_parent_dir = self.config_parser.new_world_config_dir.parent
-        selected_backup_path_str = QFileDialog.getExistingDirectory(
-            self,
-            "Select Backup Folder to Restore",
-            str(backup_parent_dir) 
-        )
-
-        if not selected_backup_path_str:
-            return 
-
-        selected_backup_path = Path(selected_backup_path_str)
-        
         reply = QMessageBox.warning(self, "Confirm Restore",
-                                     f"This will ERASE your current New World settings in:\n"
+                                     f"This will OVERWRITE your current New World settings in:\n"
                                      f"{self.config_parser.new_world_config_dir}\n"
-                                     f"and replace them with the contents of:\n"
-                                     f"{selected_backup_path}\n\n"
+                                     f"with the contents of:\n"
+                                     f"{selected_backup_description}\n\n"
                                      f"This operation cannot be undone easily. Are you absolutely sure?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.Cancel,
                                      QMessageBox.StandardButton.Cancel) 
@@ -460,150 +478,382 @@ class MainWindow(QMainWindow):
             return
 
         target_dir = self.config_parser.new_world_config_dir
-        try:
-            if not target_dir.is_dir():
-                target_dir.mkdir(parents=True, exist_ok=True)
-            
-            print(f"Attempting to remove directory: {target_dir}")
-            shutil.rmtree(target_dir)
-            print(f"Successfully removed directory: {target_dir}")
-            
-            print(f"Attempting to copy from {selected_backup_path} to {target_dir}")
-            shutil.copytree(selected_backup_path, target_dir)
-            print(f"Successfully copied backup to: {target_dir}")
+        log.info(f"Attempting to restore from {selected_backup_description} to {target_dir}")
+
+        def on_restore_finished(restore_result):
+            if restore_result is None:
+                on_restore_failed("Restore did not complete. Your current settings were left unchanged.")
+                return
 
             QMessageBox.information(self, "Restore Successful",
-                                    f"Successfully restored settings from:\n{selected_backup_path}\n"
-                                    f"to:\n{target_dir}\n\n"
-                                    "Your active configuration in this tool has been cleared. "
+                                    f"Successfully restored settings from:\n{selected_backup_description}\n"
+                                    f"to:\n{target_dir}\n"
+                                    f"({len(restore_result.copied)} files restored, {len(restore_result.deleted)} removed, "
+                                    f"{len(restore_result.unchanged)} already up to date)\n\n"
+                                    "The files open in this tool have been closed. "
                                     "Please load a configuration file to see the restored settings.")
 
-            self.config_tree_widget.clear()
-            self.current_rebindings_root = None; self.current_rebindings_filepath = None
-            self.item_id_to_rebind_element.clear()
-            self.current_usersettings_root = None; self.current_usersettings_filepath = None
-            self.item_id_to_usersetting_element.clear()
-            
-            self.save_button.setEnabled(False)
-            self.changes_made_in_current_config = False
-            self.reset_changes_button.setEnabled(False)
+            for document in list(self.documents.values()):
+                self._close_document(document)
             self.action_status_label.setText("Backup restored. Load a config file to view.")
             self.status_label.setText("Settings restored successfully from backup.")
 
-        except Exception as e:
-            QMessageBox.critical(self, "Restore Failed", f"An error occurred during restore: {e}\nCheck the New World config directory manually.")
-            self.status_label.setText("Restore failed. Check console. Config directory may be affected.")
-            print(f"Error during restore: {e}")
+        def on_restore_failed(error: str):
+            QMessageBox.critical(self, "Restore Failed", f"An error occurred during restore: {error}")
+            self.status_label.setText("Restore failed. Check console. Your current settings were left unchanged.")
+            log.error(f"Error during restore: {error}")
+
+        self.job_runner.start("Restoring backup", self.config_parser.restore_backup,
+                              on_success=on_restore_finished,
+                              on_failure=on_restore_failed,
+                              on_cancel=lambda: self.status_label.setText("Restore cancelled. Your current settings were left unchanged."),
+                              cancellable=True, **restore_kwargs)
 
-    def handle_item_changed(self, item: QTreeWidgetItem, column: int):
+    def handle_item_changed(self, document: DocumentView, index: QModelIndex, attribute: str, old_value: str, new_value: str):
         """
-        Called when a QTreeWidget item is changed by the user.
-        Updates the in-memory XML data.
+        Called after the user changed a value in a document's tree view.
+        The model has already updated the in-memory XML data.
         """
-        item_id = id(item)
-        if column == 1 and not self.config_tree_widget.itemWidget(item, 1): # Only if no custom widget
-            if item_id in self.item_id_to_rebind_element:
-                rebind_element = self.item_id_to_rebind_element[item_id]
-                new_value = item.text(1)
-                rebind_element.set('input', new_value)
-                action_description = item.text(0).strip()
-                print(f"Updated rebind action '{action_description}' to '{new_value}' in memory.")
-                self.changes_made_in_current_config = True
-                self.reset_changes_button.setEnabled(True)
-                self.status_label.setText("Changes made. Click 'Save Current Config' or 'Reset Current Changes'.")
-            elif item_id in self.item_id_to_usersetting_element:
-                usersetting_element = self.item_id_to_usersetting_element[item_id]
-                new_value_text = item.text(1)
-
-                # If it was a color, we need to parse the R: G: B: A: text back to "R G B A" string
-                # or handle direct numeric input. For simplicity, let's assume direct input for now
-                # or that the user edits the "Raw: R G B A" part if they want to change color text.
-                # A more robust solution would involve custom delegates or parsing the "R: G: B: A:" format.
-                
-                # For now, let's assume the user edits the raw numeric string if it's a color.
-                # If the text starts with " R:", it means it's our formatted color string.
-                # We'd ideally parse this back or provide a better editing widget.
-                # This part needs to be more robust for color editing.
-                # For now, we'll just take the text as is.
-                # A simple approach: if it was a color, the user might have edited the raw part.
-                # Or, they might have typed new numbers.
-
-                usersetting_element.set('value', new_value_text.strip()) # Update the 'value' attribute
-                field_name = usersetting_element.get('field')
-                print(f"Updated user setting '{field_name}' to '{new_value_text.strip()}' in memory.")
-                self.changes_made_in_current_config = True
-                self.reset_changes_button.setEnabled(True)
-                self.status_label.setText("Changes made. Click 'Save Current Config' or 'Reset Current Changes'.")
-
-    def handle_color_editor_changed(self, item: QTreeWidgetItem, new_rgba_floats: tuple):
-        """Handles changes from the ColorEditorWidget."""
-        item_id = id(item)
-        if item_id in self.item_id_to_usersetting_element:
-            usersetting_element = self.item_id_to_usersetting_element[item_id]
-            # Format the float tuple back to a space-separated string for XML
-            new_value_str = " ".join(map(str, new_rgba_floats))
-            usersetting_element.set('value', new_value_str)
-            
-            field_name = usersetting_element.get('field')
-            print(f"Updated user setting (color) '{field_name}' to '{new_value_str}' in memory via sliders.")
-            self.changes_made_in_current_config = True
-            self.reset_changes_button.setEnabled(True)
-            self.status_label.setText("Color changes made. Click 'Save Current Config' or 'Reset Current Changes'.")
-            # Update the icon preview
-            pixmap_preview = QPixmap(16,16)
-            color = QColor(int(new_rgba_floats[0]*255), int(new_rgba_floats[1]*255), int(new_rgba_floats[2]*255), int(new_rgba_floats[3]*255))
-            pixmap_preview.fill(color)
-            item.setIcon(0, QIcon(pixmap_preview))
+        if log.isEnabledFor(logging.DEBUG): # Runs for every edit, so only build the message when it is shown
+            row_description = document.model.data(index.siblingAtColumn(0)).strip()
+            log.debug("Updated %s '%s' to '%s' in memory.",
+                      "rebind action" if attribute == 'input' else "user setting", row_description, new_value)
+        element = document.record_edit(index, attribute, old_value, new_value,
+                                       all_files=self.edit_all_rebindings_checkbox.isChecked())
+        self._update_edit_state()
+        conflict = document.model.conflict_description(element) if attribute == 'input' else ""
+        if conflict:
+            log.info(f"Binding conflict: {conflict}")
+            self.status_label.setText(f"Changes made. Warning: {conflict}.")
+        else:
+            self.status_label.setText("Changes made. Click 'Save Current Config' or 'Reset Current Changes'.")
+
+    def _on_files_changed_on_disk(self, paths: list[str]):
+        """Reads the open files that another program (usually the game) rewrote again, on the worker thread."""
+        if self.job_runner.is_busy: # E.g. our own save; looked at again once the job is done
+            self.file_watcher.retry(paths)
+            return
+        changed = [(document, path) for document in self.documents.values() for path in document.watched_files()
+                   if path in paths and self.config_parser.file_changed_on_disk(path)]
+        if changed:
+            self._reload_changed_files(changed)
+
+    def _reload_changed_files(self, changed: list[tuple[DocumentView, str]], on_merged=None):
+        """
+        Reads changed files again on the worker thread and merges them into their documents.
+        on_merged, if given, is then called with the merge outcome, see _merge_files_changed_on_disk().
+        """
+        def reload_files(progress):
+            results = []
+            for done, (document, path) in enumerate(changed):
+                progress.report(done, len(changed), Path(path).name)
+                try:
+                    results.append((document, path, self.config_parser.reload_changed_file(path)))
+                except (ET.ParseError, OSError) as e: # E.g. caught mid-write; the rest of the write is noticed again
+                    log.warning(f"Could not read {path} after it changed on disk: {e}")
+                    results.append((document, path, None))
+            return results
+
+        def on_success(results):
+            outcome = self._merge_files_changed_on_disk(results)
+            if on_merged is not None:
+                on_merged(outcome)
+
+        def on_failure(error):
+            self.status_label.setText(f"Could not read files changed on disk: {error}")
+            if on_merged is not None:
+                on_merged({path: DISK_UNREADABLE for _document, path in changed})
+
+        self.job_runner.start("Reading files changed on disk", reload_files, on_success=on_success, on_failure=on_failure)
+
+    def _merge_files_changed_on_disk(self, results: list[tuple[DocumentView, str, ET.Element | None]]) -> dict[str, str]:
+        """
+        Takes the values changed on disk over into the open documents (see external_changes.py).
+        Values the user edited as well are kept and marked as conflicts. A file whose structure
+        changed is shown again from disk, unless its document has unsaved changes.
+        Returns path -> DISK_MERGED, DISK_CONFLICTS, DISK_STRUCTURAL or DISK_UNREADABLE.
+        """
+        from .external_changes import merge_external_changes
+        messages, conflicts, outcome = [], [], {}
+        for document, path, disk_root in results:
+            name = Path(path).name
+            if disk_root is None:
+                messages.append(f"{name} changed on disk but could not be read.")
+                outcome[path] = DISK_UNREADABLE
+                continue
+            live_root = document.root_of(path)
+            with span("merge external changes", file=name) as info:
+                changes = merge_external_changes(live_root, disk_root, document.journal.dirty_attributes())
+                info["changed"] = len(changes.applied)
+            if changes.structural:
+                outcome[path] = DISK_STRUCTURAL
+                if document.is_dirty:
+                    messages.append(f"{name} was rewritten with other settings or bindings. "
+                                    "Saving will overwrite it with the values shown here.")
+                    log.warning(f"{path} changed structurally on disk while {document.title.lower()} has unsaved changes.")
+                else:
+                    self._show_rewritten_file(document, path, disk_root)
+                    messages.append(f"{name} was rewritten on disk and has been loaded again.")
+                continue
+            outcome[path] = DISK_CONFLICTS if changes.conflicts else DISK_MERGED
+            self.config_parser.adopt_reloaded(path, live_root)
+            document.apply_external_changes(changes)
+            conflicts += [f"{document.describe_element(conflict.element)}: {conflict.describe()}" for conflict in changes.conflicts]
+            log.info(f"{path} changed on disk: {len(changes.applied)} value(s) updated, {len(changes.conflicts)} conflict(s).")
+            messages.append(f"{name} changed on disk: {len(changes.applied)} value(s) updated"
+                            + (f", {len(changes.conflicts)} conflict(s) with your unsaved changes." if changes.conflicts else "."))
+        self._update_edit_state()
+        if messages:
+            self.status_label.setText(" ".join(messages))
+        if conflicts:
+            shown = "\n".join(conflicts[:10]) + (f"\n... and {len(conflicts) - 10} more" if len(conflicts) > 10 else "")
+            QMessageBox.warning(self, "Changed on Disk",
+                                f"These values were changed on disk while you had unsaved changes to them:\n\n{shown}\n\n"
+                                "Your values are kept and highlighted. Save writes them over the ones on disk; "
+                                "Reset Current Changes takes the values on disk.")
+        return outcome
+
+    def _show_rewritten_file(self, document: DocumentView, path: str, disk_root: ET.Element):
+        """Shows a file that was rewritten with a different structure in place of the old tree."""
+        if document.kind == DOC_USER_SETTINGS:
+            document.show_document(path, disk_root, SearchIndex.for_user_settings(disk_root))
+        else: # The rewritten file may now be the newest one, which is the one shown
+            variants = document.variants.replaced(path, disk_root)
+            root = variants.primary.root
+            document.show_document(variants.primary.path, root, SearchIndex.for_rebindings(root), variants)
+        self._update_watched_files()
+        if document is self.current_document:
+            self._show_current_document()
+
+    def handle_compare_rebindings_files(self):
+        document = self.current_document
+        if document is None or not document.other_files:
+            return
+        from .ui.diff_view import DiffDialog
+        DiffDialog(document.variants.file_diffs(), document.filename, "Other rebindings files", self).exec()
+
+    def handle_import_preset(self):
+        """
+        Applies a preset file to the open files: each file's values change as one undo step,
+        and nothing is written until the files are saved.
+        """
+        # User settings first: only invalid setting values can fail, and then nothing has changed yet
+        documents = sorted((document for document in self.documents.values() if document.root is not None),
+                           key=lambda document: document.kind != DOC_USER_SETTINGS)
+        if not documents:
+            QMessageBox.information(self, "Import Preset", "Load the rebindings or user settings first; a preset is applied to the open files.")
+            return
+        path, _selected_filter = QFileDialog.getOpenFileName(self, "Import Preset", "", PRESET_FILE_FILTER)
+        if not path:
+            return
+        from .presets import format_binding_key, load_preset
+        try:
+            preset = load_preset(path)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Import Preset", f"Could not read {Path(path).name}:\n{e}")
+            return
+
+        changed, missing, total_changes = [], [], 0
+        with span("apply preset", file=Path(path).name) as info:
+            for document in documents:
+                try:
+                    changes, document_missing = document.apply_preset(preset, all_files=self.edit_all_rebindings_checkbox.isChecked())
+                except ValueError as e:
+                    QMessageBox.warning(self, "Import Preset", f"The preset was not applied:\n{e}")
+                    return
+                if changes:
+                    changed.append(f"{len(changes)} value(s) in {document.title.lower()}")
+                    total_changes += len(changes)
+                missing += [format_binding_key(key) if document.kind == DOC_REBINDINGS else key for key in document_missing]
+            info["changed"] = total_changes
+        not_open = [what for kind, what, values in ((DOC_USER_SETTINGS, "settings", preset.settings), (DOC_REBINDINGS, "bindings", preset.bindings))
+                    if values and not any(document.kind == kind for document in documents)]
+        self._update_edit_state()
+        message = f"Preset {Path(path).name}: " + (f"changed {' and '.join(changed)}. Save to write them." if changed else "no values changed.")
+        if missing:
+            message += f" {len(missing)} not found: {', '.join(missing[:5])}{', ...' if len(missing) > 5 else ''}."
+        if not_open:
+            message += f" Its {' and '.join(not_open)} were not applied because the file is not open."
+        log.info(message)
+        self.status_label.setText(message)
+
+    def handle_export_preset(self):
+        """Saves the values shown in the open files as a preset: the search matches while searching, otherwise every value."""
+        from .presets import Preset, save_preset
+        preset = Preset()
+        for document in self.documents.values():
+            if document.root is None:
+                continue
+            document.apply_search(self.search_edit.text()) # Each tab is only searched when shown
+            if document.kind == DOC_REBINDINGS:
+                preset.bindings = document.preset_values()
+            else:
+                preset.settings = document.preset_values()
+        if preset.is_empty():
+            QMessageBox.information(self, "Export Preset", "There are no settings or bindings to export.")
+            return
+        path, _selected_filter = QFileDialog.getSaveFileName(self, "Export Preset", "preset.json", PRESET_FILE_FILTER)
+        if not path:
+            return
+        try:
+            save_preset(preset, path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Export Preset", f"Could not save the preset:\n{e}")
+            return
+        self.status_label.setText(f"Exported {len(preset.settings)} setting(s) and {len(preset.bindings)} binding(s) to {Path(path).name}.")
+
+    def _update_edit_state(self):
+        """Updates the buttons for the current document and marks tabs with unsaved changes."""
+        document = self.current_document
+        self.changes_made_in_current_config = document is not None and document.journal.is_dirty
+        self.reset_changes_button.setEnabled(self.changes_made_in_current_config)
+        self.undo_button.setEnabled(document is not None and document.journal.can_undo)
+        self.redo_button.setEnabled(document is not None and document.journal.can_redo)
+        self.save_button.setEnabled(document is not None and document.root is not None)
+        self.save_all_button.setEnabled(any(document.root is not None and document.is_dirty
+                                            for document in self.documents.values()))
+        has_loaded_document = any(document.root is not None for document in self.documents.values())
+        self.import_preset_button.setEnabled(has_loaded_document)
+        self.export_preset_button.setEnabled(has_loaded_document)
+        for document in self.documents.values():
+            document.resolve_disk_conflicts()
+            self.document_tabs.setTabText(self.document_tabs.indexOf(document), document.tab_text())
+
+    def _apply_journal_changes(self, document: DocumentView, changes, description: str):
+        """Refreshes the rows touched by an undo, redo or reset that the journal applied to the XML."""
+        if not changes:
+            return
+        document.refresh_elements({change.element for change in changes})
+        self._update_edit_state()
+        log.info(f"{description}: {len(changes)} value(s) changed in memory.")
+        self.status_label.setText(f"{description}. {'Unsaved changes remain.' if self.changes_made_in_current_config else 'No unsaved changes.'}")
+
+    def handle_undo(self):
+        document = self.current_document
+        if self.job_runner.is_busy or document is None:
+            return
+        self._apply_journal_changes(document, document.journal.undo(), "Undid last change")
+
+    def handle_redo(self):
+        document = self.current_document
+        if self.job_runner.is_busy or document is None:
+            return
+        self._apply_journal_changes(document, document.journal.redo(), "Redid change")
 
     def handle_reset_changes(self):
-        if not (self.current_rebindings_filepath or self.current_usersettings_filepath):
+        document = self.current_document
+        if document is None:
             QMessageBox.information(self, "Reset Changes", "No configuration is currently loaded to reset.")
             return
 
         reply = QMessageBox.question(self, "Confirm Reset",
-                                     "Are you sure you want to discard all current changes and reload the configuration from disk?",
+                                     "Are you sure you want to discard all unsaved changes? You can still undo the reset afterwards.",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                                      QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.No:
             return
 
-        # Check which type of config is loaded. current_..._root being not None is a good indicator.
-        if self.current_rebindings_root is not None and self.current_rebindings_filepath is not None:
-            self.handle_load_rebindings(prompt_for_backup=False)
-        elif self.current_usersettings_root is not None and self.current_usersettings_filepath is not None:
-            self.handle_load_user_settings(prompt_for_backup=False)
-        elif self.current_usersettings_filepath is not None: # Case: user settings file found but failed to parse
-            self.handle_load_user_settings(prompt_for_backup=False)
-        else:
-            self.status_label.setText("Could not determine which configuration to reset.")
-            self.action_status_label.setText("Reset failed: No active configuration.")
-            # This state should ideally not be reached if the first check passed
-            self.changes_made_in_current_config = False
-            self.reset_changes_button.setEnabled(False)
+        # A loaded document is reverted in memory from the journal, without reading the file again
+        if document.root is not None:
+            self._apply_journal_changes(document, document.journal.revert_to_saved(), "Reset all unsaved changes")
+        elif document.kind == DOC_USER_SETTINGS: # Case: user settings file found but failed to parse
+            self._start_load_user_settings()
+
+    def _save_after_merging(self, documents: list[DocumentView], outcome: dict[str, str]):
+        """Continues a save once the files changed on disk were merged into the documents."""
+        def names(status: str) -> str:
+            return ", ".join(Path(path).name for path, path_status in outcome.items() if path_status == status)
+
+        if DISK_UNREADABLE in outcome.values():
+            self.status_label.setText(f"Not saved: {names(DISK_UNREADABLE)} changed on disk and could not be read. Try again.")
             return
-        # The load functions will set changes_made_in_current_config to False, 
-        # disable reset_changes_button, and update the label.
+        if DISK_CONFLICTS in outcome.values():
+            # The merge listed the conflicts; saving now would write over them before the user saw them
+            self.status_label.setText(f"Not saved: {names(DISK_CONFLICTS)} changed on disk. "
+                                      "Check the highlighted values and save again.")
+            return
+        if DISK_STRUCTURAL in outcome.values():
+            answer = QMessageBox.question(self, "Changed on Disk",
+                                          f"{names(DISK_STRUCTURAL)} was rewritten on disk with other settings or bindings "
+                                          "since it was loaded.\n\nOverwrite it with the values shown here?")
+            if answer != QMessageBox.StandardButton.Yes:
+                self.status_label.setText(f"Not saved: {names(DISK_STRUCTURAL)} was rewritten on disk.")
+                return
+            self._save_documents(documents, overwrite_changes=True)
+            return
+        self._save_documents(documents) # Only values the user did not edit changed; they are in the tree now
 
     def handle_save_current_config(self):
-        if self.current_rebindings_root and self.current_rebindings_filepath:
-            success = self.config_parser.save_xml_config(self.current_rebindings_filepath, self.current_rebindings_root)
-            if success:
-                QMessageBox.information(self, "Save Successful", f"Rebindings saved to:\n{self.current_rebindings_filepath}")
-                self.action_status_label.setText(f"Rebindings saved: {Path(self.current_rebindings_filepath).name}")
-                self.status_label.setText("Rebindings saved successfully.")
-                self.changes_made_in_current_config = False
-                self.reset_changes_button.setEnabled(False)
-            else:
-                QMessageBox.critical(self, "Save Failed", "Failed to save rebindings. Check console for details.")
-        elif self.current_usersettings_root and self.current_usersettings_filepath:
-            success = self.config_parser.save_xml_config(self.current_usersettings_filepath, self.current_usersettings_root)
-            if success:
-                QMessageBox.information(self, "Save Successful", f"User settings saved to:\n{self.current_usersettings_filepath}")
-                self.action_status_label.setText(f"User settings saved: {Path(self.current_usersettings_filepath).name}")
-                self.status_label.setText("User settings saved successfully.")
-                self.changes_made_in_current_config = False
-                self.reset_changes_button.setEnabled(False)
-            else:
-                QMessageBox.critical(self, "Save Failed", "Failed to save user settings. Check console for details.")
-        else:
-            QMessageBox.warning(self, "Save Error", "No configuration data loaded to save.")
\ No newline at end of file
+        document = self.current_document
+        if document is None or document.root is None:
+            QMessageBox.warning(self, "Save Error", "No configuration data loaded to save.")
+            return
+        self._save_documents([document])
+
+    def handle_save_all(self):
+        """Saves every open document with unsaved changes; files without changes are not written."""
+        documents = [document for document in self.documents.values() if document.root is not None and document.is_dirty]
+        if not documents:
+            self.status_label.setText("No unsaved changes.")
+            return
+        self._save_documents(documents)
+
+    def _save_documents(self, documents: list[DocumentView], overwrite_changes: bool = False):
+        """
+        Saves the documents on the worker thread. Files another program (usually the game) changed
+        since they were loaded are first read again and merged (see _save_after_merging()), so
+        saving never silently writes over its values; overwrite_changes skips that.
+        """
+        if not overwrite_changes:
+            changed = [(document, path) for document in documents for path, _root, _changed in document.files_to_save()
+                       if self.config_parser.file_changed_on_disk(path)]
+            if changed:
+                self._reload_changed_files(changed, on_merged=lambda outcome: self._save_after_merging(documents, outcome))
+                return
+        # Only the changed values are rewritten in each file; the rest of it is kept byte for byte
+        saves = [(document, document.files_to_save()) for document in documents]
+        description = " and ".join(document.title for document in documents)
+
+        def save_all(progress):
+            total = sum(len(files) for _document, files in saves)
+            results, done = [], 0
+            for _document, files in saves:
+                success = True
+                for filepath, root, changed_attributes in files:
+                    progress.report(done, total, Path(filepath).name)
+                    success = self.config_parser.save_xml_config(filepath, root, changed_attributes, overwrite_changes) and success
+                    done += 1
+                results.append(success)
+            return results
+
+        def on_save_finished(results: list[bool]):
+            saved, failed = [], []
+            for (document, files), success in zip(saves, results):
+                if success:
+                    document.journal.mark_saved() # Undo stays available; undone values count as unsaved again
+                    saved.append((document, files))
+                else:
+                    failed.append(document)
+            self._update_edit_state()
+            # Changed on disk between the check above and the write: merged first, like any other change
+            changed_meanwhile = [document for document in failed if not overwrite_changes and any(
+                self.config_parser.file_changed_on_disk(path) for path, _root, _changed in document.files_to_save())]
+            if changed_meanwhile:
+                failed = [document for document in failed if document not in changed_meanwhile]
+                QTimer.singleShot(0, lambda: self._save_documents(changed_meanwhile))
+            if saved:
+                QMessageBox.information(self, "Save Successful", "\n\n".join(
+                    f"{document.title} saved to:\n" + "\n".join(filepath for filepath, _root, _changed in files)
+                    for document, files in saved))
+                if any(document is self.current_document for document, _files in saved):
+                    self.action_status_label.setText(f"{self.current_document.title} saved: {self.current_document.filename}")
+                self.status_label.setText(f"{' and '.join(document.title for document, _files in saved)} saved successfully.")
+            if failed:
+                failed_description = " and ".join(document.title.lower() for document in failed)
+                QMessageBox.critical(self, "Save Failed", f"Failed to save {failed_description}. Check console for details.")
+                self.status_label.setText(f"Failed to save {failed_description}.")
+
+        # The tabs are disabled while the job runs, so the XML cannot change during serialisation
+        self.job_runner.start(f"Saving {description.lower()}", save_all,
+                              on_success=on_save_finished,
+                              on_failure=lambda error: on_save_finished([False] * len(saves)))
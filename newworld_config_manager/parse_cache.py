@@ -0,0 +1,80 @@
+import copy
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+
+from .xml_source import SourceMap, parse_with_offsets
+
+DEFAULT_MAX_ENTRIES = 8
+
+
+class ParseCache:
+    """
+    LRU cache of parsed XML documents keyed by (path, size, mtime_ns, sha256 of the content).
+
+    The cache keeps a pristine copy of each parsed tree and hands out deep copies, so callers
+    can edit what they get without affecting later loads. A hit costs reading and hashing the
+    file plus Element.__deepcopy__ (implemented in C), which is considerably cheaper than
+    running the XML parser again. Each entry also keeps the start tag offsets, so
+    parse_with_source() can hand out a SourceMap for minimal-rewrite saves.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # Entry: (pristine root, start tag offsets in iter() order, declared encoding)
+        self._entries: OrderedDict[tuple, tuple[ET.Element, list[int], str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, filepath: str | Path) -> ET.Element:
+        """
+        Returns the root element of the XML file, parsing it only if the cache has no entry
+        for the file's current content. Raises ET.ParseError like ET.parse().
+        """
+        return self.parse_with_source(filepath)[0]
+
+    def parse_with_source(self, filepath: str | Path) -> tuple[ET.Element, SourceMap]:
+        """Like parse(), but also returns the SourceMap linking the returned tree to the file bytes."""
+        path = Path(filepath)
+        st = path.stat()
+        data = path.read_bytes()
+        key = (str(path.resolve()), st.st_size, st.st_mtime_ns, hashlib.sha256(data).hexdigest())
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is not None:
+            pristine_root, offsets, encoding = entry
+            root = copy.deepcopy(pristine_root)
+            return root, SourceMap(root, offsets, data, st.st_size, st.st_mtime_ns, encoding)
+
+        root, offsets, encoding = parse_with_offsets(data)
+        pristine_root = copy.deepcopy(root)
+        with self._lock:
+            self.misses += 1
+            # Older versions of the same file can never be hit again
+            for stale_key in [k for k in self._entries if k[0] == key[0]]:
+                del self._entries[stale_key]
+            self._entries[key] = (pristine_root, offsets, encoding)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return root, SourceMap(root, offsets, data, st.st_size, st.st_mtime_ns, encoding)
+
+    def invalidate(self, filepath: str | Path | None = None) -> None:
+        """Drops the entries for one file, or every entry if no file is given."""
+        with self._lock:
+            if filepath is None:
+                self._entries.clear()
+                return
+            resolved = str(Path(filepath).resolve())
+            for stale_key in [k for k in self._entries if k[0] == resolved]:
+                del self._entries[stale_key]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
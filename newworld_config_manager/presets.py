@@ -0,0 +1,233 @@
+"""
+Presets: settings and key bindings saved to a file and applied to a config folder later.
+
+A preset file maps paths to values: setting field names to values, and bindings written as
+"actionmap/action/device" to inputs, e.g.
+
+    {"version": 2, "settings": {"m_reticleColor": [0, 1, 0, 1]}, "bindings": {"player/jump/keyboard": "space"}}
+
+Files ending in .msgpack hold the same map in MessagePack, if the optional msgpack package is
+installed. Version 1 files, which list bindings as {"actionmap", "action", "device", "input"}
+objects, are still read.
+
+Applying a preset looks each path up in an index of the document (index_settings(),
+rebindings_index.index_bindings()), built in one pass and reusable for any number of presets, so a preset costs
+one lookup per entry instead of a walk over the document per entry.
+"""
+import json
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from .journal import Change
+from .rebindings_index import Binding, BindingKey, index_bindings
+from .values import Value, decode_setting
+
+try:
+    import msgpack
+except ImportError: # Optional; presets are JSON without it
+    msgpack = None
+
+PRESET_VERSION = 2
+MSGPACK_SUFFIXES = (".msgpack", ".mpk")
+
+
+def parse_binding_key(text: str) -> BindingKey:
+    """Parses 'actionmap/action/device', e.g. 'player/jump/keyboard'."""
+    parts = text.split("/")
+    if len(parts) != 3 or not all(parts):
+        raise ValueError(f"Binding '{text}' is not in the form actionmap/action/device")
+    return BindingKey(*parts)
+
+
+def format_binding_key(key: BindingKey) -> str:
+    return "/".join(key)
+
+
+def _preset_input(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+@dataclass
+class Preset:
+    """
+    Values to push into a config folder: user settings by field name and key bindings by
+    (actionmap, action, device). A setting applies to every <Class> with that field.
+    Setting values are text as stored in the file or typed values as read from JSON
+    (true, 0.75, or [1, 0, 0, 1] for a colour); they are checked against each setting's type
+    when applied.
+    """
+    settings: dict[str, Value] = field(default_factory=dict)
+    bindings: dict[BindingKey, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Preset":
+        """Reads both preset versions. Raises ValueError or KeyError on malformed data."""
+        settings = {str(name): list(value) if isinstance(value, tuple) else value
+                    for name, value in data.get("settings", {}).items()}
+        bindings = {}
+        raw_bindings = data.get("bindings", {})
+        if isinstance(raw_bindings, dict): # "actionmap/action/device": input
+            for key_text, value in raw_bindings.items():
+                bindings[parse_binding_key(key_text)] = _preset_input(value)
+        else: # Version 1: a list of objects
+            for binding in raw_bindings:
+                key = BindingKey(binding["actionmap"], binding["action"], binding.get("device", "keyboard"))
+                bindings[key] = _preset_input(binding["input"])
+        return cls(settings, bindings)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PRESET_VERSION,
+            "settings": {name: list(value) if isinstance(value, tuple) else value for name, value in self.settings.items()},
+            "bindings": {format_binding_key(key): value for key, value in self.bindings.items()},
+        }
+
+    def is_empty(self) -> bool:
+        return not self.settings and not self.bindings
+
+
+def _is_msgpack(path: str | Path) -> bool:
+    if Path(path).suffix.lower() not in MSGPACK_SUFFIXES:
+        return False
+    if msgpack is None:
+        raise ValueError(f"{Path(path).name} is a MessagePack preset, which needs the msgpack package")
+    return True
+
+
+def load_preset(path: str | Path) -> Preset:
+    """Reads a preset file (JSON, or MessagePack for .msgpack). Raises OSError, ValueError or KeyError on unreadable or malformed files."""
+    if _is_msgpack(path):
+        with open(path, "rb") as f:
+            try:
+                data = msgpack.unpackb(f.read())
+            except Exception as e: # msgpack raises several unrelated exception types
+                raise ValueError(f"{Path(path).name} is not a valid MessagePack preset: {e}") from e
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{Path(path).name} does not hold a preset")
+    return Preset.from_dict(data)
+
+
+def _format_json(data: dict) -> str:
+    """JSON with one setting or binding per line, e.g. "m_reticleColor": [0.0, 1.0, 0.0, 1.0]."""
+    sections = []
+    for name, value in data.items():
+        if isinstance(value, dict) and value:
+            entries = ",\n".join(f"    {json.dumps(path, ensure_ascii=False)}: {json.dumps(entry, ensure_ascii=False)}"
+                                 for path, entry in value.items())
+            sections.append(f"  {json.dumps(name)}: {{\n{entries}\n  }}")
+        else:
+            sections.append(f"  {json.dumps(name)}: {json.dumps(value, ensure_ascii=False)}")
+    return "{\n" + ",\n".join(sections) + "\n}\n"
+
+
+def save_preset(preset: Preset, path: str | Path) -> None:
+    """Writes a preset file, as MessagePack for .msgpack and as JSON otherwise. Raises OSError or ValueError."""
+    from .xml_source import write_file_atomically
+    if _is_msgpack(path):
+        data = msgpack.packb(preset.to_dict())
+    else:
+        data = _format_json(preset.to_dict()).encode("utf-8")
+    write_file_atomically(path, data)
+
+
+def capture_settings(elements: Iterable[ET.Element]) -> dict[str, Value]:
+    """
+    Field -> typed value of each <Class field=... value=...> setting among elements. Values that
+    are not valid for their type are left out, as applying them would fail. The first of
+    duplicate fields counts.
+    """
+    settings = {}
+    for element in elements:
+        field_name = element.get("field")
+        if field_name is None or "value" not in element.attrib or field_name in settings:
+            continue
+        _value_type, value = decode_setting(element)
+        if value is not None:
+            settings[field_name] = value
+    return settings
+
+
+def capture_bindings(root_element: ET.Element, elements: Iterable[ET.Element] | None = None) -> dict[BindingKey, str]:
+    """The input of each binding of the document, or only of the <rebind> elements given; the first of duplicates counts."""
+    wanted = None if elements is None else set(elements)
+    bindings = {}
+    for key, element in index_bindings(root_element).items():
+        if (wanted is None or element in wanted) and element.get('input') is not None:
+            bindings[BindingKey._make(key)] = element.get('input')
+    return bindings
+
+
+def index_settings(root_element: ET.Element) -> dict[str, list[ET.Element]]:
+    """Field name -> every <Class> with that field, in document order."""
+    index = {}
+    for element in root_element.iter("Class"):
+        field_name = element.get("field")
+        if field_name is not None:
+            index.setdefault(field_name, []).append(element)
+    return index
+
+
+def apply_settings(root_element: ET.Element, settings: dict[str, Value],
+                   index: dict[str, list[ET.Element]] | None = None) -> tuple[list[Change], list[str]]:
+    """
+    Sets the value of every <Class field=...> named in settings, looked up in index (see
+    index_settings(); built from root_element if not given). Each value is checked against the
+    setting's type (see values.py) and compared as a typed value, so a setting that already
+    holds it keeps its text. Returns the changes made (already applied) and the fields that
+    were not found. Raises ValueError, naming every invalid value, before anything is changed.
+    """
+    if index is None:
+        index = index_settings(root_element)
+    changes = []
+    errors = []
+    missing = []
+    for field_name, value in settings.items():
+        elements = index.get(field_name)
+        if not elements:
+            missing.append(field_name)
+            continue
+        for element in elements:
+            value_type, old_typed = decode_setting(element)
+            try:
+                new_value = value_type.encode(value)
+            except ValueError as e:
+                errors.append(f"{field_name}: {e}")
+                break
+            if old_typed is None or value_type.encode(old_typed) != new_value:
+                changes.append(Change(element, "value", element.get("value"), new_value))
+    if errors:
+        raise ValueError(f"Invalid setting values: {'; '.join(errors)}")
+    for change in changes:
+        change.element.set("value", change.new_value)
+    return changes, missing
+
+
+def apply_bindings(root_element: ET.Element, bindings: dict[BindingKey, str],
+                   index: dict[Binding, ET.Element] | None = None) -> tuple[list[Change], list[BindingKey]]:
+    """
+    Sets the input of the <rebind> of each binding in bindings, looked up in index (see
+    rebindings_index.index_bindings(); built from root_element if not given). Like the editor,
+    the first of duplicate rebinds counts. Returns the changes made (already applied) and the
+    bindings that were not found.
+    """
+    if index is None:
+        index = index_bindings(root_element)
+    changes = []
+    missing = []
+    for key, new_value in bindings.items():
+        rebind_element = index.get(key)
+        if rebind_element is None:
+            missing.append(key)
+            continue
+        old_value = rebind_element.get('input')
+        if old_value != new_value:
+            rebind_element.set('input', new_value)
+            changes.append(Change(rebind_element, 'input', old_value, new_value))
+    return changes, missing
@@ -0,0 +1,41 @@
+import threading
+from typing import Callable
+
+
+class OperationCancelled(Exception):
+    """Raised inside a long-running operation when the user has asked to cancel it."""
+
+
+class Progress:
+    """
+    Progress reporting and cancellation handle passed into long-running operations.
+    The callback receives (done, total, message); total is 0 when the amount of work is unknown.
+    Operations call report() between units of work, which raises OperationCancelled once
+    cancel() has been called from any thread.
+    """
+
+    def __init__(self, callback: Callable[[int, int, str], None] | None = None):
+        self._callback = callback
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise OperationCancelled()
+
+    def report(self, done: int, total: int, message: str = "") -> None:
+        self.check_cancelled()
+        if self._callback is not None:
+            self._callback(done, total, message)
+
+
+def report(progress: Progress | None, done: int, total: int, message: str = "") -> None:
+    """Reports progress when a Progress handle was given; a no-op otherwise."""
+    if progress is not None:
+        progress.report(done, total, message)
@@ -0,0 +1,138 @@
+import xml.etree.ElementTree as ET
+from typing import Iterator, NamedTuple
+
+
+class BindingKey(NamedTuple):
+    actionmap: str
+    action: str
+    device: str
+
+
+# (actionmap, action, device); plain tuples hash and compare like BindingKey but are cheaper to build
+Binding = tuple[str, str, str]
+
+
+def iter_actions(actionmap_element: ET.Element) -> Iterator[tuple[ET.Element, list[ET.Element]]]:
+    """Each <action> of an <actionmap> with its <rebind> elements, in document order."""
+    for action_element in actionmap_element.iterfind('action'):
+        yield action_element, action_element.findall('rebind')
+
+
+def iter_bindings(root_element: ET.Element) -> Iterator[tuple[Binding, ET.Element]]:
+    """
+    (actionmap, action, device) and the <rebind> element of every binding of a rebindings
+    document, in document order. Every index over bindings is built on this walk.
+    """
+    for actionmap_element in root_element.iterfind('actionmap'):
+        actionmap_name = actionmap_element.get('name', '')
+        for action_element, rebind_elements in iter_actions(actionmap_element):
+            action_name = action_element.get('name', '')
+            for rebind_element in rebind_elements:
+                yield (actionmap_name, action_name, rebind_element.get('device', '')), rebind_element
+
+
+def index_bindings(root_element: ET.Element) -> dict[Binding, ET.Element]:
+    """(actionmap, action, device) -> <rebind> of a rebindings document; the first of duplicates counts, like RebindingsIndex."""
+    bindings = {}
+    for key, rebind_element in iter_bindings(root_element):
+        if key not in bindings:
+            bindings[key] = rebind_element
+    return bindings
+
+
+class RebindingsIndex:
+    """
+    Lookup tables over a rebindings document:
+    (actionmap, action, device) -> <rebind> element, and the inverted index
+    (device, input) -> <rebind> elements bound to it.
+
+    Two rebinds conflict when they use the same input on the same device within the same
+    actionmap; actionmaps are active in different contexts, so sharing an input across
+    them is normal. update() re-indexes a single rebind after its input changed in O(1)
+    (plus the size of the groups it leaves and joins).
+    """
+
+    def __init__(self, root_element: ET.Element | None = None):
+        self._by_key: dict[BindingKey, ET.Element] = {}
+        self._keys: dict[ET.Element, BindingKey] = {}
+        self._by_input: dict[tuple[str, str], dict[ET.Element, None]] = {} # Dicts keep document order
+        self._bound_inputs: dict[ET.Element, tuple[str, str]] = {}
+        if root_element is not None:
+            self.build(root_element)
+
+    def build(self, root_element: ET.Element) -> None:
+        self._by_key.clear()
+        self._keys.clear()
+        self._by_input.clear()
+        self._bound_inputs.clear()
+        for key, rebind_element in iter_bindings(root_element):
+            key = BindingKey._make(key)
+            self._by_key.setdefault(key, rebind_element)
+            self._keys[rebind_element] = key
+            self._add_input(rebind_element)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, rebind_element: ET.Element) -> bool:
+        return rebind_element in self._keys
+
+    def lookup(self, actionmap: str, action: str, device: str) -> ET.Element | None:
+        return self._by_key.get(BindingKey(actionmap, action, device))
+
+    def key_of(self, rebind_element: ET.Element) -> BindingKey | None:
+        return self._keys.get(rebind_element)
+
+    def bound_to(self, device: str, input_name: str) -> list[ET.Element]:
+        """Every indexed rebind using input_name on device, in document order."""
+        return list(self._by_input.get((device, input_name), ()))
+
+    def actions_for_input(self, device: str, input_name: str) -> list[BindingKey]:
+        return [self._keys[element] for element in self._by_input.get((device, input_name), ())]
+
+    def conflicts_for(self, rebind_element: ET.Element, input_name: str | None = None) -> list[ET.Element]:
+        """
+        Other rebinds in the same actionmap and on the same device bound to input_name
+        (the element's current input by default). Empty if the element is not indexed.
+        """
+        key = self._keys.get(rebind_element)
+        if key is None:
+            return []
+        if input_name is None:
+            input_name = rebind_element.get('input', '')
+        if not input_name:
+            return []
+        return [element for element in self._by_input.get((key.device, input_name), ())
+                if element is not rebind_element and self._keys[element].actionmap == key.actionmap]
+
+    def is_conflicting(self, rebind_element: ET.Element) -> bool:
+        return bool(self.conflicts_for(rebind_element))
+
+    def update(self, rebind_element: ET.Element) -> set[ET.Element]:
+        """
+        Re-indexes a rebind after its input changed. Returns the rebinds whose conflict
+        state may have changed: the element itself and those sharing its old or new input.
+        """
+        if rebind_element not in self._keys:
+            return set()
+        affected = {rebind_element}
+        affected.update(self._remove_input(rebind_element))
+        affected.update(self._add_input(rebind_element))
+        return affected
+
+    def _add_input(self, rebind_element: ET.Element) -> list[ET.Element]:
+        bound_input = (self._keys[rebind_element].device, rebind_element.get('input', ''))
+        self._bound_inputs[rebind_element] = bound_input
+        group = self._by_input.setdefault(bound_input, {})
+        group[rebind_element] = None
+        return list(group)
+
+    def _remove_input(self, rebind_element: ET.Element) -> list[ET.Element]:
+        bound_input = self._bound_inputs.pop(rebind_element, None)
+        if bound_input is None:
+            return []
+        group = self._by_input.get(bound_input, {})
+        group.pop(rebind_element, None)
+        if not group:
+            self._by_input.pop(bound_input, None)
+        return list(group)
@@ -0,0 +1,216 @@
+"""
+Every rebindings file of a config folder, parsed together and merged by binding.
+
+A config folder can hold several hashed rebindings_b*.xml files. The newest one is what the
+editor shows, but the others hold bindings too. RebindingsVariants merges them into one index
+from (actionmap, action, device) to the <rebind> element of each file that has the binding, so
+it can tell which files a binding comes from, list the bindings whose input is not the same in
+every file, and change a binding in all files at once. Only changes that actually alter a value
+are returned, so saving rewrites only the files whose content changed.
+"""
+import logging
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, NamedTuple
+
+from .journal import Change
+from .progress import Progress, report
+from .rebindings_index import Binding, BindingKey, index_bindings
+
+if TYPE_CHECKING:
+    from .xml_diff import FileDiff
+
+MAX_PARSE_THREADS = 8
+
+log = logging.getLogger(__name__)
+
+
+class RebindingsFile(NamedTuple):
+    path: str
+    mtime_ns: int
+    root: ET.Element
+    bindings: dict[Binding, ET.Element] # See index_bindings()
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).name
+
+
+class BindingVariance(NamedTuple):
+    """A binding whose input differs between files. inputs maps each file's path to its input, None if it lacks the binding."""
+    key: BindingKey
+    inputs: dict[str, str | None]
+
+
+class RebindingsVariants:
+    """
+    The merged index over parsed rebindings files, newest first; files[0] is the primary file
+    that is shown and edited. Each file's bindings are indexed once (on the parse thread, see
+    parse_rebindings_files()), and merged views such as differences() look a binding up in
+    every file's index. The reverse lookup from a <rebind> element to its binding and file is
+    built the first time it is needed.
+    """
+
+    def __init__(self, files: list[RebindingsFile], unreadable: list[str] = ()):
+        self.files = sorted(files, key=lambda file: file.mtime_ns, reverse=True)
+        self.unreadable = list(unreadable) # Paths that could not be parsed
+        self._roots = {file.path: file.root for file in self.files}
+        self._keys: dict[ET.Element, tuple[Binding, str]] | None = None # <rebind> -> (binding, path)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def primary(self) -> RebindingsFile | None:
+        return self.files[0] if self.files else None
+
+    def root_of(self, path: str) -> ET.Element | None:
+        return self._roots.get(path)
+
+    def keys(self) -> list[BindingKey]:
+        """Every binding of any file: the newest file's in document order, then those only older files have."""
+        merged = {}
+        for file in self.files:
+            merged.update(dict.fromkeys(file.bindings))
+        return [BindingKey._make(key) for key in merged]
+
+    def _reverse_index(self) -> dict[ET.Element, tuple[Binding, str]]:
+        if self._keys is None:
+            self._keys = {element: (key, file.path) for file in self.files for key, element in file.bindings.items()}
+        return self._keys
+
+    def key_of(self, rebind_element: ET.Element) -> BindingKey | None:
+        entry = self._reverse_index().get(rebind_element)
+        return BindingKey._make(entry[0]) if entry else None
+
+    def file_of(self, rebind_element: ET.Element) -> str | None:
+        entry = self._reverse_index().get(rebind_element)
+        return entry[1] if entry else None
+
+    def sources(self, key: BindingKey) -> list[str]:
+        """The files that contain the binding, newest first."""
+        return [file.path for file in self.files if key in file.bindings]
+
+    def inputs(self, key: BindingKey) -> dict[str, str | None]:
+        """Each file's input for the binding, newest first; None for files without it."""
+        inputs = {}
+        for file in self.files:
+            element = file.bindings.get(key)
+            inputs[file.path] = element.get('input') if element is not None else None
+        return inputs
+
+    def differences(self) -> list[BindingVariance]:
+        """The bindings whose input is not the same in every file, or that some files lack."""
+        if len(self.files) < 2:
+            return []
+        primary, others = self.files[0].bindings, [file.bindings for file in self.files[1:]]
+        variances = []
+        for key, element in primary.items():
+            primary_input = element.get('input')
+            for bindings in others:
+                other = bindings.get(key)
+                if other is None or other.get('input') != primary_input:
+                    variances.append(BindingVariance(BindingKey._make(key), self.inputs(key)))
+                    break
+        reported = set(primary)
+        for bindings in others: # Bindings the primary file lacks
+            for key in bindings:
+                if key not in reported:
+                    reported.add(key)
+                    variances.append(BindingVariance(BindingKey._make(key), self.inputs(key)))
+        return variances
+
+    def replaced(self, path: str, root: ET.Element) -> "RebindingsVariants":
+        """The same files with path parsed again as root, e.g. after it was rewritten on disk."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = 0
+        files = [RebindingsFile(path, mtime_ns, root, index_bindings(root)) if file.path == path else file for file in self.files]
+        return RebindingsVariants(files, self.unreadable)
+
+    def set_input(self, key: BindingKey, input_name: str, skip: ET.Element | None = None) -> list[Change]:
+        """
+        Sets the binding's input in every file that has it, except on skip (e.g. the element the
+        user just edited). Returns the changes made (already applied); files that already hold
+        the input are left untouched.
+        """
+        changes = []
+        for file in self.files:
+            element = file.bindings.get(key)
+            if element is None or element is skip:
+                continue
+            old_value = element.get('input')
+            if old_value != input_name:
+                element.set('input', input_name)
+                changes.append(Change(element, 'input', old_value, input_name))
+        return changes
+
+    def changes_by_file(self, changed_attributes: Iterable[tuple[ET.Element, str]]) -> dict[str, set[tuple[ET.Element, str]]]:
+        """
+        Groups changed (element, attribute) pairs by the file they belong to, oldest file first.
+        Pairs of elements that are not indexed rebinds are counted to the primary file. Saving in
+        this order writes the primary file last, so it stays the newest one.
+        """
+        keys = self._reverse_index()
+        grouped: dict[str, set[tuple[ET.Element, str]]] = {}
+        primary_path = self.primary.path if self.primary else None
+        for element, attribute in changed_attributes:
+            entry = keys.get(element)
+            grouped.setdefault(entry[1] if entry else primary_path, set()).add((element, attribute))
+        return {file.path: grouped[file.path] for file in reversed(self.files) if file.path in grouped}
+
+    def file_diffs(self) -> list["FileDiff"]:
+        """How every other file differs from the primary one, for ui.diff_view.DiffDialog."""
+        from .presets import format_binding_key
+        from .xml_diff import ADDED, CHANGED, REMOVED, FieldChange, FileDiff
+        primary_path = self.primary.path
+        changes_by_file = {file.path: [] for file in self.files[1:]}
+        for variance in self.differences():
+            primary_input = variance.inputs[primary_path]
+            for path, changes in changes_by_file.items():
+                variant_input = variance.inputs[path]
+                if variant_input == primary_input:
+                    continue
+                kind = CHANGED if primary_input is not None and variant_input is not None else ADDED if primary_input is None else REMOVED
+                attribute = 'input' if kind == CHANGED else None # A whole binding only one side has
+                changes.append(FieldChange(format_binding_key(variance.key), kind, attribute, primary_input, variant_input))
+        return [FileDiff(Path(path).name, CHANGED if changes else "identical", changes)
+                for path, changes in changes_by_file.items()]
+
+
+def _parse_and_index(parse: Callable[[str], ET.Element], path: str) -> tuple[ET.Element, dict[Binding, ET.Element]]:
+    root = parse(path)
+    return root, index_bindings(root)
+
+
+def parse_rebindings_files(paths: list[tuple[str, int]], parse: Callable[[str], ET.Element],
+                           progress: Progress | None = None) -> RebindingsVariants:
+    """
+    Parses (path, mtime_ns) files concurrently with parse(path), which may raise ET.ParseError
+    or OSError, and indexes each file's bindings on the thread that parsed it. Parsing mostly
+    holds the GIL, but reading and hashing the files overlap on the pool. Files that cannot be
+    parsed are listed in the result's unreadable instead of failing the rest.
+    """
+    files, unreadable = [], []
+    if not paths:
+        return RebindingsVariants(files)
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    workers = min(MAX_PARSE_THREADS, len(paths), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_parse_and_index, parse, path): (path, mtime_ns) for path, mtime_ns in paths}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                path, mtime_ns = futures[future]
+                try:
+                    files.append(RebindingsFile(path, mtime_ns, *future.result()))
+                except (ET.ParseError, OSError) as e:
+                    log.error(f"Error parsing rebindings file {path}: {e}")
+                    unreadable.append(path)
+                report(progress, done, len(paths), Path(path).name)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return RebindingsVariants(files, unreadable)
@@ -0,0 +1,142 @@
+import functools
+import logging
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .archive import SnapshotArchive
+from .backup_store import BackupStore, hash_file, iter_files
+from .progress import Progress, report
+
+STAGING_SUFFIX = ".restore-tmp"
+PREVIOUS_SUFFIX = ".restore-old"
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceFile:
+    """A file that should exist in the restored folder."""
+    size: int
+    mtime_ns: int
+    path: Path
+    digest: str | None = None  # Known for snapshot sources; computed lazily for folder sources
+    extract: Callable[[Path], None] | None = None  # Writes the content to a path; set for files inside an archive
+
+
+@dataclass
+class RestoreResult:
+    copied: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+
+
+def files_from_folder(backup_dir: Path) -> dict[str, SourceFile]:
+    """Describes the files of a plain backup folder (e.g. an old full-copy backup)."""
+    backup_dir = Path(backup_dir)
+    return {
+        rel_path: SourceFile(st.st_size, st.st_mtime_ns, backup_dir / rel_path)
+        for rel_path, st in iter_files(backup_dir)
+    }
+
+
+def files_from_snapshot(store: BackupStore, snapshot_id: str) -> dict[str, SourceFile]:
+    """Describes the files of a snapshot in the backup store."""
+    manifest = store.load_manifest(snapshot_id)
+    return {
+        rel_path: SourceFile(size, mtime_ns, store.object_path(digest), digest)
+        for rel_path, (size, mtime_ns, digest) in manifest["files"].items()
+    }
+
+
+def files_from_archive(archive: SnapshotArchive) -> dict[str, SourceFile]:
+    """Describes the files of an open archive; it must stay open until the restore has finished."""
+    return {
+        rel_path: SourceFile(size, mtime_ns, archive.path, digest, functools.partial(archive.extract, rel_path))
+        for rel_path, (size, mtime_ns, digest, _offset, _compressed_size) in archive.files.items()
+    }
+
+
+def _is_unchanged(source: SourceFile, live_path: Path, live_stat: os.stat_result) -> bool:
+    """Compares a live file to its backup by size, then mtime, then content hash."""
+    if live_stat.st_size != source.size:
+        return False
+    if live_stat.st_mtime_ns == source.mtime_ns:
+        return True
+    if source.digest is None:
+        source.digest = hash_file(source.path)
+    return hash_file(live_path) == source.digest
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """Hardlinks an unchanged live file into the staging folder, copying when links are unsupported."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def restore_directory(target_dir: Path, source_files: dict[str, SourceFile],
+                      progress: Progress | None = None) -> RestoreResult:
+    """
+    Makes target_dir contain exactly source_files.
+
+    The new folder is built next to target_dir: unchanged live files are hardlinked in,
+    only files that differ are copied from the backup, and extra live files are left out.
+    The staged folder is then swapped in with two renames, so a failure at any point
+    leaves the live folder intact. A live folder left aside by a restore that stopped between
+    the renames is moved back first. Cancelling through progress is possible until the swap.
+    """
+    target_dir = Path(target_dir)
+    staging_dir = target_dir.with_name(target_dir.name + STAGING_SUFFIX)
+    previous_dir = target_dir.with_name(target_dir.name + PREVIOUS_SUFFIX)
+    if previous_dir.exists():
+        if target_dir.exists():
+            shutil.rmtree(previous_dir)
+        else:
+            # An earlier restore stopped between its two renames: this is the only copy of the live folder
+            log.warning(f"Moving {previous_dir} back to {target_dir}; an earlier restore did not finish.")
+            os.rename(previous_dir, target_dir)
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+
+    live_files = dict(iter_files(target_dir)) if target_dir.is_dir() else {}
+    result = RestoreResult()
+    result.deleted = sorted(set(live_files) - set(source_files))
+
+    try:
+        staging_dir.mkdir(parents=True)
+        for index, (rel_path, source) in enumerate(source_files.items()):
+            report(progress, index, len(source_files), rel_path)
+            staged_path = staging_dir / rel_path
+            staged_path.parent.mkdir(parents=True, exist_ok=True)
+            live_path = target_dir / rel_path
+            live_stat = live_files.get(rel_path)
+            if live_stat is not None and _is_unchanged(source, live_path, live_stat):
+                _link_or_copy(live_path, staged_path)
+                result.unchanged.append(rel_path)
+            else:
+                if source.extract is not None:
+                    source.extract(staged_path)
+                else:
+                    shutil.copyfile(source.path, staged_path)
+                os.utime(staged_path, ns=(source.mtime_ns, source.mtime_ns))
+                result.copied.append(rel_path)
+        report(progress, len(source_files), len(source_files), "Switching to restored folder")
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    if target_dir.exists():
+        os.rename(target_dir, previous_dir)
+    try:
+        os.rename(staging_dir, target_dir)
+    except BaseException:
+        if previous_dir.exists():
+            os.rename(previous_dir, target_dir)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    return result
@@ -0,0 +1,143 @@
+import bisect
+import functools
+import re
+import xml.etree.ElementTree as ET
+
+from .rebindings_index import iter_actions
+
+_CHUNK_RE = re.compile(r"[0-9A-Za-z.]+")
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9.]+")
+_MAX_CHAR = chr(0x10FFFF)
+
+
+@functools.lru_cache(maxsize=4096) # Values such as "0", "1" or "true" repeat a lot
+def tokenize(text: str) -> frozenset[str]:
+    """
+    Lower-cased search tokens for text: the whole string, each word (split at punctuation and
+    camelCase boundaries) and each run of trailing words, so that prefix queries such as
+    "reticle" or "targetcol" find "m_reticleTargetColor".
+    """
+    text = text.strip()
+    if not text:
+        return frozenset()
+    tokens = {text.lower()}
+    for chunk in _CHUNK_RE.findall(text):
+        words = [word.lower() for word in _WORD_RE.findall(chunk)]
+        for i in range(len(words)):
+            tokens.add("".join(words[i:]))
+            tokens.add(words[i])
+    return frozenset(tokens)
+
+
+class SearchIndex:
+    """
+    Inverted index from search tokens to the elements shown as rows, with a sorted token list
+    so each query term is answered by prefix with bisect instead of walking the tree.
+    Every element has fixed text (e.g. its field or action name) plus optionally the current
+    value of one attribute; update() re-indexes that value after an edit.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, set[ET.Element]] = {}
+        self._sorted_tokens: list[str] = [] # May keep tokens whose postings became empty
+        self._entries: dict[ET.Element, tuple[tuple[str, ...], str | None]] = {}
+        self._tokens_of: dict[ET.Element, set[str]] = {}
+
+    @classmethod
+    def for_user_settings(cls, root_element: ET.Element) -> "SearchIndex":
+        """Indexes field names and values of settings, and the tags of other container elements."""
+        index = cls()
+        for element in root_element.iter():
+            if element.tag == "Class" and "field" in element.attrib:
+                index.add(element, (element.get("field"),), "value")
+            elif element.tag != "Class":
+                index.add(element, (element.tag, (element.text or "").strip()))
+        index.finish()
+        return index
+
+    @classmethod
+    def for_rebindings(cls, root_element: ET.Element) -> "SearchIndex":
+        """Indexes actionmap and action names, devices and current inputs."""
+        index = cls()
+        for actionmap_element in root_element.findall('actionmap'):
+            index.add(actionmap_element, (actionmap_element.get('name', ''),))
+            for action_element, rebinds in iter_actions(actionmap_element):
+                action_name = action_element.get('name', '')
+                if not rebinds:
+                    index.add(action_element, (action_name,))
+                for rebind_element in rebinds:
+                    index.add(rebind_element, (action_name, rebind_element.get('device', '')), 'input')
+        index.finish()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, element: ET.Element, fixed_text: tuple[str, ...], value_attribute: str | None = None) -> None:
+        """Adds an element. Call finish() after adding in bulk; update() keeps the order itself."""
+        self._entries[element] = (fixed_text, value_attribute)
+        tokens = self._element_tokens(element)
+        self._tokens_of[element] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = {element}
+                self._sorted_tokens.append(token)
+            else:
+                postings.add(element)
+
+    def finish(self) -> None:
+        self._sorted_tokens = sorted(set(self._sorted_tokens))
+
+    def update(self, element: ET.Element) -> None:
+        """Re-indexes an element whose value attribute changed. Unknown elements are ignored."""
+        if element not in self._entries:
+            return
+        old_tokens = self._tokens_of[element]
+        new_tokens = self._element_tokens(element)
+        for token in old_tokens - new_tokens:
+            postings = self._postings[token]
+            postings.discard(element)
+            if not postings:
+                del self._postings[token] # Left in _sorted_tokens; search() skips it
+        for token in new_tokens - old_tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = {element}
+                position = bisect.bisect_left(self._sorted_tokens, token)
+                if position == len(self._sorted_tokens) or self._sorted_tokens[position] != token:
+                    self._sorted_tokens.insert(position, token)
+            else:
+                postings.add(element)
+        self._tokens_of[element] = new_tokens
+
+    def search(self, query: str) -> set[ET.Element]:
+        """Elements matching every whitespace-separated term of query as a token prefix."""
+        terms = set(query.lower().split())
+        if not terms:
+            return set()
+        # Expand only the term with the fewest matching tokens; check the others per candidate
+        ranges = sorted((self._prefix_range(term), term) for term in terms)
+        (first, last), _term = min(ranges, key=lambda item: item[0][1] - item[0][0])
+        postings = self._postings
+        matches = set().union(*(postings.get(token, ()) for token in self._sorted_tokens[first:last]))
+        for _range, term in ranges:
+            if not matches:
+                break
+            if _range != (first, last):
+                matches = {element for element in matches
+                           if any(token.startswith(term) for token in self._tokens_of[element])}
+        return matches
+
+    def _prefix_range(self, prefix: str) -> tuple[int, int]:
+        return (bisect.bisect_left(self._sorted_tokens, prefix),
+                bisect.bisect_left(self._sorted_tokens, prefix + _MAX_CHAR))
+
+    def _element_tokens(self, element: ET.Element) -> set[str]:
+        fixed_text, value_attribute = self._entries[element]
+        tokens: set[str] = set()
+        for text in fixed_text:
+            tokens |= tokenize(text)
+        if value_attribute is not None:
+            tokens |= tokenize(element.get(value_attribute, ""))
+        return tokens
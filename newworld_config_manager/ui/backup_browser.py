@@ -0,0 +1,186 @@
+from pathlib import Path
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QApplication, QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QMessageBox, QPushButton,
+                             QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget)
+
+from ..catalog import KIND_ARCHIVE, KIND_FOLDER, KIND_SNAPSHOT, CatalogEntry
+from ..config_parser import ConfigParser
+
+COLUMNS = ("Created", "Type", "Label", "Files", "Size", "Changes")
+KIND_NAMES = {KIND_SNAPSHOT: "Snapshot", KIND_ARCHIVE: "Archive", KIND_FOLDER: "Backup folder"}
+
+
+def format_size(size: int | None) -> str:
+    if size is None:
+        return ""
+    for unit in ("bytes", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_changes(entry: CatalogEntry) -> str:
+    if entry.previous_id is None:
+        return "First backup"
+    if not (entry.added or entry.changed or entry.removed):
+        return "No changes"
+    return ", ".join(f"{count} {what}" for count, what in ((entry.added, "added"), (entry.changed, "changed"),
+                                                           (entry.removed, "removed")) if count)
+
+
+class BackupBrowserDialog(QDialog):
+    """
+    Lists every backup from the catalog (see catalog.py) and lets the user pick one to restore
+    or to compare with the current files, delete backups, or prune them by the retention policy.
+    After exec(), selected_entry or selected_folder holds what to restore from.
+    """
+
+    def __init__(self, config_parser: ConfigParser, entries: list[CatalogEntry], parent: QWidget | None = None):
+        super().__init__(parent)
+        self.setWindowTitle("Restore from Backup")
+        self.resize(760, 420)
+        self.config_parser = config_parser
+        self.entries = entries
+        self.selected_entry: CatalogEntry | None = None
+        self.selected_folder: Path | None = None
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.table.itemSelectionChanged.connect(self._update_buttons)
+        self.table.itemDoubleClicked.connect(lambda item: self.handle_restore())
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.restore_button = QPushButton("Restore")
+        self.restore_button.setDefault(True)
+        self.restore_button.clicked.connect(self.handle_restore)
+        button_layout.addWidget(self.restore_button)
+        self.compare_button = QPushButton("Compare with Current")
+        self.compare_button.setToolTip("Show the settings and key bindings that changed since this backup")
+        self.compare_button.clicked.connect(self.handle_compare)
+        button_layout.addWidget(self.compare_button)
+        self.delete_button = QPushButton("Delete")
+        self.delete_button.clicked.connect(self.handle_delete)
+        button_layout.addWidget(self.delete_button)
+        prune_button = QPushButton("Prune Old Backups...")
+        prune_button.clicked.connect(self.handle_prune)
+        button_layout.addWidget(prune_button)
+        browse_button = QPushButton("Browse for a Folder...")
+        browse_button.clicked.connect(self.handle_browse)
+        button_layout.addWidget(browse_button)
+        button_layout.addStretch(1)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.reject)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self._fill_table()
+
+    def _fill_table(self):
+        self.table.setRowCount(len(self.entries))
+        for row, entry in enumerate(self.entries):
+            values = (entry.created_datetime.strftime("%Y-%m-%d %H:%M:%S"), KIND_NAMES.get(entry.kind, entry.kind),
+                      entry.label or "", entry.file_count, format_size(entry.total_bytes), format_changes(entry))
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if isinstance(value, int):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                item.setToolTip(entry.location)
+                self.table.setItem(row, column, item)
+        self.table.resizeColumnsToContents()
+        if self.entries:
+            self.table.selectRow(0)
+        summary = f"{len(self.entries)} backup(s)." if self.entries else "No backups yet."
+        full_copies = [entry for entry in self.entries if entry.kind != KIND_SNAPSHOT]
+        if full_copies:
+            summary += (f" Archives and backup folders use {format_size(sum(entry.stored_bytes or 0 for entry in full_copies))};"
+                        " snapshots share unchanged files.")
+        self.summary_label.setText(summary)
+        self._update_buttons()
+
+    def _reload(self):
+        self.entries = self.config_parser.catalog_backups()
+        self._fill_table()
+
+    def current_entry(self) -> CatalogEntry | None:
+        rows = self.table.selectionModel().selectedRows()
+        return self.entries[rows[0].row()] if rows else None
+
+    def _update_buttons(self):
+        has_selection = self.current_entry() is not None
+        self.restore_button.setEnabled(has_selection)
+        self.compare_button.setEnabled(has_selection)
+        self.delete_button.setEnabled(has_selection)
+
+    def handle_restore(self):
+        self.selected_entry = self.current_entry()
+        if self.selected_entry is not None:
+            self.accept()
+
+    def handle_compare(self):
+        entry = self.current_entry()
+        if entry is None:
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            file_diffs = self.config_parser.diff_with(entry.location if entry.kind == KIND_FOLDER else entry.id)
+        except Exception as e:
+            QMessageBox.warning(self, "Compare Failed", f"Could not compare with the backup:\n{e}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        from .diff_view import DiffDialog
+        DiffDialog(file_diffs, f"Backup {entry.created_datetime:%Y-%m-%d %H:%M}", "Current", self).exec()
+
+    def handle_browse(self):
+        path = QFileDialog.getExistingDirectory(self, "Select Backup Folder to Restore",
+                                                str(self.config_parser.new_world_config_dir.parent))
+        if path:
+            self.selected_folder = Path(path)
+            self.accept()
+
+    def handle_delete(self):
+        entry = self.current_entry()
+        if entry is None:
+            return
+        reply = QMessageBox.question(self, "Delete Backup",
+                                     f"Delete the backup from {entry.created_datetime:%Y-%m-%d %H:%M:%S}"
+                                     f"{f' ({entry.label})' if entry.label else ''}?\nThis cannot be undone.",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.Cancel,
+                                     QMessageBox.StandardButton.Cancel)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            self.config_parser.delete_backup(entry)
+        except Exception as e:
+            QMessageBox.warning(self, "Delete Failed", f"Could not delete the backup:\n{e}")
+        self._reload()
+
+    def handle_prune(self):
+        doomed = self.config_parser.prune_backups(dry_run=True)
+        if not doomed:
+            QMessageBox.information(self, "Prune Old Backups", "The retention policy keeps every backup.")
+            return
+        reply = QMessageBox.question(self, "Prune Old Backups",
+                                     f"{len(doomed)} snapshot(s) and archive(s) are not kept by the retention policy "
+                                     f"(the newest backups plus one per day and per week). Delete them?\n"
+                                     "Backup folders made by older versions are never pruned.",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.Cancel,
+                                     QMessageBox.StandardButton.Cancel)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            self.config_parser.prune_backups()
+        except Exception as e:
+            QMessageBox.warning(self, "Prune Failed", f"Could not prune the backups:\n{e}")
+        self._reload()
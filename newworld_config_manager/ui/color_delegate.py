@@ -0,0 +1,235 @@
+from PyQt6.QtCore import QAbstractProxyModel, QPersistentModelIndex, QRect, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QPen
+from PyQt6.QtWidgets import (
+    QApplication, QDoubleSpinBox, QHBoxLayout, QLabel, QLineEdit, QSlider, QStyle, QStyledItemDelegate,
+    QStyleOptionViewItem, QWidget)
+
+from ..values import COLOR_TYPE
+from .config_tree_model import rgba_to_qcolor
+from .edit_coalescer import EditCoalescer
+
+SWATCH_SIZE = 14
+SWATCH_MARGIN = 4
+FLAGGED_EDITOR_STYLE = "QLineEdit { background-color: #ffcdcd; }"
+
+
+def format_rgba_value(rgba: tuple[float, float, float, float]) -> str:
+    """Formats the float tuple back to a space-separated string for XML, e.g. "0.5019608 0.0 1.0 1.0"."""
+    return COLOR_TYPE.encode(rgba)
+
+
+def source_index(index):
+    """Maps an index of a (possibly nested) proxy model, such as the search filter, to the underlying model."""
+    model = index.model()
+    while isinstance(model, QAbstractProxyModel):
+        index = model.mapToSource(index)
+        model = index.model()
+    return index
+
+
+def format_rgba_for_display(rgba: tuple[float, float, float, float]) -> str:
+    return f"R: {int(rgba[0] * 255)}  G: {int(rgba[1] * 255)}  B: {int(rgba[2] * 255)}  A: {rgba[3]:.2f}"
+
+
+class ColorEditorWidget(QWidget):
+    """
+    Custom widget for editing RGBA color values with sliders.
+    color_changed_signal fires on every change, including each tick of a slider drag;
+    color_committed_signal fires once a change is final (drag released, click, key or spinbox step).
+    """
+    color_changed_signal = pyqtSignal(tuple) # (R, G, B, A) floats 0.0-1.0
+    color_committed_signal = pyqtSignal(tuple)
+
+    def __init__(self, initial_rgba_floats=(0.0, 0.0, 0.0, 1.0), parent=None):
+        super().__init__(parent)
+        self.rgba_floats = initial_rgba_floats
+        self.setAutoFillBackground(True) # Hide the painted swatch underneath while editing
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(2, 2, 2, 2) # Small margins
+        layout.setSpacing(3)
+
+        self.sliders = {}
+        self.value_labels = {} # To display current slider value
+
+        # R, G, B Sliders
+        for i, label_text in enumerate(["R", "G", "B"]):
+            slider = QSlider(Qt.Orientation.Horizontal)
+            slider.setMinimum(0)
+            slider.setMaximum(255)
+            slider.setValue(int(self.rgba_floats[i] * 255))
+            slider.setFixedWidth(60) # Make sliders a bit smaller
+            slider.valueChanged.connect(self._update_color_from_sliders)
+            slider.sliderReleased.connect(lambda: self.color_committed_signal.emit(self.rgba_floats))
+            self.sliders[label_text] = slider
+
+            val_label = QLabel(str(slider.value()))
+            val_label.setFixedWidth(25)
+            self.value_labels[label_text] = val_label
+
+            layout.addWidget(QLabel(label_text + ":"))
+            layout.addWidget(slider)
+            layout.addWidget(val_label)
+
+        # Alpha SpinBox
+        layout.addWidget(QLabel("A:"))
+        self.alpha_spinbox = QDoubleSpinBox()
+        self.alpha_spinbox.setMinimum(0.0)
+        self.alpha_spinbox.setMaximum(1.0)
+        self.alpha_spinbox.setSingleStep(0.05)
+        self.alpha_spinbox.setDecimals(2)
+        self.alpha_spinbox.setValue(self.rgba_floats[3])
+        self.alpha_spinbox.setFixedWidth(50)
+        self.alpha_spinbox.valueChanged.connect(self._update_color_from_sliders)
+        layout.addWidget(self.alpha_spinbox)
+        layout.addStretch(1)
+
+    def set_rgba(self, rgba_floats):
+        """Shows a colour without emitting color_changed_signal."""
+        self.rgba_floats = tuple(rgba_floats)
+        for i, label_text in enumerate(["R", "G", "B"]):
+            slider = self.sliders[label_text]
+            slider.blockSignals(True)
+            slider.setValue(int(self.rgba_floats[i] * 255))
+            slider.blockSignals(False)
+            self.value_labels[label_text].setText(str(slider.value()))
+        self.alpha_spinbox.blockSignals(True)
+        self.alpha_spinbox.setValue(self.rgba_floats[3])
+        self.alpha_spinbox.blockSignals(False)
+
+    def _update_color_from_sliders(self):
+        r = self.sliders["R"].value() / 255.0
+        g = self.sliders["G"].value() / 255.0
+        b = self.sliders["B"].value() / 255.0
+        a = self.alpha_spinbox.value()
+        self.rgba_floats = (r, g, b, a)
+        self.value_labels["R"].setText(str(self.sliders["R"].value()))
+        self.value_labels["G"].setText(str(self.sliders["G"].value()))
+        self.value_labels["B"].setText(str(self.sliders["B"].value()))
+        self.color_changed_signal.emit(self.rgba_floats)
+        if not any(slider.isSliderDown() for slider in self.sliders.values()):
+            self.color_committed_signal.emit(self.rgba_floats)
+
+
+class ColorSwatchDelegate(QStyledItemDelegate):
+    """
+    Paints colour settings as a swatch plus their RGBA values, and creates a
+    ColorEditorWidget only for the row being edited. Other rows use the default delegate.
+    While a slider is dragged, changes go through an EditCoalescer so the model sees at most
+    one preview per frame and a single edit when the drag ends. An editor closed without
+    committing (e.g. Escape during a drag) puts the previewed value back.
+    Text editors are tinted while the typed value is not valid for the setting, or while a
+    rebind's input conflicts with another action.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._editor_height = None
+        self._editing: QPersistentModelIndex | None = None # Row with an open colour editor
+        self.coalescer = EditCoalescer(self)
+
+    def _color_of(self, index):
+        index = source_index(index)
+        model = index.model()
+        if index.column() != 1 or not hasattr(model, "is_color_index") or not model.is_color_index(index):
+            return None
+        return model.node_from_index(index).color
+
+    def paint(self, painter, option, index):
+        rgba = self._color_of(index)
+        if rgba is None:
+            super().paint(painter, option, index)
+            return
+
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, opt.widget)
+
+        rect = option.rect
+        swatch = QRect(rect.left() + SWATCH_MARGIN, rect.center().y() - SWATCH_SIZE // 2, SWATCH_SIZE, SWATCH_SIZE)
+        painter.save()
+        painter.fillRect(swatch, rgba_to_qcolor(rgba))
+        painter.setPen(QPen(opt.palette.color(opt.palette.ColorRole.Mid)))
+        painter.drawRect(swatch.adjusted(0, 0, -1, -1))
+        text_rect = rect.adjusted(SWATCH_SIZE + 2 * SWATCH_MARGIN, 0, 0, 0)
+        selected = bool(opt.state & QStyle.StateFlag.State_Selected)
+        painter.setPen(opt.palette.color(opt.palette.ColorRole.HighlightedText if selected else opt.palette.ColorRole.Text))
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, format_rgba_for_display(rgba))
+        painter.restore()
+
+    def _editor_row_height(self) -> int:
+        if self._editor_height is None:
+            self._editor_height = ColorEditorWidget().sizeHint().height()
+        return self._editor_height
+
+    def sizeHint(self, option, index):
+        # Only the row being edited is as tall as the colour editor
+        hint = super().sizeHint(option, index)
+        if self._editing is not None and self._editing == QPersistentModelIndex(index):
+            return QSize(hint.width(), max(hint.height(), self._editor_row_height()))
+        return hint
+
+    def createEditor(self, parent, option, index):
+        rgba = self._color_of(index)
+        if rgba is None:
+            editor = super().createEditor(parent, option, index)
+            model = source_index(index).model()
+            if isinstance(editor, QLineEdit) and hasattr(model, "conflict_description_for_value"):
+                persistent_index = QPersistentModelIndex(source_index(index))
+                editor.textEdited.connect(
+                    lambda text, e=editor: self._flag_editor(e, persistent_index, text))
+            return editor
+        editor = ColorEditorWidget(initial_rgba_floats=rgba, parent=parent)
+        self._editing = QPersistentModelIndex(index)
+        self.sizeHintChanged.emit(index)
+        persistent_index = QPersistentModelIndex(source_index(index))
+        editor.color_changed_signal.connect(
+            lambda new_rgba: self.coalescer.preview(persistent_index, format_rgba_value(new_rgba)))
+        editor.color_committed_signal.connect(lambda _rgba, e=editor: self.commitData.emit(e))
+        return editor
+
+    def _flag_editor(self, editor: QLineEdit, persistent_index: QPersistentModelIndex, text: str):
+        if not persistent_index.isValid():
+            return
+        model = persistent_index.model()
+        index = model.index(persistent_index.row(), persistent_index.column(), persistent_index.parent())
+        error = model.validation_error(index, text)
+        if error:
+            tooltip = f"Invalid value: {error}"
+        else:
+            conflict = model.conflict_description_for_value(index, text)
+            tooltip = f"Conflict: {conflict}" if conflict else ""
+        editor.setStyleSheet(FLAGGED_EDITOR_STYLE if tooltip else "")
+        editor.setToolTip(tooltip)
+
+    def setEditorData(self, editor, index):
+        if isinstance(editor, ColorEditorWidget):
+            rgba = self._color_of(index)
+            if rgba is not None and tuple(rgba) != tuple(editor.rgba_floats):
+                editor.set_rgba(rgba)
+            return
+        super().setEditorData(editor, index)
+
+    def setModelData(self, editor, model, index):
+        if isinstance(editor, ColorEditorWidget):
+            self.coalescer.commit(source_index(index), format_rgba_value(editor.rgba_floats))
+            return
+        super().setModelData(editor, model, index)
+
+    def destroyEditor(self, editor, index):
+        if isinstance(editor, ColorEditorWidget):
+            # Committed values were already applied by setModelData(); anything still previewed is undone
+            model_index = source_index(index)
+            self.coalescer.discard(model_index)
+            model_index.model().cancel_preview(model_index)
+            self._editing = None
+            self.sizeHintChanged.emit(index)
+        super().destroyEditor(editor, index)
+
+    def updateEditorGeometry(self, editor, option, index):
+        rect = QRect(option.rect)
+        if isinstance(editor, ColorEditorWidget): # Rows share one height; the editor may overlap the next row
+            rect.setHeight(max(rect.height(), self._editor_row_height()))
+        editor.setGeometry(rect)
@@ -0,0 +1,601 @@
+import logging
+import xml.etree.ElementTree as ET
+from typing import Callable, Iterator
+
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont
+
+from ..rebindings_index import RebindingsIndex, iter_actions
+from ..rebindings_variants import RebindingsVariants
+from ..values import COLOR, COLOR_TYPE, Value, ValueType, decode, setting_type
+
+FETCH_BATCH_SIZE = 200  # Rows built per fetchMore() call
+
+log = logging.getLogger(__name__)
+
+# Row kinds
+NODE_CONTAINER = "container"  # Generic XML element shown with its tag (e.g. ObjectStream)
+NODE_SETTING = "setting"  # <Class field=... value=...> in usersettings.javsave
+NODE_ACTIONMAP = "actionmap"
+NODE_ACTION = "action"  # <action> without any <rebind>, shown as N/A
+NODE_REBIND = "rebind"
+NODE_MESSAGE = "message"  # Informational row, e.g. a parse error
+
+USER_SETTINGS_HEADERS = ["Name", "Value"]
+REBINDINGS_HEADERS = ["Action/Setting", "Current Binding", "Default Binding"]
+
+RETICLE_COLOR_FIELDS = ("m_reticletargetcolor", "m_reticlecolor")
+DEFAULT_RETICLE_RGBA = (0.0, 1.0, 0.0, 1.0)
+
+CONFLICT_BACKGROUND = QColor(255, 205, 205) # Rebinds sharing an input with another action in their actionmap
+DISK_CONFLICT_BACKGROUND = QColor(255, 225, 160) # Unsaved values that were also changed on disk
+_UNDECODED = object() # TreeNode value that has not been decoded yet
+_NO_CHILDREN = () # Shared by every row without children; replaced by a list when the first child is added
+
+
+def _decode_or_none(value_type: ValueType, text: str) -> Value | None:
+    try:
+        return decode(value_type, text)
+    except ValueError:
+        return None
+
+
+def rgba_to_qcolor(rgba: tuple[float, float, float, float]) -> QColor:
+    return QColor(int(rgba[0] * 255), int(rgba[1] * 255), int(rgba[2] * 255), int(rgba[3] * 255))
+
+
+class TreeNode:
+    """
+    One row of the tree. Children are built lazily: pending is either a builder
+    (called with this node, returning an iterator of child nodes) or that iterator
+    once fetching has started, and None once all children exist.
+    key is the row's integer key (see ConfigTreeModel.node_for_key()), assigned when the
+    row is inserted. label is the field, container or action name; rebind rows add their
+    device when displayed, so the label can be the element's own attribute string.
+    """
+    __slots__ = ("parent", "row", "key", "kind", "element", "label", "value_type", "_value", "children", "pending")
+
+    def __init__(self, parent: "TreeNode | None", kind: str, element: ET.Element | None, label: str,
+                 pending: Callable[["TreeNode"], Iterator] | Iterator | None = None):
+        self.parent = parent
+        self.row = 0  # Assigned when the node is inserted into its parent
+        self.key = -1
+        self.kind = kind
+        self.element = element
+        self.label = label
+        self.value_type: ValueType | None = None # Type of a setting's value
+        self._value = _UNDECODED
+        self.children: list[TreeNode] | tuple = _NO_CHILDREN
+        self.pending = pending
+
+    @property
+    def value(self) -> Value | None:
+        """The setting's decoded value, None if its text is not valid for the type. Decoded on first use."""
+        if self._value is _UNDECODED:
+            self._value = None if self.value_type is None else _decode_or_none(self.value_type, self.element.get("value", ""))
+        return self._value
+
+    @value.setter
+    def value(self, value: Value | None):
+        self._value = value
+
+    def forget_value(self):
+        """Makes the next use of value decode the element's current text."""
+        self._value = _UNDECODED
+
+    @property
+    def color(self) -> tuple[float, float, float, float] | None:
+        """RGBA of a colour setting with a valid value, shown with a swatch and the colour editor."""
+        return self.value if self.value_type is not None and self.value_type.kind == COLOR else None
+
+
+class ConfigTreeModel(QAbstractItemModel):
+    """
+    Item model backed directly by a parsed ElementTree.
+    Rows are created on demand through canFetchMore()/fetchMore(), so opening a document
+    only costs the rows that are actually expanded and scrolled to.
+
+    Every row gets an integer key when it is inserted, returned for Qt.UserRole. Keys are
+    positions in a list of all rows offset by key_base, so looking one up is a list index, and
+    key_base moves past all earlier keys on every reset, so a key kept from a previous document
+    finds no row instead of the wrong one.
+    """
+    # Emitted after the user edited a value: (index, attribute, old value, new value)
+    value_edited = pyqtSignal(QModelIndex, str, str, str)
+    # Emitted when an edit was not applied because the value is not valid for the setting: (index, reason)
+    value_rejected = pyqtSignal(QModelIndex, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = list(USER_SETTINGS_HEADERS)
+        self.root_node = TreeNode(None, NODE_CONTAINER, None, "")
+        self._message_text = ""
+        self._preview_originals: dict[TreeNode, str] = {} # Value before an in-progress preview
+        self._nodes_by_element: dict[ET.Element, TreeNode] = {} # Rows built so far, by their element
+        self._nodes: list[TreeNode] = [] # Rows built so far, by key - key_base
+        self.key_base = 0
+        self.applied_defaults: list[tuple[ET.Element, str]] = [] # (element, attribute) set to a default while building rows
+        self.rebindings_index: RebindingsIndex | None = None # Set while a rebindings document is shown
+        self.variants: RebindingsVariants | None = None # All rebindings files, when the shown one was loaded with them
+        self.disk_conflicts: dict[ET.Element, str] = {} # Element -> how its unsaved value conflicts with the file on disk
+
+    # --- Loading ---------------------------------------------------------------------------
+
+    def _reset(self, headers: list[str], pending: Callable[[TreeNode], Iterator] | None):
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.root_node = TreeNode(None, NODE_CONTAINER, None, "", pending)
+        self._preview_originals.clear()
+        self._nodes_by_element.clear()
+        self.key_base += len(self._nodes)
+        self._nodes = []
+        self.applied_defaults = []
+        self.rebindings_index = None
+        self.variants = None
+        self.disk_conflicts = {}
+        self.endResetModel()
+
+    def clear(self, headers: list[str] = USER_SETTINGS_HEADERS):
+        self._reset(headers, None)
+
+    def set_message(self, name: str, text: str, headers: list[str] = USER_SETTINGS_HEADERS):
+        """Shows a single informational row instead of a document."""
+        self._reset(headers, None)
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        node = TreeNode(self.root_node, NODE_MESSAGE, None, name)
+        self._register(node)
+        self.root_node.children = [node]
+        self._message_text = text
+        self.endInsertRows()
+
+    def set_rebindings(self, root_element: ET.Element, variants: RebindingsVariants | None = None):
+        self._reset(REBINDINGS_HEADERS, self._iter_actionmap_rows(root_element))
+        self.rebindings_index = RebindingsIndex(root_element)
+        self.variants = variants
+
+    def set_user_settings(self, root_element: ET.Element):
+        self._reset(USER_SETTINGS_HEADERS, self._iter_document_root(root_element))
+
+    # --- Lazy row builders -----------------------------------------------------------------
+    # Each builder is a generator taking the parent node, so rows are only built when fetched.
+
+    def _iter_actionmap_rows(self, root_element: ET.Element):
+        def build(parent: TreeNode):
+            for actionmap_element in root_element.findall('actionmap'):
+                actionmap_name = actionmap_element.get('name', 'Unknown ActionMap')
+                node = TreeNode(parent, NODE_ACTIONMAP, actionmap_element, actionmap_name)
+                node.pending = self._iter_action_rows(actionmap_element)
+                yield node
+        return build
+
+    def _iter_action_rows(self, actionmap_element: ET.Element):
+        def build(parent: TreeNode):
+            for action_element, rebinds in iter_actions(actionmap_element):
+                action_name = action_element.get('name', 'Unknown Action')
+                # Handle multiple rebinds per action if they exist
+                if not rebinds: # Action might not have a rebind, or structure is different
+                    yield TreeNode(parent, NODE_ACTION, action_element, action_name)
+                for rebind_element in rebinds:
+                    yield TreeNode(parent, NODE_REBIND, rebind_element, action_name) # Device added by display_label()
+        return build
+
+    def _iter_document_root(self, root_element: ET.Element):
+        def build(parent: TreeNode):
+            # The root is always shown, even if it is a <Class>
+            root_node = self._make_xml_node(parent, root_element)
+            yield root_node
+            if root_node.kind == NODE_SETTING:
+                # Children of a setting are flattened next to it
+                yield from self._iter_setting_rows(root_element)(parent)
+        return build
+
+    def _make_xml_node(self, parent: TreeNode, element: ET.Element) -> TreeNode:
+        if element.tag == "Class" and "field" in element.attrib:
+            return self._make_setting_node(parent, element)
+        node = TreeNode(parent, NODE_CONTAINER, element, element.tag)
+        node.pending = self._iter_setting_rows(element)
+        return node
+
+    def _iter_setting_rows(self, element: ET.Element):
+        """
+        Flattens the children of a container element:
+        "Class with field" elements become setting rows and their children follow as siblings,
+        "Class" elements without a field are skipped but their children are shown,
+        and any other tag becomes a nested container row.
+        """
+        def walk(parent: TreeNode, current: ET.Element):
+            for child_element in current:
+                if child_element.tag == "Class" and "field" in child_element.attrib:
+                    yield self._make_setting_node(parent, child_element)
+                    yield from walk(parent, child_element)
+                elif child_element.tag == "Class":
+                    yield from walk(parent, child_element)
+                else:
+                    yield self._make_xml_node(parent, child_element)
+
+        def build(parent: TreeNode):
+            yield from walk(parent, element)
+        return build
+
+    def _make_setting_node(self, parent: TreeNode, element: ET.Element) -> TreeNode:
+        field_name = element.get("field")
+        node = TreeNode(parent, NODE_SETTING, element, field_name)
+        if field_name.lower() in RETICLE_COLOR_FIELDS:
+            node.value_type = COLOR_TYPE
+            value = element.get("value", "") # Default to empty string if no value attribute
+            node.value = _decode_or_none(COLOR_TYPE, value)
+            # Default to green if specific reticle color and value is bad/missing
+            if node.value is None:
+                node.value = DEFAULT_RETICLE_RGBA
+                # Update the XML element in memory immediately if we're applying a default
+                element.set('value', COLOR_TYPE.encode(DEFAULT_RETICLE_RGBA))
+                self.applied_defaults.append((element, 'value'))
+                log.info(f"Applied default color {DEFAULT_RETICLE_RGBA} to '{field_name}' due to missing/invalid value: '{value}'.")
+        else:
+            # The value is decoded when first needed, e.g. to paint the swatch of a colour setting
+            node.value_type = setting_type(element)
+        return node
+
+    # --- Node helpers ----------------------------------------------------------------------
+
+    def _register(self, node: TreeNode):
+        node.key = self.key_base + len(self._nodes)
+        self._nodes.append(node)
+        if node.element is not None:
+            self._nodes_by_element[node.element] = node
+
+    def node_from_index(self, index: QModelIndex) -> TreeNode:
+        return index.internalPointer() if index.isValid() else self.root_node
+
+    def node_for_key(self, key: int) -> TreeNode | None:
+        """The row with an integer key from Qt.UserRole, or None if it belongs to an earlier document."""
+        position = key - self.key_base
+        return self._nodes[position] if 0 <= position < len(self._nodes) else None
+
+    def index_for_key(self, key: int, column: int = 0) -> QModelIndex:
+        node = self.node_for_key(key)
+        return QModelIndex() if node is None else self.createIndex(node.row, column, node)
+
+    @property
+    def row_count_built(self) -> int:
+        """Rows built so far in the current document."""
+        return len(self._nodes)
+
+    @staticmethod
+    def display_label(node: TreeNode) -> str:
+        if node.kind == NODE_REBIND:
+            return f"  {node.label} ({node.element.get('device', '')})"
+        if node.kind == NODE_ACTION:
+            return f"  {node.label}"
+        return node.label
+
+    def element_from_index(self, index: QModelIndex) -> ET.Element | None:
+        return self.node_from_index(index).element if index.isValid() else None
+
+    def is_color_index(self, index: QModelIndex) -> bool:
+        return index.isValid() and self.node_from_index(index).color is not None
+
+    def refresh_elements(self, elements):
+        """
+        Updates the rows of elements whose attributes were changed outside the model
+        (e.g. by undo/redo). Rows that have not been built yet read the new values when fetched.
+        """
+        elements = set(elements)
+        if self.rebindings_index is not None:
+            for element in list(elements):
+                elements |= self.rebindings_index.update(element)
+        for element in elements:
+            node = self._nodes_by_element.get(element)
+            if node is None:
+                continue
+            self._preview_originals.pop(node, None)
+            node.forget_value()
+            self.dataChanged.emit(self.createIndex(node.row, 0, node),
+                                  self.createIndex(node.row, len(self.headers) - 1, node))
+
+    def fetch_all(self, parent: QModelIndex = QModelIndex()):
+        """Builds every row below parent, e.g. before filtering on rows that were never expanded."""
+        pending = [self.node_from_index(parent)]
+        while pending:
+            node = pending.pop()
+            if node.pending is not None:
+                node_index = QModelIndex() if node is self.root_node else self.createIndex(node.row, 0, node)
+                while node.pending is not None:
+                    self.fetchMore(node_index)
+            pending.extend(node.children)
+
+    def rows_with_ancestors(self, elements) -> tuple[bytearray, list[QModelIndex]]:
+        """
+        Marks the rows showing elements plus all of their ancestor rows: one byte per row,
+        indexed by key - key_base, set to 1 for marked rows. Also returns the indexes of the
+        ancestor rows, the ones to expand to show every element. Only rows already built are
+        found, see fetch_all().
+        """
+        marked = bytearray(len(self._nodes))
+        is_ancestor = bytearray(len(self._nodes))
+        ancestors = []
+        for element in elements:
+            node = self._nodes_by_element.get(element)
+            if node is None:
+                continue
+            marked[node.key - self.key_base] = 1
+            node = node.parent
+            while node is not None and node is not self.root_node and not is_ancestor[node.key - self.key_base]:
+                marked[node.key - self.key_base] = is_ancestor[node.key - self.key_base] = 1
+                ancestors.append(self.createIndex(node.row, 0, node))
+                node = node.parent
+        return marked, ancestors
+
+    # --- Rebinding conflicts ---------------------------------------------------------------
+
+    def conflict_description(self, element: ET.Element, input_name: str | None = None) -> str:
+        """
+        Describes the other actions in the same actionmap bound to the same device input
+        (the element's current input by default), or returns "" if there are none.
+        """
+        if self.rebindings_index is None:
+            return ""
+        conflicts = self.rebindings_index.conflicts_for(element, input_name)
+        if not conflicts:
+            return ""
+        key = self.rebindings_index.key_of(element)
+        actions = ", ".join(f"'{self.rebindings_index.key_of(other).action}'" for other in conflicts)
+        shown_input = input_name if input_name is not None else element.get('input', '')
+        return f"'{shown_input}' ({key.device}) is also bound to {actions} in '{key.actionmap}'"
+
+    def variants_description(self, element: ET.Element) -> str:
+        """Each other rebindings file's input for the binding when they differ, or "" for a single file."""
+        if self.variants is None or len(self.variants) < 2:
+            return ""
+        key = self.variants.key_of(element)
+        if key is None:
+            return ""
+        inputs = self.variants.inputs(key)
+        if len(set(inputs.values())) == 1:
+            return f"Same in all {len(inputs)} rebindings files"
+        return "Differs between rebindings files:\n" + "\n".join(
+            f"{file.name}: {inputs[file.path] if inputs[file.path] is not None else '(not bound)'}" for file in self.variants.files)
+
+    def validation_error(self, index: QModelIndex, value: str) -> str:
+        """Why value is not valid for the setting at index, or "" if it is (or the row is not a setting)."""
+        if not index.isValid():
+            return ""
+        node = self.node_from_index(index)
+        if node.kind != NODE_SETTING or node.value_type is None:
+            return ""
+        try:
+            node.value_type.decode(value.strip())
+        except ValueError as e:
+            return str(e)
+        return ""
+
+    def conflict_description_for_value(self, index: QModelIndex, value: str) -> str:
+        """Like conflict_description() for a value that is being typed but not applied yet."""
+        if not index.isValid() or self.node_from_index(index).kind != NODE_REBIND:
+            return ""
+        return self.conflict_description(self.node_from_index(index).element, value)
+
+    def set_disk_conflicts(self, conflicts: dict[ET.Element, str]):
+        """Marks the values of elements whose unsaved edits conflict with a change on disk, replacing earlier marks."""
+        changed = self.disk_conflicts.keys() | conflicts.keys()
+        self.disk_conflicts = dict(conflicts)
+        self._refresh_conflict_rows(changed)
+
+    def _refresh_conflict_rows(self, elements):
+        for element in elements:
+            node = self._nodes_by_element.get(element)
+            if node is not None:
+                self.dataChanged.emit(self.createIndex(node.row, 0, node),
+                                      self.createIndex(node.row, len(self.headers) - 1, node))
+
+    def _value_attribute(self, node: TreeNode) -> str | None:
+        if node.kind == NODE_SETTING:
+            return "value"
+        if node.kind == NODE_REBIND:
+            return "input"
+        return None
+
+    # --- QAbstractItemModel ----------------------------------------------------------------
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        parent_node = self.node_from_index(parent)
+        return self.createIndex(row, column, parent_node.children[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None or parent_node is self.root_node:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node_from_index(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.headers)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        return bool(node.children) or node.pending is not None
+
+    def canFetchMore(self, parent):
+        return self.node_from_index(parent).pending is not None
+
+    def fetchMore(self, parent):
+        node = self.node_from_index(parent)
+        if node.pending is None:
+            return
+        if callable(node.pending):
+            node.pending = node.pending(node)
+
+        # Build the next batch detached, then announce it in one insert
+        first_row = len(node.children)
+        batch = []
+        for child in node.pending:
+            child.row = first_row + len(batch)
+            batch.append(child)
+            self._register(child)
+            if len(batch) >= FETCH_BATCH_SIZE:
+                break
+        else:
+            node.pending = None
+
+        if not batch:
+            return
+        self.beginInsertRows(parent, first_row, first_row + len(batch) - 1)
+        if node.children is _NO_CHILDREN:
+            node.children = batch
+        else:
+            node.children.extend(batch)
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            if 0 <= section < len(self.headers):
+                return self.headers[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        node = index.internalPointer()
+        if index.column() == 1 and self._value_attribute(node) is not None:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node: TreeNode = index.internalPointer()
+        column = index.column()
+
+        if role == Qt.ItemDataRole.UserRole:
+            return node.key
+
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if column == 0:
+                return self.display_label(node)
+            if node.kind == NODE_SETTING:
+                return node.element.get("value", "")
+            if node.kind == NODE_REBIND:
+                return node.element.get('input', '') if column == 1 else node.element.get('defaultInput', '')
+            if node.kind == NODE_ACTION:
+                return "N/A"
+            if node.kind == NODE_MESSAGE:
+                return self._message_text if column == 1 else None
+            if node.kind == NODE_CONTAINER and column == 1:
+                text = node.element.text
+                return text.strip() if text and text.strip() else None
+            return None
+
+        if role == Qt.ItemDataRole.FontRole and column == 0 and node.kind == NODE_ACTIONMAP:
+            font = QFont()
+            font.setBold(True)
+            return font
+
+        if (self.disk_conflicts and column == 1 and role in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole)
+                and node.element in self.disk_conflicts):
+            return DISK_CONFLICT_BACKGROUND if role == Qt.ItemDataRole.BackgroundRole else self.disk_conflicts[node.element]
+
+        if node.kind == NODE_REBIND and role in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole):
+            conflict = self.conflict_description(node.element)
+            if role == Qt.ItemDataRole.ToolTipRole:
+                tips = [f"Conflict: {conflict}"] if conflict else []
+                variants = self.variants_description(node.element) # Only computed on hover
+                if variants:
+                    tips.append(variants)
+                return "\n".join(tips) or None
+            return CONFLICT_BACKGROUND if conflict and column == 1 else None
+
+        if role == Qt.ItemDataRole.DecorationRole and column == 0 and node.color is not None:
+            return rgba_to_qcolor(node.color) # The view paints a small swatch for a QColor decoration
+
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or index.column() != 1:
+            return False
+        node: TreeNode = index.internalPointer()
+        attribute = self._value_attribute(node)
+        if attribute is None:
+            return False
+
+        # After a preview, the edit is reported relative to the value from before the preview
+        old_value = self._preview_originals.get(node)
+        if old_value is None:
+            old_value = node.element.get(attribute, "")
+        new_value = str(value)
+        if node.kind == NODE_SETTING:
+            try:
+                new_value = self._encoded_setting(node, old_value, new_value.strip())
+            except ValueError as e:
+                log.warning("Rejected value '%s' for '%s': %s", value, node.label, e)
+                self.value_rejected.emit(index, f"'{node.label}' was not changed: {e}")
+                return False
+        self._preview_originals.pop(node, None)
+        self._apply_value(index, node, attribute, new_value)
+        if new_value == old_value:
+            return False
+        self.value_edited.emit(index, attribute, old_value, new_value)
+        return True
+
+    @staticmethod
+    def _encoded_setting(node: TreeNode, old_value: str, text: str) -> str:
+        """
+        The text to store for a setting edited to text: the old text if the typed value did not
+        change (so "0.5" typed over "0.5000000" is not an edit), otherwise the encoded value.
+        Raises ValueError for text that is not valid for the setting's type.
+        """
+        new_text = node.value_type.encode(node.value_type.decode(text))
+        old_typed = _decode_or_none(node.value_type, old_value)
+        if old_typed is not None and node.value_type.encode(old_typed) == new_text:
+            return old_value
+        return new_text
+
+    def preview_value(self, index: QModelIndex, value: str) -> bool:
+        """
+        Shows an in-progress value, e.g. while a colour slider is being dragged.
+        The XML and view are updated but no edit is reported; a later setData() reports a
+        single edit from the value before the first preview to the final value.
+        """
+        if not index.isValid() or index.column() != 1:
+            return False
+        node: TreeNode = index.internalPointer()
+        attribute = self._value_attribute(node)
+        if attribute is None:
+            return False
+        self._preview_originals.setdefault(node, node.element.get(attribute, ""))
+        self._apply_value(index, node, attribute, value)
+        return True
+
+    def cancel_preview(self, index: QModelIndex) -> bool:
+        """Puts back the value from before preview_value(), e.g. when the editor closed without committing."""
+        if not index.isValid():
+            return False
+        node: TreeNode = index.internalPointer()
+        original = self._preview_originals.pop(node, None)
+        attribute = self._value_attribute(node)
+        if original is None or attribute is None:
+            return False
+        self._apply_value(index, node, attribute, original)
+        return True
+
+    def _apply_value(self, index: QModelIndex, node: TreeNode, attribute: str, value: str):
+        if node.element.get(attribute, "") == value:
+            return
+        node.element.set(attribute, value)
+        if node.kind == NODE_REBIND and self.rebindings_index is not None:
+            # Rows that gained or lost a conflict with this one are repainted as well
+            self._refresh_conflict_rows(self.rebindings_index.update(node.element) - {node.element})
+        was_color = node.color is not None
+        node.forget_value()
+        if was_color or node.color is not None: # The swatch in the name column changes too
+            self.dataChanged.emit(index.siblingAtColumn(0), index)
+        else:
+            self.dataChanged.emit(index, index)
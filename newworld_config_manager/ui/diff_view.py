@@ -0,0 +1,55 @@
+from PyQt6.QtGui import QBrush, QColor
+from PyQt6.QtWidgets import QDialog, QDialogButtonBox, QHeaderView, QLabel, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget
+
+from ..xml_diff import ADDED, CHANGED, REMOVED, FileDiff
+
+COLUMNS = ("Setting", "Attribute")
+# Translucent so they work with light and dark styles
+KIND_COLORS = {ADDED: QColor(60, 180, 75, 70), REMOVED: QColor(230, 25, 75, 70), CHANGED: QColor(255, 200, 0, 70)}
+FILE_STATUS_TEXT = {"identical": "no differences", CHANGED: "{count} difference(s)", ADDED: "only in {new}",
+                    REMOVED: "only in {old}", "unreadable": "could not be compared: {error}"}
+
+
+class DiffDialog(QDialog):
+    """Side-by-side view of the field-level differences between two sets of config files."""
+
+    def __init__(self, file_diffs: list[FileDiff], old_label: str, new_label: str, parent: QWidget | None = None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Compare {old_label} with {new_label}")
+        self.resize(900, 500)
+
+        layout = QVBoxLayout(self)
+        total = sum(len(file_diff.changes) for file_diff in file_diffs)
+        layout.addWidget(QLabel(f"{total} difference(s) in {len(file_diffs)} file(s). "
+                                f"Left: {old_label}. Right: {new_label}."))
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(COLUMNS + (old_label, new_label))
+        self.tree.setUniformRowHeights(True)
+        self.tree.setAlternatingRowColors(False) # Rows are coloured by kind of change
+        header = self.tree.header()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.tree)
+
+        for file_diff in file_diffs:
+            status = FILE_STATUS_TEXT[file_diff.status].format(count=len(file_diff.changes), old=old_label,
+                                                              new=new_label, error=file_diff.error)
+            file_item = QTreeWidgetItem(self.tree, [f"{file_diff.rel_path}: {status}"])
+            file_item.setFirstColumnSpanned(True)
+            font = file_item.font(0)
+            font.setBold(True)
+            file_item.setFont(0, font)
+            for change in file_diff.changes:
+                item = QTreeWidgetItem(file_item, [change.path, change.attribute or f"({change.kind})",
+                                                   change.old or "", change.new or ""])
+                item.setToolTip(0, change.describe())
+                brush = QBrush(KIND_COLORS[change.kind])
+                for column in range(self.tree.columnCount()):
+                    item.setBackground(column, brush)
+            file_item.setExpanded(file_diff.status == CHANGED)
+        for column in range(1, self.tree.columnCount()):
+            self.tree.resizeColumnToContents(column)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
@@ -0,0 +1,293 @@
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from PyQt6.QtCore import QModelIndex
+from PyQt6.QtWidgets import QTreeView, QVBoxLayout, QWidget
+
+from ..external_changes import ExternalChanges
+from ..instrumentation import span
+from ..journal import Change, EditJournal
+from ..presets import (Preset, apply_bindings, apply_settings, capture_bindings, capture_settings, format_binding_key,
+                       index_settings)
+from ..rebindings_index import index_bindings
+from ..rebindings_variants import RebindingsVariants
+from ..search_index import SearchIndex
+from .color_delegate import ColorSwatchDelegate
+from .config_tree_model import NODE_CONTAINER, ConfigTreeModel
+from .search_filter import SearchFilterProxyModel
+
+DOC_REBINDINGS = "rebindings"
+DOC_USER_SETTINGS = "user_settings"
+DOCUMENT_TITLES = {DOC_REBINDINGS: "Rebindings", DOC_USER_SETTINGS: "User settings"}
+
+
+class DocumentView(QWidget):
+    """
+    One loaded config file with everything that belongs to it: the parsed XML, its search
+    index, its undo history and dirty values, and its own model, search proxy and tree view.
+    The main window keeps one per open file in a tab, so switching files only shows another
+    widget; nothing is read, parsed or rebuilt.
+    """
+
+    def __init__(self, kind: str, parent: QWidget | None = None):
+        super().__init__(parent)
+        self.kind = kind
+        self.filepath: str | None = None
+        self.root: ET.Element | None = None
+        self.search_index: SearchIndex | None = None
+        self.variants: RebindingsVariants | None = None # Every rebindings file, merged; root is one of them
+        self.search_text = "" # Query the proxy currently filters by
+        self._match_count = 0
+        self.search_matches: list[ET.Element] = [] # Elements matching search_text
+        self._preset_index: dict | None = None # Path -> elements for applying presets, see presets.py
+        self.journal = EditJournal() # Undo/redo history and dirty values of this document
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        # The model builds rows lazily from the parsed XML, the proxy hides rows that do not match the search
+        self.model = ConfigTreeModel(self)
+        self.search_proxy = SearchFilterProxyModel(self)
+        self.search_proxy.setSourceModel(self.model)
+        self.tree_view = QTreeView()
+        self.tree_view.setUniformRowHeights(True)
+        self.tree_view.setModel(self.search_proxy)
+        # Colour settings are painted as swatches; the slider editor only exists for the row being edited
+        self.tree_view.setItemDelegate(ColorSwatchDelegate(self.tree_view))
+        layout.addWidget(self.tree_view)
+
+    @property
+    def title(self) -> str:
+        return DOCUMENT_TITLES[self.kind]
+
+    @property
+    def filename(self) -> str:
+        return Path(self.filepath).name if self.filepath else ""
+
+    def tab_text(self) -> str:
+        return f"{self.title}: {self.filename}" + (" *" if self.is_dirty else "")
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.journal.is_dirty
+
+    @property
+    def other_files(self) -> int:
+        """How many other rebindings files were loaded with this one."""
+        return len(self.variants) - 1 if self.variants is not None and self.root is not None else 0
+
+    def watched_files(self) -> list[str]:
+        """The files the document was loaded from: its own and, for rebindings, the other rebindings files."""
+        if self.root is None:
+            return []
+        return [file.path for file in self.variants.files] if self.variants is not None else [self.filepath]
+
+    def root_of(self, path: str) -> ET.Element | None:
+        """The tree of one of watched_files()."""
+        if path == self.filepath:
+            return self.root
+        return self.variants.root_of(path) if self.variants is not None else None
+
+    def describe_element(self, element: ET.Element) -> str:
+        """A short name for a setting or binding, e.g. in messages."""
+        key = self.variants.key_of(element) if self.variants is not None else None
+        if key is not None:
+            return format_binding_key(key)
+        return element.get('field') or element.get('name') or element.tag
+
+    def changed_attributes(self) -> set[tuple[ET.Element, str]]:
+        """
+        The values a save rewrites: the user's edits and the defaults the model filled in while
+        building rows (e.g. a missing reticle colour). The rest of the file is kept byte for byte.
+        """
+        return set(self.journal.dirty_attributes()) | set(self.model.applied_defaults)
+
+    def files_to_save(self) -> list[tuple[str, ET.Element, set[tuple[ET.Element, str]]]]:
+        """
+        (path, root, changed attributes) of each file a save writes: this document's file, and
+        the other rebindings files that edits to all files actually changed. Other files without
+        changes are not written.
+        """
+        changed_attributes = self.changed_attributes()
+        if not self.other_files:
+            return [(self.filepath, self.root, changed_attributes)]
+        by_file = self.variants.changes_by_file(changed_attributes)
+        own_changes = by_file.pop(self.filepath, set())
+        files = [(path, self.variants.root_of(path), changed) for path, changed in by_file.items()]
+        if own_changes or not files:
+            files.append((self.filepath, self.root, own_changes)) # Written last, so it stays the newest file
+        return files
+
+    def show_document(self, filepath: str, root: ET.Element | None, search_index: SearchIndex | None,
+                      variants: RebindingsVariants | None = None):
+        """
+        Shows a parsed file (root None shows an error row instead) and starts a fresh history.
+        variants, for rebindings, holds every rebindings file including this one.
+        """
+        self.filepath, self.root, self.search_index, self.variants = filepath, root, search_index, variants
+        self.journal.clear()
+        self.search_text = ""
+        self.search_matches = []
+        self._preset_index = None
+        self.search_proxy.set_visible_rows(None)
+        if root is None:
+            self.model.set_message("Error", f"Could not parse {self.filename} as XML.")
+        elif self.kind == DOC_REBINDINGS:
+            self._populate_rebindings(root)
+        else:
+            self._populate_user_settings(root)
+
+    def _populate_rebindings(self, root_element: ET.Element):
+        """
+        Columns: "Action/Setting", "Current Binding", "Default Binding".
+        Every action map is expanded.
+        """
+        with span("populate tree", kind="rebindings"):
+            self.model.set_rebindings(root_element, self.variants)
+            root_index = QModelIndex()
+            while self.model.canFetchMore(root_index):
+                self.model.fetchMore(root_index)
+            self._expand_default_rows()
+            for i in range(self.model.columnCount()):
+                self.tree_view.resizeColumnToContents(i)
+
+    def _populate_user_settings(self, root_element: ET.Element):
+        """
+        Columns: "Name", "Value".
+        The root and the containers directly below it are expanded; deeper rows are built when expanded.
+        """
+        with span("populate tree", kind="user settings"):
+            self.model.set_user_settings(root_element)
+            self.model.fetchMore(QModelIndex())
+            self._expand_default_rows()
+            self.tree_view.setColumnWidth(0, 250) # Name column
+            self.tree_view.setColumnWidth(1, 420) # Value column (wide enough for the colour editor)
+
+    def _expand_source_index(self, index: QModelIndex):
+        self.tree_view.expand(self.search_proxy.mapFromSource(index))
+
+    def _expand_default_rows(self):
+        """Expands the rows open after loading: every action map, or the root and its containers."""
+        root_index = QModelIndex()
+        for row in range(self.model.rowCount(root_index)):
+            top_index = self.model.index(row, 0, root_index)
+            self._expand_source_index(top_index)
+            if self.kind == DOC_REBINDINGS:
+                continue
+            for child_row in range(self.model.rowCount(top_index)):
+                child_index = self.model.index(child_row, 0, top_index)
+                if self.model.node_from_index(child_index).kind == NODE_CONTAINER:
+                    self._expand_source_index(child_index)
+
+    def apply_search(self, text: str) -> int | None:
+        """
+        Filters the tree to rows matching every search term, keeping their parents visible.
+        Returns the number of matches, or None when the search is cleared. Searching for the
+        text the tree is already filtered by does nothing, so switching tabs does not search again.
+        """
+        if not text.strip() or self.search_index is None:
+            self.search_text = ""
+            self.search_matches = []
+            if self.search_proxy.is_filtering:
+                self.tree_view.collapseAll()
+                self.search_proxy.set_visible_rows(None)
+                self._expand_default_rows()
+            return None
+        if text == self.search_text:
+            return self._match_count
+        with span("search", query=text) as info:
+            self.model.fetch_all()
+            for element, _attribute in self.model.applied_defaults: # Values the model changed while building rows
+                self.search_index.update(element)
+            matches = self.search_index.search(text)
+            visible_rows, ancestors = self.model.rows_with_ancestors(matches)
+            # Collapsed first, so changing the filter does not lay out the rows expanded for the last query
+            self.tree_view.collapseAll()
+            self.search_proxy.set_visible_rows(visible_rows)
+            for index in ancestors:
+                self._expand_source_index(index)
+            info["matches"] = len(matches)
+        self.search_text, self._match_count, self.search_matches = text, len(matches), matches
+        return self._match_count
+
+    def record_edit(self, index: QModelIndex, attribute: str, old_value: str, new_value: str,
+                    all_files: bool = False) -> ET.Element:
+        """
+        Records an edit the model already applied to the XML and returns the edited element.
+        With all_files, a binding's new input is also set in the other rebindings files that have
+        the binding; the whole edit is one undo step.
+        """
+        element = self.model.element_from_index(index)
+        changes = [Change(element, attribute, old_value, new_value)]
+        if all_files and attribute == 'input' and self.other_files:
+            key = self.variants.key_of(element)
+            if key is not None:
+                changes += self.variants.set_input(key, new_value, skip=element)
+        self.journal.record_batch(changes)
+        if self.search_index is not None:
+            self.search_index.update(element)
+        return element
+
+    def apply_external_changes(self, changes: ExternalChanges):
+        """
+        Shows values merged in from a file that changed on disk (see external_changes.py): moves
+        the save point of edited values the file changed too, and marks the conflicting ones.
+        """
+        self.journal.rebase_saved(changes.saved_values)
+        if changes.conflicts:
+            conflicts = dict(self.model.disk_conflicts)
+            for conflict in changes.conflicts:
+                conflicts[conflict.element] = f"{conflict.attribute} {conflict.describe()}. Save keeps your value, Reset takes the one on disk."
+            self.model.set_disk_conflicts(conflicts)
+        self.refresh_elements(changes.changed_elements())
+        self.resolve_disk_conflicts()
+
+    def resolve_disk_conflicts(self):
+        """Stops marking conflicts with the file on disk whose edits were saved, reset or undone."""
+        if self.model.disk_conflicts:
+            edited = self.journal.dirty_elements()
+            self.model.set_disk_conflicts({element: text for element, text in self.model.disk_conflicts.items() if element in edited})
+
+    def preset_values(self) -> dict:
+        """
+        The settings (field -> value) or bindings (BindingKey -> input) to export as a preset: those
+        of the rows matching the search, including everything below a matching group or action, or
+        all of them when there is no search. Unsaved edits are included.
+        """
+        elements = None
+        if self.search_text:
+            elements = [element for match in self.search_matches for element in match.iter()]
+        if self.kind == DOC_REBINDINGS:
+            return capture_bindings(self.root, elements)
+        return capture_settings(elements if elements is not None else self.root.iter("Class"))
+
+    def apply_preset(self, preset: Preset, all_files: bool = False) -> tuple[list[Change], list]:
+        """
+        Applies the preset's settings or bindings, whichever this document holds, as one undo step.
+        Paths are looked up in an index of the document that is built on first use and kept until
+        another file is shown. With all_files, bindings are also set in the other rebindings files.
+        Returns the changes and the paths that were not found. Raises ValueError for invalid
+        values, before anything is changed.
+        """
+        if self.kind == DOC_REBINDINGS:
+            if self._preset_index is None: # The rebindings files were indexed when they were loaded
+                primary = self.variants.primary if self.variants is not None else None
+                self._preset_index = primary.bindings if primary is not None and primary.root is self.root else index_bindings(self.root)
+            changes, missing = apply_bindings(self.root, preset.bindings, self._preset_index)
+            if all_files and self.other_files:
+                for key, input_name in preset.bindings.items():
+                    changes += self.variants.set_input(key, input_name)
+                missing = [key for key in missing if not self.variants.sources(key)]
+        else:
+            if self._preset_index is None:
+                self._preset_index = index_settings(self.root)
+            changes, missing = apply_settings(self.root, preset.settings, self._preset_index)
+        self.journal.record_batch(changes)
+        self.refresh_elements({change.element for change in changes})
+        return changes, missing
+
+    def refresh_elements(self, elements):
+        """Updates the rows and search index entries of elements whose values changed in the XML."""
+        self.model.refresh_elements(elements)
+        if self.search_index is not None:
+            for element in elements:
+                self.search_index.update(element)
@@ -0,0 +1,46 @@
+from PyQt6.QtCore import QObject, QPersistentModelIndex, QTimer
+
+FRAME_INTERVAL_MS = 16 # Roughly one update per displayed frame
+
+
+class EditCoalescer(QObject):
+    """
+    Combines rapid value changes (e.g. slider ticks) into at most one model update per frame.
+    preview() only remembers the latest value per index; the timer pushes those values to the
+    model with preview_value(). commit() flushes the pending value and applies the final one with
+    setData(), which reports a single edit for the whole drag.
+    """
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self._pending: dict[QPersistentModelIndex, str] = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(FRAME_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def preview(self, index, value: str):
+        self._pending[QPersistentModelIndex(index)] = value
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def commit(self, index, value: str):
+        persistent_index = QPersistentModelIndex(index)
+        self._pending.pop(persistent_index, None)
+        if persistent_index.isValid():
+            persistent_index.model().setData(_to_model_index(persistent_index), value)
+
+    def discard(self, index):
+        """Forgets the pending value of index, e.g. when its editor closed without committing."""
+        self._pending.pop(QPersistentModelIndex(index), None)
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for persistent_index, value in pending.items():
+            if persistent_index.isValid():
+                persistent_index.model().preview_value(_to_model_index(persistent_index), value)
+
+
+def _to_model_index(persistent_index: QPersistentModelIndex):
+    return persistent_index.model().index(persistent_index.row(), persistent_index.column(),
+                                          persistent_index.parent())
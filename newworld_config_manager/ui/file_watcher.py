@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+DEBOUNCE_MS = 500
+
+
+class ConfigFileWatcher(QObject):
+    """
+    Watches the open config files for writes by other programs, such as the game saving its
+    settings. The watcher is notified by the OS (inotify, ReadDirectoryChangesW, ...), so it
+    costs nothing while the files are left alone. A save usually arrives as several
+    notifications, and a file replaced by renaming a temporary file over it is only reported
+    on its folder, so notifications are collected and files_changed is emitted once the folder
+    has been quiet for DEBOUNCE_MS. The files reported may turn out unchanged (e.g. the
+    tool's own saves); the receiver checks them, see ConfigParser.file_changed_on_disk().
+    """
+    files_changed = pyqtSignal(list) # Watched paths that may have changed
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self._files: set[str] = set()
+        self._pending: set[str] = set()
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self._emit_pending)
+
+    def set_files(self, paths) -> None:
+        """Watches exactly these files, and their folders to notice files replaced by a rename."""
+        files = {str(path) for path in paths}
+        folders = {str(Path(path).parent) for path in files}
+        stale = [path for path in self._watcher.files() + self._watcher.directories() if path not in files | folders]
+        if stale:
+            self._watcher.removePaths(stale)
+        self._files = files
+        self._pending &= files
+        self._watch_existing()
+        missing_folders = [folder for folder in folders if folder not in self._watcher.directories() and Path(folder).is_dir()]
+        if missing_folders:
+            self._watcher.addPaths(missing_folders)
+
+    def retry(self, paths) -> None:
+        """Reports paths again after the next quiet period, e.g. when they could not be handled yet."""
+        self._pending.update(path for path in paths if path in self._files)
+        if self._pending:
+            self._timer.start()
+
+    def _watch_existing(self):
+        # A replaced or deleted file drops out of the watcher; it is watched again once it exists
+        missing = [path for path in self._files if path not in self._watcher.files() and Path(path).is_file()]
+        if missing:
+            self._watcher.addPaths(missing)
+
+    def _on_file_changed(self, path: str):
+        if path in self._files:
+            self._pending.add(path)
+            self._timer.start()
+
+    def _on_directory_changed(self, folder: str):
+        folder_files = [path for path in self._files if str(Path(path).parent) == folder]
+        if folder_files:
+            self._pending.update(folder_files)
+            self._timer.start()
+
+    def _emit_pending(self):
+        self._watch_existing()
+        paths, self._pending = sorted(self._pending), set()
+        if paths:
+            self.files_changed.emit(paths)
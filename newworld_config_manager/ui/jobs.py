@@ -0,0 +1,119 @@
+import logging
+from typing import Any, Callable
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from ..instrumentation import span
+from ..progress import OperationCancelled, Progress
+
+
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+log = logging.getLogger(__name__)
+
+
+class JobSignals(QObject):
+    """Signals emitted by a Job. Created on the GUI thread so connected slots run there."""
+    progress = pyqtSignal(int, int, str)  # done, total (0 = unknown), message
+    finished = pyqtSignal(str, object)  # status, result value or error message
+
+
+class Job(QRunnable):
+    """
+    Runs a function on a worker thread.
+    The function is called with a keyword argument progress=Progress, which it can use
+    to report progress and to notice cancellation.
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Any], *args, **kwargs):
+        super().__init__()
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self.progress = Progress(self.signals.progress.emit)
+        self.callbacks: dict[str, Callable | None] = {}
+        self.setAutoDelete(False)  # The JobRunner keeps the job until it has finished
+
+    def run(self):
+        try:
+            with span(f"job: {self.name}"):
+                result = self.fn(*self.args, progress=self.progress, **self.kwargs)
+        except OperationCancelled:
+            self.signals.finished.emit(JOB_CANCELLED, None)
+        except Exception as e:
+            log.exception("Job '%s' failed", self.name)
+            self.signals.finished.emit(JOB_FAILED, str(e))
+        else:
+            self.signals.finished.emit(JOB_SUCCEEDED, result)
+
+
+class JobRunner(QObject):
+    """
+    Runs at most one Job at a time on a QThreadPool, so conflicting operations
+    (e.g. a save while a restore is replacing the folder) cannot overlap.
+    """
+    busy_changed = pyqtSignal(bool)
+    job_started = pyqtSignal(str, bool)  # name, cancellable
+    job_progress = pyqtSignal(int, int, str)
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.current_job: Job | None = None
+        self.current_job_cancellable = False
+
+    @property
+    def is_busy(self) -> bool:
+        return self.current_job is not None
+
+    def start(self, name: str, fn: Callable[..., Any], *args,
+              on_success: Callable[[Any], None] | None = None,
+              on_failure: Callable[[str], None] | None = None,
+              on_cancel: Callable[[], None] | None = None,
+              cancellable: bool = False, **kwargs) -> bool:
+        """
+        Starts fn(*args, progress=..., **kwargs) on the worker thread.
+        The callbacks run on the GUI thread after the runner is idle again, so they may
+        start a follow-up job. Returns False if another job is still running.
+        """
+        if self.current_job is not None:
+            log.warning("Cannot start '%s': '%s' is still running.", name, self.current_job.name)
+            return False
+
+        job = Job(name, fn, *args, **kwargs)
+        job.callbacks = {JOB_SUCCEEDED: on_success, JOB_FAILED: on_failure, JOB_CANCELLED: on_cancel}
+        # Connected to bound methods of this QObject so the slots are queued onto the GUI thread
+        job.signals.progress.connect(self.job_progress)
+        job.signals.finished.connect(self._on_job_finished)
+
+        self.current_job = job
+        self.current_job_cancellable = cancellable
+        self.job_started.emit(name, cancellable)
+        self.busy_changed.emit(True)
+        self.thread_pool.start(job)
+        return True
+
+    def cancel(self) -> None:
+        if self.current_job is not None and self.current_job_cancellable:
+            self.current_job.progress.cancel()
+
+    def wait_for_done(self) -> None:
+        """Blocks until the running job, if any, has finished. Used when the window closes."""
+        self.thread_pool.waitForDone()
+
+    def _on_job_finished(self, status: str, payload: Any):
+        callback = self.current_job.callbacks.get(status) if self.current_job else None
+        self.current_job = None
+        self.current_job_cancellable = False
+        self.busy_changed.emit(False)
+        if callback is None:
+            return
+        if status == JOB_CANCELLED:
+            callback()
+        else:
+            callback(payload)
@@ -0,0 +1,37 @@
+from PyQt6.QtCore import QModelIndex, QSortFilterProxyModel
+
+
+class SearchFilterProxyModel(QSortFilterProxyModel):
+    """
+    Shows only the rows of a ConfigTreeModel that are marked in a precomputed row mask
+    (search matches and their ancestors, see ConfigTreeModel.rows_with_ancestors()), so
+    accepting a row is a byte lookup by its key rather than a text comparison.
+    With no mask, every row is shown.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._visible_rows: bytearray | None = None
+
+    def setSourceModel(self, source_model):
+        super().setSourceModel(source_model)
+        # A new document invalidates the mask; the owner applies the search again
+        source_model.modelAboutToBeReset.connect(self._forget_visible_rows)
+
+    def _forget_visible_rows(self):
+        self._visible_rows = None
+
+    @property
+    def is_filtering(self) -> bool:
+        return self._visible_rows is not None
+
+    def set_visible_rows(self, visible_rows: bytearray | None):
+        self._visible_rows = visible_rows
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        if self._visible_rows is None:
+            return True
+        model = self.sourceModel()
+        position = model.node_from_index(source_parent).children[source_row].key - model.key_base
+        return position < len(self._visible_rows) and bool(self._visible_rows[position])
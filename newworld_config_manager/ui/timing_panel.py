@@ -0,0 +1,87 @@
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import (QDockWidget, QFileDialog, QHBoxLayout, QHeaderView, QMessageBox, QPushButton, QTableWidget,
+                             QTableWidgetItem, QVBoxLayout, QWidget)
+
+from ..instrumentation import Tracer
+
+REFRESH_INTERVAL_MS = 500
+COLUMNS = ("Span", "Count", "Last (ms)", "Average (ms)", "Max (ms)", "Total (ms)")
+
+
+class TimingPanel(QDockWidget):
+    """
+    Dock showing the totals of every instrumentation span (parse, populate, save, ...).
+    Spans finish on worker threads too, so the table polls the tracer while it is visible
+    instead of being signalled.
+    """
+
+    def __init__(self, tracer: Tracer, parent: QWidget | None = None):
+        super().__init__("Timings", parent)
+        self.setObjectName("timing_panel")
+        self.tracer = tracer
+        self._shown_generation = -1
+
+        content = QWidget()
+        layout = QVBoxLayout(content)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.tracer.clear)
+        button_layout.addWidget(clear_button)
+        export_button = QPushButton("Export Trace...")
+        export_button.clicked.connect(self.handle_export)
+        button_layout.addWidget(export_button)
+        button_layout.addStretch(1)
+        layout.addLayout(button_layout)
+        self.setWidget(content)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_INTERVAL_MS)
+        self._timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self._on_visibility_changed)
+
+    def _on_visibility_changed(self, visible: bool):
+        if visible:
+            self.refresh()
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def refresh(self):
+        if self.tracer.generation == self._shown_generation:
+            return
+        self._shown_generation = self.tracer.generation
+        totals = self.tracer.totals()
+        self.table.setSortingEnabled(False) # Sorting while filling would move rows under us
+        self.table.setRowCount(len(totals))
+        for row, (name, span_totals) in enumerate(sorted(totals.items())):
+            values = (span_totals.count, span_totals.last_ns / 1e6, span_totals.total_ns / span_totals.count / 1e6,
+                      span_totals.max_ns / 1e6, span_totals.total_ns / 1e6)
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for column, value in enumerate(values, start=1):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, value if column == 1 else round(value, 2)) # Sorts numerically
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+
+    def handle_export(self):
+        path, _selected_filter = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "nwcm_trace.json",
+                                                             "Trace files (*.json)")
+        if not path:
+            return
+        try:
+            count = self.tracer.export_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Failed", f"Could not write {path}:\n{e}")
+            return
+        QMessageBox.information(self, "Trace Exported", f"{count} span(s) written to:\n{path}\n\n"
+                                "Open it in chrome://tracing or https://ui.perfetto.dev.")
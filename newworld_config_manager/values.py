@@ -0,0 +1,245 @@
+"""
+Typed values of usersettings.javsave settings.
+
+A setting is stored as text, e.g. <Class name="Color" field="m_reticleColor" value="0 1 0 1"/>,
+and its Class name tells what the text holds. setting_type() maps the Class name to a ValueType
+(bool, int, float, double, colour, vector or string, with the range the value must stay within),
+and decode() turns the text into a plain Python value once: a bool, an int, a float, a tuple of
+floats or a str. Decoded values are cached by text, so the thousands of identical "true" or
+"0.0000000" values of a document are parsed once. Edits and bulk changes compare and validate
+these typed values and only encode() the ones that actually change.
+
+The game stores floats as 32-bit floats, so encode() writes the shortest decimal text that reads
+back as the same 32-bit float: 128/255 becomes "0.5019608" rather than "0.5019607843137255".
+Doubles keep every digit of a 64-bit float (repr()), and whole numbers are Python ints, so
+64-bit integers are exact. A setting of an unknown Class is never narrowed: whole numbers are
+unbounded ints and other numbers are doubles.
+"""
+import functools
+import math
+import struct
+import sys
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from decimal import Decimal
+
+BOOL = "bool"
+INT = "int"
+FLOAT = "float" # 32-bit
+DOUBLE = "double" # 64-bit
+COLOR = "color"
+VECTOR = "vector"
+STRING = "string"
+
+FLOAT32_MAX = 3.4028234663852886e38
+FLOAT64_MAX = sys.float_info.max
+BOOL_TEXT = {"true": True, "false": False, "1": True, "0": False}
+DECODE_CACHE_SIZE = 4096
+
+# Decoded setting value: bool, int, float, tuple[float, ...] for colours and vectors, or str
+Value = bool | int | float | tuple[float, ...] | str
+
+
+def float32(value: float) -> float:
+    """The value rounded to the nearest 32-bit float. Raises OverflowError outside its range."""
+    return struct.unpack("<f", struct.pack("<f", value))[0]
+
+
+def format_float(value: float) -> str:
+    """The shortest decimal text, without an exponent, that reads back as the same 32-bit float."""
+    return _format_float(value + 0.0) # -0.0 is written as 0.0; the cache would not tell them apart anyway
+
+
+@functools.lru_cache(maxsize=DECODE_CACHE_SIZE)
+def _format_float(value: float) -> str:
+    target = float32(value)
+    for digits in range(1, 10): # 9 significant digits always round-trip a 32-bit float
+        text = f"{target:.{digits}g}"
+        if float32(float(text)) == target:
+            break
+    text = format(Decimal(text), "f")
+    return text if "." in text else text + ".0"
+
+
+@dataclass(frozen=True)
+class ValueType:
+    """What a setting's text holds and the range its numbers must be in (inclusive, None = unbounded)."""
+    kind: str
+    components: int = 1 # Numbers in a colour or vector
+    minimum: float | None = None
+    maximum: float | None = None
+
+    def decode(self, text: str) -> Value:
+        """The typed value of a setting's text. Raises ValueError for text that is not a valid value."""
+        return decode(self, text)
+
+    def encode(self, value: Value) -> str:
+        """The text stored for a typed value. Raises ValueError for values outside the type's range."""
+        value = self.coerce(value)
+        if self.kind == BOOL:
+            return "true" if value else "false"
+        if self.kind == FLOAT:
+            return format_float(value)
+        if self.kind == DOUBLE:
+            return repr(value + 0.0)
+        if self.kind in (COLOR, VECTOR):
+            return " ".join(format_float(part) for part in value)
+        return str(value)
+
+    def coerce(self, value) -> Value:
+        """
+        Converts text or a Python value (e.g. a list of numbers from a JSON preset) to this type
+        and validates it. Raises ValueError.
+        """
+        if isinstance(value, str):
+            return self.decode(value)
+        if self.kind == STRING:
+            raise ValueError(f"expected text, got {value!r}")
+        if self.kind == BOOL:
+            if not isinstance(value, bool):
+                raise ValueError(f"expected true or false, got {value!r}")
+            return value
+        if self.kind == INT:
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"expected a whole number, got {value!r}")
+            return self._checked(value)
+        if self.kind in (FLOAT, DOUBLE):
+            return self._checked_float(value)
+        if not isinstance(value, (list, tuple)) or len(value) != self.components:
+            raise ValueError(f"expected {self.components} numbers, got {value!r}")
+        return tuple(self._checked_float(part) for part in value)
+
+    def _checked_float(self, value) -> float:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"expected a number, got {value!r}")
+        try:
+            value = float(value)
+        except OverflowError: # An int beyond any float
+            raise ValueError(f"{value!r} is too large for a number with a fraction") from None
+        if self.kind == DOUBLE:
+            if not math.isfinite(value):
+                raise ValueError(f"{value!r} is not a valid 64-bit float")
+        elif not math.isfinite(value) or abs(value) > FLOAT32_MAX:
+            raise ValueError(f"{value!r} is not a valid 32-bit float")
+        return self._checked(value)
+
+    def _checked(self, value):
+        if self.minimum is not None and value < self.minimum or self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{value!r} is outside {self.describe_range()}")
+        return value
+
+    def describe_range(self) -> str:
+        low, high = ("" if limit is None else f"{limit:g}" if isinstance(limit, float) else str(limit)
+                     for limit in (self.minimum, self.maximum))
+        return f"the range {low}..{high}"
+
+
+@functools.lru_cache(maxsize=DECODE_CACHE_SIZE)
+def decode(value_type: ValueType, text: str) -> Value:
+    """Cached ValueType.decode(); values are immutable, so a cached value can be shared."""
+    kind = value_type.kind
+    if kind == STRING:
+        return text
+    if kind == BOOL:
+        try:
+            return BOOL_TEXT[text.strip().lower()]
+        except KeyError:
+            raise ValueError(f"'{text}' is not true or false") from None
+    if kind == INT:
+        try:
+            number = int(text)
+        except ValueError:
+            raise ValueError(f"'{text}' is not a whole number") from None
+        return value_type._checked(number)
+    try:
+        numbers = tuple(float(part) for part in text.split())
+    except ValueError:
+        numbers = ()
+    if len(numbers) != value_type.components:
+        expected = "a number" if value_type.components == 1 else f"{value_type.components} numbers"
+        raise ValueError(f"'{text}' is not {expected}")
+    largest = FLOAT64_MAX if kind == DOUBLE else FLOAT32_MAX
+    low = -largest if value_type.minimum is None else value_type.minimum
+    high = largest if value_type.maximum is None else value_type.maximum
+    for number in numbers:
+        if not low <= number <= high: # Also false for NaN
+            try:
+                value_type._checked_float(number)
+            except ValueError as e:
+                raise ValueError(f"'{text}': {e}") from None
+    return numbers[0] if kind in (FLOAT, DOUBLE) else numbers
+
+
+BOOL_TYPE = ValueType(BOOL)
+INT_TYPE = ValueType(INT, minimum=-2 ** 31, maximum=2 ** 31 - 1)
+UNSIGNED_TYPE = ValueType(INT, minimum=0, maximum=2 ** 32 - 1)
+INT64_TYPE = ValueType(INT, minimum=-2 ** 63, maximum=2 ** 63 - 1)
+UNSIGNED64_TYPE = ValueType(INT, minimum=0, maximum=2 ** 64 - 1)
+INTEGER_TYPE = ValueType(INT) # Unbounded, for whole numbers of an unknown Class
+FLOAT_TYPE = ValueType(FLOAT)
+DOUBLE_TYPE = ValueType(DOUBLE)
+COLOR_TYPE = ValueType(COLOR, 4, 0.0, 1.0) # R G B A, each 0.0-1.0
+STRING_TYPE = ValueType(STRING)
+
+# Class name in usersettings.javsave -> type of its value
+CLASS_TYPES = {
+    "bool": BOOL_TYPE,
+    "int": INT_TYPE,
+    "AZ::s32": INT_TYPE,
+    "unsigned int": UNSIGNED_TYPE,
+    "AZ::u32": UNSIGNED_TYPE,
+    "AZ::u8": ValueType(INT, minimum=0, maximum=255),
+    "AZ::s64": INT64_TYPE,
+    "long long": INT64_TYPE,
+    "AZ::u64": UNSIGNED64_TYPE,
+    "unsigned long long": UNSIGNED64_TYPE,
+    "float": FLOAT_TYPE,
+    "double": DOUBLE_TYPE,
+    "Color": COLOR_TYPE,
+    "Vector2": ValueType(VECTOR, 2),
+    "Vector3": ValueType(VECTOR, 3),
+    "Vector4": ValueType(VECTOR, 4),
+    "AZStd::string": STRING_TYPE,
+}
+
+
+def infer_type(field_name: str, text: str) -> ValueType:
+    """
+    A type for a setting whose Class name is unknown, guessed from its field name and text.
+    Numbers get the widest type, so their value is never rounded: whole numbers an unbounded
+    int, other numbers a double.
+    """
+    if text.strip().lower() in ("true", "false"):
+        return BOOL_TYPE
+    for value_type in (INTEGER_TYPE, DOUBLE_TYPE):
+        try:
+            decode(value_type, text)
+        except ValueError:
+            continue
+        return value_type
+    components = len(text.split())
+    if 2 <= components <= 4:
+        value_type = COLOR_TYPE if components == 4 and "color" in field_name.lower() else CLASS_TYPES[f"Vector{components}"]
+        try:
+            decode(value_type, text)
+            return value_type
+        except ValueError:
+            pass
+    return STRING_TYPE
+
+
+def setting_type(element: ET.Element) -> ValueType:
+    """The type of a <Class field=... value=...> setting's value."""
+    value_type = CLASS_TYPES.get(element.get("name", ""))
+    if value_type is not None:
+        return value_type
+    return infer_type(element.get("field", ""), element.get("value", ""))
+
+
+def decode_setting(element: ET.Element) -> tuple[ValueType, Value | None]:
+    """A setting's type and typed value; the value is None when the text is not valid for the type."""
+    value_type = setting_type(element)
+    try:
+        return value_type, decode(value_type, element.get("value", ""))
+    except ValueError:
+        return value_type, None
@@ -0,0 +1,235 @@
+"""
+Structural diff of parsed config files.
+
+Every element gets a Merkle hash over its tag, attributes, text and the hashes of its children,
+so two trees are compared top-down and any subtree whose hash matches on both sides is skipped
+without looking inside it. Hashing is one linear pass per document, and documents are cached by
+content hash, so comparing the live files against several backups (or the same backup again)
+only re-indexes files that changed; the comparison itself descends into changed subtrees only.
+
+Children are matched by their identifying attribute rather than by position: the setting's
+field for usersettings.javsave, and the actionmap, action and device names for rebindings,
+so changes read like "UserSettings/m_mouseSensitivity value: 0.5 -> 0.7" or
+"player/jump/keyboard input: space -> v".
+"""
+import fnmatch
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+# First attribute present names an element in change paths and pairs it with its counterpart
+IDENTITY_ATTRIBUTES = ("field", "name", "device", "id")
+# Attribute shown as the value of an added or removed element
+VALUE_ATTRIBUTES = ("value", "input")
+TEXT_ATTRIBUTE = "#text"
+# Files of a config folder that are compared by default
+DIFFABLE_FILES = ("savedata/usersettings.javsave", "rebindings*.xml")
+DOCUMENT_CACHE_SIZE = 16
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+@dataclass(frozen=True)
+class FieldChange:
+    path: str # e.g. "UserSettings/m_reticleColor" or "player/jump/keyboard"
+    kind: str # ADDED, REMOVED or CHANGED
+    attribute: str | None = None # The changed attribute; None when a whole element was added or removed
+    old: str | None = None
+    new: str | None = None
+
+    def describe(self) -> str:
+        if self.kind == CHANGED:
+            return f"{self.path} {self.attribute}: {self.old} -> {self.new}"
+        value = self.new if self.kind == ADDED else self.old
+        subject = f"{self.path} {self.attribute}" if self.attribute else self.path
+        return f"{subject} {self.kind}" + (f": {value}" if value is not None else "")
+
+
+@dataclass
+class FileDiff:
+    rel_path: str
+    status: str # "identical", CHANGED, ADDED, REMOVED, or "unreadable"
+    changes: list[FieldChange] = field(default_factory=list)
+    error: str | None = None
+
+
+class Document:
+    """
+    A parsed config file with the Merkle hash and the path segment of each element.
+    Both are computed once per document, so comparisons only visit what differs.
+    """
+
+    def __init__(self, root: ET.Element):
+        self.root = root
+        self.hashes, self.segments = index_tree(root)
+
+
+_documents: OrderedDict[str, Document] = OrderedDict()
+_documents_lock = threading.Lock()
+
+
+def parse_document(data: bytes) -> Document:
+    """Parses and indexes a file's content, reusing the result for content seen recently. Raises ET.ParseError."""
+    key = hashlib.sha256(data).hexdigest()
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is not None:
+            _documents.move_to_end(key)
+            return document
+    document = Document(ET.fromstring(data)) # Treated as read-only, so it can be shared
+    with _documents_lock:
+        _documents[key] = document
+        while len(_documents) > DOCUMENT_CACHE_SIZE:
+            _documents.popitem(last=False)
+    return document
+
+
+def _identity(element: ET.Element) -> tuple[str | None, str]:
+    for name in IDENTITY_ATTRIBUTES:
+        value = element.get(name)
+        if value is not None:
+            return name, value
+    return None, element.tag
+
+
+def index_tree(root: ET.Element) -> tuple[dict[ET.Element, bytes], dict[ET.Element, str]]:
+    """
+    The Merkle hash of every element below and including root, and every element's path segment:
+    its identity, with an occurrence number when siblings of the same tag share it ("name[2]").
+    """
+    hashes = {}
+    segments = {root: root.tag}
+    stack = [(root, False)]
+    while stack: # Post-order without recursion, children are hashed before their parent
+        element, children_done = stack.pop()
+        if not children_done:
+            stack.append((element, True))
+            occurrences = {}
+            for child in element:
+                identity = _identity(child)[1]
+                occurrence = occurrences[(child.tag, identity)] = occurrences.get((child.tag, identity), 0) + 1
+                segments[child] = identity if occurrence == 1 else f"{identity}[{occurrence}]"
+                stack.append((child, False))
+            continue
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(element.tag.encode("utf-8", "surrogateescape"))
+        for name, value in sorted(element.attrib.items()):
+            digest.update(f"\0{name}\1{value}".encode("utf-8", "surrogateescape"))
+        text = (element.text or "").strip()
+        if text:
+            digest.update(f"\2{text}".encode("utf-8", "surrogateescape"))
+        for child in element:
+            digest.update(hashes[child])
+        hashes[element] = digest.digest()
+    return hashes, segments
+
+
+def _element_value(element: ET.Element) -> str | None:
+    for name in VALUE_ATTRIBUTES:
+        if name in element.attrib:
+            return element.get(name)
+    text = (element.text or "").strip()
+    return text or None
+
+
+def _join(path: str, segment: str) -> str:
+    return f"{path}/{segment}" if path else segment
+
+
+def _whole_subtree(document: Document, element: ET.Element, path: str, kind: str,
+                   changes: list[FieldChange]) -> None:
+    value = _element_value(element)
+    changes.append(FieldChange(path, kind, None, *((None, value) if kind == ADDED else (value, None))))
+    for child in element:
+        _whole_subtree(document, child, _join(path, document.segments[child]), kind, changes)
+
+
+def _compare_attributes(old: ET.Element, new: ET.Element, path: str, changes: list[FieldChange]) -> None:
+    identity_name, _identity_value = _identity(old)
+    old_values = {name: value for name, value in old.attrib.items() if name != identity_name}
+    new_values = {name: value for name, value in new.attrib.items() if name != identity_name}
+    old_text, new_text = (old.text or "").strip(), (new.text or "").strip()
+    if old_text or new_text:
+        old_values[TEXT_ATTRIBUTE], new_values[TEXT_ATTRIBUTE] = old_text, new_text
+    for name in list(old_values) + [name for name in new_values if name not in old_values]:
+        old_value, new_value = old_values.get(name), new_values.get(name)
+        if old_value != new_value:
+            kind = CHANGED if old_value is not None and new_value is not None else ADDED if old_value is None else REMOVED
+            changes.append(FieldChange(path, kind, name, old_value, new_value))
+
+
+def _diff_elements(old: Document, new: Document, old_element: ET.Element, new_element: ET.Element,
+                   path: str, changes: list[FieldChange]) -> None:
+    if old.hashes[old_element] == new.hashes[new_element]:
+        return
+    _compare_attributes(old_element, new_element, path or old_element.tag, changes)
+    old_children, new_children = list(old_element), list(new_element)
+    old_hashes, new_hashes, old_segments, new_segments = old.hashes, new.hashes, old.segments, new.segments
+
+    if len(old_children) == len(new_children):
+        # Usually only values changed: pair the children by position and descend where hashes differ
+        differing = [(old_child, new_child) for old_child, new_child in zip(old_children, new_children)
+                     if old_hashes[old_child] != new_hashes[new_child]]
+        if all(old_child.tag == new_child.tag and old_segments[old_child] == new_segments[new_child]
+               for old_child, new_child in differing):
+            for old_child, new_child in differing:
+                _diff_elements(old, new, old_child, new_child, _join(path, old_segments[old_child]), changes)
+            return
+
+    # Children were added, removed or reordered: pair them by tag and path segment
+    new_keyed = {(child.tag, new_segments[child]): child for child in new_children}
+    old_keys = set()
+    for old_child in old_children:
+        key = (old_child.tag, old_segments[old_child])
+        old_keys.add(key)
+        new_child = new_keyed.get(key)
+        if new_child is None:
+            _whole_subtree(old, old_child, _join(path, key[1]), REMOVED, changes)
+        else:
+            _diff_elements(old, new, old_child, new_child, _join(path, key[1]), changes)
+    for key, new_child in new_keyed.items():
+        if key not in old_keys:
+            _whole_subtree(new, new_child, _join(path, key[1]), ADDED, changes)
+
+
+def diff_trees(old: Document, new: Document) -> list[FieldChange]:
+    """
+    Field-level changes from old to new, in document order. Subtrees with equal hashes are
+    skipped without looking inside them.
+    """
+    changes = []
+    _diff_elements(old, new, old.root, new.root, "", changes)
+    return changes
+
+
+def diff_bytes(old_data: bytes, new_data: bytes) -> list[FieldChange]:
+    """Field-level changes between two versions of a config file. Raises ET.ParseError."""
+    if old_data == new_data:
+        return []
+    return diff_trees(parse_document(old_data), parse_document(new_data))
+
+
+def diffable(rel_paths, patterns: tuple[str, ...] = DIFFABLE_FILES) -> list[str]:
+    return sorted(rel_path for rel_path in rel_paths if any(fnmatch.fnmatch(rel_path, pattern) for pattern in patterns))
+
+
+def diff_file_sets(old_files: dict[str, bytes], new_files: dict[str, bytes]) -> list[FileDiff]:
+    """Compares two sets of files keyed by relative path, e.g. a backup and the live config folder."""
+    results = []
+    for rel_path in sorted(old_files.keys() | new_files.keys()):
+        if rel_path not in new_files:
+            results.append(FileDiff(rel_path, REMOVED))
+        elif rel_path not in old_files:
+            results.append(FileDiff(rel_path, ADDED))
+        else:
+            try:
+                changes = diff_bytes(old_files[rel_path], new_files[rel_path])
+            except ET.ParseError as e:
+                results.append(FileDiff(rel_path, "unreadable", error=str(e)))
+                continue
+            results.append(FileDiff(rel_path, CHANGED if changes else "identical", changes))
+    return results
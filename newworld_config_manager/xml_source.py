@@ -0,0 +1,199 @@
+import bisect
+import os
+import re
+import stat
+import tempfile
+import xml.etree.ElementTree as ET
+import xml.parsers.expat as expat
+from pathlib import Path
+from typing import Iterable
+
+DEFAULT_ENCODING = "utf-8"
+
+_TAG_NAME_RE = re.compile(rb"<([^\s/>]+)")
+_ATTRIBUTE_RE = re.compile(rb"\s+([^\s=/>]+)\s*=\s*([\"'])(.*?)\2", re.DOTALL)
+_TAG_END_RE = re.compile(rb"\s*/?>")
+_ASCII_PROBE = "<a b='\"'/>&;"
+
+
+class PatchError(ValueError):
+    """The document cannot be patched in place; the caller should rewrite the whole file."""
+
+
+def _fix_name(name: str) -> str:
+    # Same convention as ElementTree's parser: "uri}local" becomes "{uri}local"
+    return "{" + name if "}" in name else name
+
+
+def parse_with_offsets(data: bytes) -> tuple[ET.Element, list[int], str]:
+    """
+    Parses XML bytes into the same tree ET.fromstring() builds, and also returns the byte
+    offset of every element's start tag (in root.iter() order) and the declared encoding.
+    Raises ET.ParseError on invalid XML.
+    """
+    builder = ET.TreeBuilder()
+    parser = expat.ParserCreate(None, "}")
+    parser.buffer_text = True
+    offsets: list[int] = []
+    declared_encoding: list[str] = []
+
+    def start(tag, attributes):
+        offsets.append(parser.CurrentByteIndex)
+        builder.start(_fix_name(tag), {_fix_name(k): v for k, v in attributes.items()})
+
+    parser.XmlDeclHandler = lambda version, encoding, standalone: encoding and declared_encoding.append(encoding)
+    parser.StartElementHandler = start
+    parser.EndElementHandler = lambda tag: builder.end(_fix_name(tag))
+    parser.CharacterDataHandler = builder.data
+    try:
+        parser.Parse(data, True)
+    except expat.ExpatError as e:
+        error = ET.ParseError(f"{expat.ErrorString(e.code)}: line {e.lineno}, column {e.offset}")
+        error.code = e.code
+        error.position = (e.lineno, e.offset)
+        raise error from None
+    return builder.close(), offsets, (declared_encoding[0] if declared_encoding else DEFAULT_ENCODING)
+
+
+class SourceMap:
+    """
+    Links a parsed tree to the bytes it was parsed from: the file content, its size and
+    mtime at parse time, and the byte offset of each element's start tag. Attribute value
+    spans are found by scanning a start tag only when that element has to be patched.
+    """
+
+    def __init__(self, root: ET.Element, offsets: list[int], data: bytes, size: int, mtime_ns: int,
+                 encoding: str = DEFAULT_ENCODING):
+        self.root = root
+        self.data = data
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.encoding = encoding
+        self.offsets: dict[ET.Element, int] = dict(zip(root.iter(), offsets))
+
+    def matches_file(self, filepath: str | Path) -> bool:
+        """True if the file on disk is still the one the tree was parsed from (by size and mtime)."""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return False
+        return st.st_size == self.size and st.st_mtime_ns == self.mtime_ns
+
+    def patch_attributes(self, changed_attributes: Iterable[tuple[ET.Element, str]]) -> tuple[bytes, list[tuple[int, int, bytes]]]:
+        """
+        Returns a copy of the source bytes with the value of each (element, attribute) replaced
+        by its current value in the tree, plus the edits applied as (start, end, replacement).
+        Attributes added in memory are appended to the start tag and removed ones are dropped;
+        every other byte is kept as it was. Raises PatchError if that is not possible.
+        """
+        try:
+            encoded_probe = _ASCII_PROBE.encode(self.encoding)
+        except LookupError:
+            raise PatchError(f"unknown encoding {self.encoding!r}") from None
+        if encoded_probe != _ASCII_PROBE.encode("ascii"):
+            raise PatchError(f"encoding {self.encoding!r} is not ASCII-compatible")
+
+        attributes_by_element: dict[ET.Element, set[str]] = {}
+        for element, attribute in changed_attributes:
+            attributes_by_element.setdefault(element, set()).add(attribute)
+
+        edits = []
+        for element, attributes in attributes_by_element.items():
+            offset = self.offsets.get(element)
+            if offset is None:
+                raise PatchError(f"<{element.tag}> was not part of the parsed document")
+            edits.extend(self._patch_start_tag(element, offset, attributes))
+        edits.sort()
+
+        pieces = []
+        position = 0
+        for start, end, replacement in edits:
+            pieces.append(self.data[position:start])
+            pieces.append(replacement)
+            position = end
+        pieces.append(self.data[position:])
+        return b"".join(pieces), edits
+
+    def _patch_start_tag(self, element: ET.Element, offset: int, attributes: set[str]) -> list[tuple[int, int, bytes]]:
+        tag_match = _TAG_NAME_RE.match(self.data, offset)
+        if tag_match is None or tag_match.group(1).decode(self.encoding) != element.tag:
+            raise PatchError(f"start tag of <{element.tag}> not found at byte {offset}")
+
+        spans: dict[str, re.Match] = {}
+        position = tag_match.end()
+        while (attribute_match := _ATTRIBUTE_RE.match(self.data, position)) is not None:
+            spans[attribute_match.group(1).decode(self.encoding)] = attribute_match
+            position = attribute_match.end()
+        if _TAG_END_RE.match(self.data, position) is None:
+            raise PatchError(f"could not read the start tag of <{element.tag}> at byte {offset}")
+
+        edits = []
+        for attribute in sorted(attributes):
+            value = element.get(attribute)
+            span = spans.get(attribute)
+            if span is None:
+                if value is not None: # Added in memory: append before the end of the start tag
+                    edits.append((position, position, self._encode_attribute(attribute, value)))
+            elif value is None: # Removed in memory, including the whitespace before it
+                edits.append((span.start(), span.end(), b""))
+            else:
+                quote = span.group(2)
+                edits.append((span.start(3), span.end(3), self._escape_value(value, quote)))
+        return edits
+
+    def _escape_value(self, value: str, quote: bytes = b'"') -> bytes:
+        value = (value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+                 .replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;"))
+        value = value.replace('"', "&quot;") if quote == b'"' else value.replace("'", "&apos;")
+        return value.encode(self.encoding, errors="xmlcharrefreplace")
+
+    def _encode_attribute(self, attribute: str, value: str) -> bytes:
+        return b" " + attribute.encode(self.encoding) + b'="' + self._escape_value(value) + b'"'
+
+    def rebase(self, data: bytes, edits: list[tuple[int, int, bytes]], size: int, mtime_ns: int):
+        """Moves the map onto the patched bytes returned by patch_attributes() once they were written."""
+        if edits:
+            positions = [start for start, _end, _replacement in edits]
+            shifts = [0]
+            for start, end, replacement in edits:
+                shifts.append(shifts[-1] + len(replacement) - (end - start))
+            # Edits are inside start tags, so an element's own start only moves with earlier edits
+            for element, offset in self.offsets.items():
+                self.offsets[element] = offset + shifts[bisect.bisect_left(positions, offset)]
+        self.data = data
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def rebind(self, root: ET.Element) -> None:
+        """Moves the map onto another tree with the same elements in the same order, e.g. one the file's values were merged into."""
+        self.offsets = dict(zip(root.iter(), (self.offsets[element] for element in self.root.iter())))
+        self.root = root
+
+
+def write_file_atomically(filepath: str | Path, data: bytes) -> os.stat_result:
+    """
+    Writes data to a temporary file next to filepath, fsyncs it and renames it over filepath,
+    so the file is never left half-written. Keeps the permissions of an existing file.
+    Returns the stat of the written file.
+    """
+    path = Path(filepath)
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        mode = None
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return path.stat()
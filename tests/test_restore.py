@@ -0,0 +1,164 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from newworld_config_manager import restore
+from newworld_config_manager.backup_store import BackupStore
+from newworld_config_manager.restore import (PREVIOUS_SUFFIX, STAGING_SUFFIX, files_from_folder, files_from_snapshot,
+                                             restore_directory)
+
+
+def write_files(root: Path, files: dict[str, bytes]) -> None:
+    for rel_path, data in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+def read_files(root: Path) -> dict[str, bytes]:
+    return {path.relative_to(root).as_posix(): path.read_bytes() for path in root.rglob("*") if path.is_file()}
+
+
+def leftovers(target: Path) -> list[Path]:
+    return [path for path in (target.with_name(target.name + STAGING_SUFFIX),
+                              target.with_name(target.name + PREVIOUS_SUFFIX)) if path.exists()]
+
+
+@pytest.fixture
+def live(tmp_path) -> Path:
+    live_dir = tmp_path / "New World"
+    write_files(live_dir, {
+        "savedata/usersettings.javsave": b"<settings a='1'/>",
+        "rebindings_b1.xml": b"<rebindings/>",
+        "notes.txt": b"unchanged",
+    })
+    return live_dir
+
+
+def test_round_trip_through_snapshot(tmp_path, live):
+    original = read_files(live)
+    store = BackupStore(tmp_path / "store")
+    snapshot_id = store.create_snapshot(live)
+    write_files(live, {"savedata/usersettings.javsave": b"<settings a='2'/>", "rebindings_b1.xml": b"<changed/>"})
+
+    result = restore_directory(live, files_from_snapshot(store, snapshot_id))
+
+    assert read_files(live) == original
+    assert sorted(result.copied) == ["rebindings_b1.xml", "savedata/usersettings.javsave"]
+    assert result.unchanged == ["notes.txt"]
+    assert result.deleted == []
+    assert leftovers(live) == []
+
+
+def test_restored_files_keep_backup_mtimes(tmp_path, live):
+    backup = tmp_path / "backup"
+    write_files(backup, {"notes.txt": b"from backup"})
+    os.utime(backup / "notes.txt", ns=(1_000_000_000, 1_000_000_000))
+
+    restore_directory(live, files_from_folder(backup))
+
+    assert (live / "notes.txt").stat().st_mtime_ns == 1_000_000_000
+
+
+def test_extra_live_files_are_deleted(tmp_path, live):
+    backup = tmp_path / "backup"
+    write_files(backup, {"savedata/usersettings.javsave": b"<settings a='1'/>"})
+    write_files(live, {"savedata/extra.javsave": b"new since the backup"})
+
+    result = restore_directory(live, files_from_folder(backup))
+
+    assert read_files(live) == {"savedata/usersettings.javsave": b"<settings a='1'/>"}
+    assert sorted(result.deleted) == ["notes.txt", "rebindings_b1.xml", "savedata/extra.javsave"]
+
+
+def test_restore_into_missing_folder(tmp_path):
+    backup = tmp_path / "backup"
+    write_files(backup, {"a.xml": b"<a/>"})
+    target = tmp_path / "missing"
+
+    result = restore_directory(target, files_from_folder(backup))
+
+    assert read_files(target) == {"a.xml": b"<a/>"}
+    assert result.copied == ["a.xml"]
+
+
+def test_failed_swap_rolls_back_to_live_folder(tmp_path, live, monkeypatch):
+    original = read_files(live)
+    backup = tmp_path / "backup"
+    write_files(backup, {"savedata/usersettings.javsave": b"<settings a='9'/>"})
+    real_rename = os.rename
+
+    def rename(source, target):
+        # The live folder is moved aside, then moving the staged folder in fails
+        if str(source).endswith(STAGING_SUFFIX):
+            raise OSError("disk full")
+        real_rename(source, target)
+
+    monkeypatch.setattr(restore.os, "rename", rename)
+    with pytest.raises(OSError, match="disk full"):
+        restore_directory(live, files_from_folder(backup))
+
+    assert read_files(live) == original
+    assert leftovers(live) == []
+
+
+def test_failure_while_staging_leaves_live_folder_untouched(tmp_path, live, monkeypatch):
+    original = read_files(live)
+    backup = tmp_path / "backup"
+    write_files(backup, {"a.xml": b"<a/>", "b.xml": b"<b/>"})
+
+    def copyfile(source, target):
+        raise OSError("read error")
+
+    monkeypatch.setattr(restore.shutil, "copyfile", copyfile)
+    with pytest.raises(OSError, match="read error"):
+        restore_directory(live, files_from_folder(backup))
+
+    assert read_files(live) == original
+    assert leftovers(live) == []
+
+
+def test_leftovers_of_an_interrupted_restore_are_removed(tmp_path, live):
+    write_files(live.with_name(live.name + STAGING_SUFFIX), {"stale.xml": b"<stale/>"})
+    backup = tmp_path / "backup"
+    write_files(backup, {"a.xml": b"<a/>"})
+
+    restore_directory(live, files_from_folder(backup))
+
+    assert read_files(live) == {"a.xml": b"<a/>"}
+    assert leftovers(live) == []
+
+
+def test_live_folder_left_aside_by_a_crash_is_moved_back(tmp_path, live):
+    # An earlier restore stopped after moving the live folder aside and before moving the staged one in
+    previous = live.with_name(live.name + PREVIOUS_SUFFIX)
+    os.rename(live, previous)
+    write_files(live.with_name(live.name + STAGING_SUFFIX), {"half.xml": b"<half/>"})
+    backup = tmp_path / "backup"
+    write_files(backup, {"savedata/usersettings.javsave": b"<settings a='1'/>", "notes.txt": b"unchanged"})
+
+    result = restore_directory(live, files_from_folder(backup))
+
+    assert read_files(live) == {"savedata/usersettings.javsave": b"<settings a='1'/>", "notes.txt": b"unchanged"}
+    assert result.deleted == ["rebindings_b1.xml"] # Compared with the recovered live folder, not an empty one
+    assert sorted(result.unchanged) == ["notes.txt", "savedata/usersettings.javsave"]
+    assert leftovers(live) == []
+
+
+def test_crash_recovery_keeps_live_folder_when_restore_fails(tmp_path, live, monkeypatch):
+    original = read_files(live)
+    previous = live.with_name(live.name + PREVIOUS_SUFFIX)
+    os.rename(live, previous)
+    backup = tmp_path / "backup"
+    write_files(backup, {"a.xml": b"<a/>"})
+
+    def copyfile(source, target):
+        raise OSError("read error")
+
+    monkeypatch.setattr(restore.shutil, "copyfile", copyfile)
+    with pytest.raises(OSError, match="read error"):
+        restore_directory(live, files_from_folder(backup))
+
+    assert read_files(live) == original
+    assert leftovers(live) == []
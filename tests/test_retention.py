@@ -0,0 +1,86 @@
+import datetime
+
+from newworld_config_manager.backup_store import BackupStore
+from newworld_config_manager.catalog import KIND_ARCHIVE, KIND_FOLDER, KIND_SNAPSHOT, CatalogEntry, RetentionPolicy
+
+NOW = datetime.datetime(2024, 3, 15, 12, 0, 0) # A Friday
+
+
+def entry(backup_id: str, created: datetime.datetime, kind: str = KIND_SNAPSHOT) -> CatalogEntry:
+    return CatalogEntry(backup_id, kind, created.isoformat(timespec="seconds"), None, 1, 1, 1, "hash",
+                        None, None, None, None, backup_id, 0)
+
+
+def hourly(count: int, start: datetime.datetime = NOW) -> list[CatalogEntry]:
+    return [entry(f"h{index:03}", start - datetime.timedelta(hours=index)) for index in range(count)]
+
+
+def kept(policy: RetentionPolicy, entries: list[CatalogEntry]) -> set[str]:
+    pruned = {pruned_entry.id for pruned_entry in policy.backups_to_prune(entries)}
+    return {backup.id for backup in entries} - pruned
+
+
+def test_keep_last_keeps_newest():
+    entries = hourly(5)
+    assert kept(RetentionPolicy(keep_last=2, keep_daily=0, keep_weekly=0), entries) == {"h000", "h001"}
+
+
+def test_keep_daily_keeps_newest_of_each_recent_day():
+    # Six backups a day for four days: 12:00, 11:00, ... 07:00
+    entries = [entry(f"d{day}_{hour}", NOW - datetime.timedelta(days=day, hours=hour))
+               for day in range(4) for hour in range(6)]
+    assert kept(RetentionPolicy(keep_last=0, keep_daily=3, keep_weekly=0), entries) == {"d0_0", "d1_0", "d2_0"}
+
+
+def test_keep_daily_counts_days_with_backups():
+    entries = [entry("today", NOW), entry("week_ago", NOW - datetime.timedelta(days=7)),
+               entry("month_ago", NOW - datetime.timedelta(days=30))]
+    assert kept(RetentionPolicy(keep_last=0, keep_daily=2, keep_weekly=0), entries) == {"today", "week_ago"}
+
+
+def test_keep_weekly_keeps_newest_of_each_iso_week():
+    monday = NOW - datetime.timedelta(days=4)
+    entries = [entry("fri", NOW), entry("mon", monday), entry("sun_before", monday - datetime.timedelta(days=1)),
+               entry("mon_before", monday - datetime.timedelta(days=7)),
+               entry("three_weeks_ago", monday - datetime.timedelta(days=15))]
+    assert kept(RetentionPolicy(keep_last=0, keep_daily=0, keep_weekly=2), entries) == {"fri", "sun_before"}
+
+
+def test_rules_are_combined():
+    entries = hourly(40) # Friday 12:00 back to Wednesday 21:00, all in one ISO week
+    policy = RetentionPolicy(keep_last=3, keep_daily=3, keep_weekly=1)
+    # The newest three, plus the newest of Thursday (23:00) and of Wednesday (23:00)
+    assert kept(policy, entries) == {"h000", "h001", "h002", "h013", "h037"}
+
+
+def test_legacy_folders_are_never_pruned():
+    entries = hourly(3) + [entry("old_folder", NOW - datetime.timedelta(days=400), kind=KIND_FOLDER),
+                           entry("archive", NOW - datetime.timedelta(days=300), kind=KIND_ARCHIVE)]
+    pruned = RetentionPolicy(keep_last=1, keep_daily=0, keep_weekly=0).backups_to_prune(entries)
+    assert [backup.id for backup in pruned] == ["h001", "h002", "archive"] # Newest first
+
+
+def test_disabled_policy_prunes_nothing():
+    policy = RetentionPolicy(keep_last=0, keep_daily=0, keep_weekly=0)
+    assert not policy.enabled
+    assert policy.backups_to_prune(hourly(5)) == []
+
+
+def test_store_prune_deletes_snapshots_and_their_objects(tmp_path):
+    live = tmp_path / "New World"
+    live.mkdir()
+    store = BackupStore(tmp_path / "store")
+    snapshot_ids = []
+    for content in (b"first", b"second", b"third"):
+        (live / "usersettings.javsave").write_bytes(content)
+        snapshot_ids.append(store.create_snapshot(live))
+    policy = RetentionPolicy(keep_last=2, keep_daily=0, keep_weekly=0)
+
+    assert [backup.id for backup in store.prune(policy, dry_run=True)] == snapshot_ids[:1]
+    assert store.list_snapshots() == snapshot_ids
+
+    assert [backup.id for backup in store.prune(policy)] == snapshot_ids[:1]
+    assert store.list_snapshots() == snapshot_ids[1:]
+    assert sorted(backup.id for backup in store.catalog.entries()) == snapshot_ids[1:]
+    stored = sorted(path.read_bytes() for path in store.objects_dir.rglob("*") if path.is_file())
+    assert stored == [b"second", b"third"]
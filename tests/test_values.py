@@ -0,0 +1,67 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from newworld_config_manager.presets import apply_settings, capture_settings
+from newworld_config_manager.values import (DOUBLE, DOUBLE_TYPE, FLOAT_TYPE, INT, INT64_TYPE, UNSIGNED64_TYPE,
+                                            decode_setting, infer_type)
+
+
+def setting(class_name: str, value: str) -> ET.Element:
+    return ET.Element("Class", {"name": class_name, "field": "m_value", "value": value})
+
+
+def round_trip(element: ET.Element) -> str:
+    value_type, value = decode_setting(element)
+    return value_type.encode(value)
+
+
+@pytest.mark.parametrize("text", ["0.123456789012", "1e-300", "1.7976931348623157e+308", "-2.5"])
+def test_double_keeps_every_digit(text):
+    assert float(round_trip(setting("double", text))) == float(text)
+
+
+def test_double_encodes_with_repr():
+    assert DOUBLE_TYPE.encode("0.123456789012") == "0.123456789012"
+    assert DOUBLE_TYPE.encode(3) == "3.0"
+
+
+def test_float_is_still_rounded_to_32_bits():
+    assert FLOAT_TYPE.encode(128 / 255) == "0.5019608"
+
+
+@pytest.mark.parametrize("class_name, text", [
+    ("AZ::s64", "-9223372036854775808"),
+    ("AZ::s64", "9223372036854775807"),
+    ("AZ::u64", "18446744073709551615"),
+    ("AZ::u64", "12345678901234567"),
+])
+def test_64_bit_integers_round_trip(class_name, text):
+    assert round_trip(setting(class_name, text)) == text
+
+
+def test_64_bit_ranges_are_checked():
+    with pytest.raises(ValueError):
+        INT64_TYPE.decode("9223372036854775808")
+    with pytest.raises(ValueError):
+        UNSIGNED64_TYPE.decode("-1")
+
+
+def test_unknown_class_never_narrows_numbers():
+    assert infer_type("m_value", "12345678901234567").kind == INT
+    assert infer_type("m_value", "0.123456789012").kind == DOUBLE
+    assert round_trip(setting("AZ::unknown", "12345678901234567")) == "12345678901234567"
+    assert round_trip(setting("AZ::unknown", "0.123456789012")) == "0.123456789012"
+
+
+def test_preset_round_trip_of_large_integers():
+    root = ET.Element("ObjectStream")
+    root.append(setting("AZ::u64", "12345678901234567"))
+    assert capture_settings(root.iter("Class")) == {"m_value": 12345678901234567}
+
+    changes, missing = apply_settings(root, {"m_value": "12345678901234999"})
+    assert [(change.old_value, change.new_value) for change in changes] == [("12345678901234567", "12345678901234999")]
+    assert missing == []
+
+    changes, _missing = apply_settings(root, {"m_value": 12345678901234999})
+    assert changes == [] # Already holds the value
@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from newworld_config_manager.config_parser import ConfigParser
+from newworld_config_manager.xml_source import PatchError, SourceMap, parse_with_offsets
+
+# Formatting ElementTree would not reproduce: comments, CRLF, tabs, single quotes, entities, odd spacing
+SOURCE = (b"<?xml version='1.0' encoding='utf-8'?>\r\n"
+          b"<!-- written by the game -->\r\n"
+          b"<ObjectStream version=\"3\">\r\n"
+          b"\t<Class name='float'  field=\"m_a\" value=\"0.5000000\"/>\r\n"
+          b"\t<Class name=\"string\" field='m_b' value='a &amp; b'   />\r\n"
+          b"\t<Class name=\"bool\" field=\"m_c\" value=\"false\"><!-- keep --></Class>\r\n"
+          b"</ObjectStream>\r\n")
+
+
+def source_map(data: bytes = SOURCE) -> SourceMap:
+    root, offsets, encoding = parse_with_offsets(data)
+    return SourceMap(root, offsets, data, len(data), 0, encoding)
+
+
+def field(root, name: str):
+    return next(element for element in root.iter("Class") if element.get("field") == name)
+
+
+def test_unchanged_document_is_returned_as_is():
+    data, edits = source_map().patch_attributes([])
+    assert data == SOURCE
+    assert edits == []
+
+
+def test_only_changed_values_are_rewritten():
+    mapping = source_map()
+    field(mapping.root, "m_a").set("value", "0.75")
+    field(mapping.root, "m_c").set("value", "true")
+
+    data, _edits = mapping.patch_attributes([(field(mapping.root, "m_a"), "value"), (field(mapping.root, "m_c"), "value")])
+
+    assert data == SOURCE.replace(b'"0.5000000"', b'"0.75"').replace(b'value="false"', b'value="true"')
+
+
+def test_values_are_escaped_for_their_quote():
+    mapping = source_map()
+    field(mapping.root, "m_b").set("value", "it's <\"x\">")
+
+    data, _edits = mapping.patch_attributes([(field(mapping.root, "m_b"), "value")])
+
+    assert data == SOURCE.replace(b"value='a &amp; b'", b"value='it&apos;s &lt;\"x\"&gt;'")
+    assert field(parse_with_offsets(data)[0], "m_b").get("value") == "it's <\"x\">"
+
+
+def test_added_and_removed_attributes():
+    mapping = source_map()
+    element = field(mapping.root, "m_a")
+    element.set("extra", "1")
+    del element.attrib["name"]
+
+    data, _edits = mapping.patch_attributes([(element, "extra"), (element, "name")])
+
+    assert data == SOURCE.replace(b"<Class name='float'  field=\"m_a\" value=\"0.5000000\"/>",
+                                  b"<Class  field=\"m_a\" value=\"0.5000000\" extra=\"1\"/>")
+
+
+def test_element_outside_the_document_cannot_be_patched():
+    mapping = source_map()
+    other = source_map().root
+    with pytest.raises(PatchError):
+        mapping.patch_attributes([(field(other, "m_a"), "value")])
+
+
+def test_non_ascii_compatible_encoding_cannot_be_patched():
+    data = SOURCE.decode("utf-8").replace("utf-8", "utf-16").encode("utf-16")
+    mapping = source_map(data)
+    with pytest.raises(PatchError):
+        mapping.patch_attributes([(field(mapping.root, "m_a"), "value")])
+
+
+@pytest.fixture
+def settings_file(tmp_path):
+    path = tmp_path / "usersettings.javsave"
+    path.write_bytes(SOURCE)
+    return path
+
+
+def test_save_patches_only_changed_values(tmp_path, settings_file):
+    parser = ConfigParser(tmp_path)
+    root = parser.load_xml_config(str(settings_file))
+    field(root, "m_a").set("value", "1")
+
+    assert parser.save_xml_config(str(settings_file), root, [(field(root, "m_a"), "value")])
+    assert settings_file.read_bytes() == SOURCE.replace(b'"0.5000000"', b'"1"')
+
+    # The source map follows the written bytes, so a second save patches the shifted offsets
+    field(root, "m_b").set("value", "c")
+    assert parser.save_xml_config(str(settings_file), root, [(field(root, "m_b"), "value")])
+    assert settings_file.read_bytes() == SOURCE.replace(b'"0.5000000"', b'"1"').replace(b"'a &amp; b'", b"'c'")
+
+
+def test_save_refuses_file_changed_on_disk(tmp_path, settings_file):
+    parser = ConfigParser(tmp_path)
+    root = parser.load_xml_config(str(settings_file))
+    changed_on_disk = SOURCE.replace(b"m_c\" value=\"false\"", b"m_c\" value=\"true\" ")
+    settings_file.write_bytes(changed_on_disk)
+    os.utime(settings_file, ns=(1, 1))
+    field(root, "m_a").set("value", "1")
+
+    assert parser.file_changed_on_disk(str(settings_file))
+    assert not parser.save_xml_config(str(settings_file), root, [(field(root, "m_a"), "value")])
+    assert settings_file.read_bytes() == changed_on_disk
+
+
+def test_save_overwrites_file_changed_on_disk_when_asked(tmp_path, settings_file):
+    parser = ConfigParser(tmp_path)
+    root = parser.load_xml_config(str(settings_file))
+    settings_file.write_bytes(SOURCE + b"\r\n")
+    os.utime(settings_file, ns=(1, 1))
+    field(root, "m_a").set("value", "1")
+
+    assert parser.save_xml_config(str(settings_file), root, [(field(root, "m_a"), "value")], overwrite_changes=True)
+    written = settings_file.read_bytes()
+    assert b"<!-- written by the game -->" not in written # Whole tree written, not patched into stale bytes
+    assert field(parse_with_offsets(written)[0], "m_a").get("value") == "1"
+    assert not parser.file_changed_on_disk(str(settings_file))